@@ -5,12 +5,25 @@ Main Flask application integrating Twilio, ElevenLabs, and AI voice agent
 
 import os
 import json
+import base64
 import logging
-from flask import Flask, request, Response, jsonify, render_template
+import threading
+from datetime import datetime
+from urllib.parse import urlencode
+from flask import Flask, request, Response, jsonify, render_template, stream_with_context
 from twilio_client import TwilioClient
 from elevenlabs_client import ElevenLabsClient
-from voice_agent import ClinicalTrialVoiceAgent
-from typing import Dict, Any
+from voice_agent import ClinicalTrialVoiceAgent, transcript_key
+from partial_results import PartialResultCache, TentativeTurn
+from session_store import create_session_store
+from session_reaper import SessionReaper, TERMINAL_CALL_STATUSES
+from conversation_store import ConversationStore, create_conversation_store
+from trial_protocol import ProtocolVersionError
+from export_appointments import (
+    iter_json_array, iter_ndjson, stream_export, export_appointments_to_files, EXPORT_FORMATS
+)
+from config import SESSION_IDLE_TTL, SESSION_MAX_AGE
+from typing import Dict, Any, Optional
 import time
 
 # Configure logging
@@ -24,8 +37,61 @@ app = Flask(__name__)
 twilio_client = TwilioClient()
 elevenlabs_client = ElevenLabsClient()
 
-# Store active conversations
-active_conversations = {}
+# Logged conversations for follow-up and the calendar; opened on first use,
+# so importing the app creates no database
+conversation_store: Optional[ConversationStore] = None
+_conversation_store_lock = threading.Lock()
+
+def get_conversation_store() -> ConversationStore:
+    """The configured conversation store, created (and migrated) on first use"""
+    global conversation_store
+    if conversation_store is None:
+        with _conversation_store_lock:
+            if conversation_store is None:
+                conversation_store = create_conversation_store()
+    return conversation_store
+
+# Largest page /api/appointments will return
+MAX_PAGE_SIZE = 1000
+
+# Store active conversations (shared across workers when SESSION_STORE=sqlite)
+active_conversations = create_session_store()
+
+# Next turns worked out from partial transcripts (per worker process)
+partial_results = PartialResultCache()
+
+def _flush_evicted_conversation(call_sid: str, conversation: Dict[str, Any], reason: str):
+    """Persist a partial screening before its session is evicted"""
+    partial_results.discard(call_sid)
+    _log_conversation_summary(call_sid, conversation['voice_agent'], end_reason=reason)
+
+# Evict abandoned calls so the session store does not grow without bound
+session_reaper = SessionReaper(
+    active_conversations,
+    idle_ttl=SESSION_IDLE_TTL,
+    max_age=SESSION_MAX_AGE,
+    on_evict=_flush_evicted_conversation
+)
+
+def _load_conversation(call_sid: str) -> Optional[Dict[str, Any]]:
+    """
+    Active conversation for a call, or None
+    
+    A call restored on a worker that no longer has the protocol version it
+    started with cannot continue; its session is dropped so the call ends.
+    """
+    try:
+        return active_conversations.get(call_sid)
+    except ProtocolVersionError as e:
+        logger.warning(f"Ending call {call_sid}: {e}")
+        active_conversations.delete(call_sid)
+        session_reaper.forget(call_sid)
+        return None
+
+@app.before_request
+def reap_expired_sessions():
+    """Evict idle calls; cheap when nothing has expired"""
+    session_reaper.reap()
 
 @app.route('/handle_call', methods=['POST'])
 def handle_incoming_call():
@@ -38,17 +104,20 @@ def handle_incoming_call():
         
         # Initialize voice agent for this call
         voice_agent = ClinicalTrialVoiceAgent()
-        active_conversations[call_sid] = {
+        
+        # Get greeting from voice agent
+        greeting = voice_agent.process_incoming_call(caller_number=from_number)
+        
+        conversation = {
             'voice_agent': voice_agent,
             'from_number': from_number,
             'start_time': time.time()
         }
-        
-        # Get greeting from voice agent
-        greeting = voice_agent.process_incoming_call()
+        session_reaper.touch(call_sid, conversation)
+        active_conversations[call_sid] = conversation
         
         # Create TwiML response
-        twiml_response = twilio_client.create_incoming_call_response(greeting)
+        twiml_response = twilio_client.create_incoming_call_response(greeting, gather=voice_agent.gather_options())
         
         return Response(twiml_response, mimetype='text/xml')
         
@@ -66,10 +135,16 @@ def process_speech():
     try:
         call_sid = request.form.get('CallSid')
         speech_result = request.form.get('SpeechResult', '')
+        confidence = _speech_confidence(request.form.get('Confidence'))
+        # Keyed-in digits are exact; no recognizer score applies
+        digits = request.form.get('Digits')
+        if digits and not speech_result:
+            speech_result, confidence = digits, None
         
-        logger.info(f"Processing speech for call {call_sid}: {speech_result}")
+        logger.info(f"Processing speech for call {call_sid}: {speech_result} (confidence {confidence})")
         
-        if call_sid not in active_conversations:
+        conversation = _load_conversation(call_sid)
+        if conversation is None:
             logger.error(f"No active conversation found for call {call_sid}")
             error_response = twilio_client.create_speech_response(
                 "I apologize, but I'm having trouble with this call. Please try calling back.",
@@ -78,24 +153,43 @@ def process_speech():
             return Response(error_response, mimetype='text/xml')
         
         # Get voice agent for this conversation
-        voice_agent = active_conversations[call_sid]['voice_agent']
+        voice_agent = conversation['voice_agent']
+        turn = len(voice_agent.conversation_log)
+        tentative = partial_results.take(call_sid)
+        reused = tentative is not None and tentative.matches(turn, transcript_key(speech_result), confidence)
+        if tentative is not None:
+            partial_results.record(reused)
         
-        # Process patient response
-        ai_response = voice_agent.process_patient_response(speech_result)
-        
-        # Check if conversation should continue
-        continue_conversation = voice_agent.conversation_stage != "conclusion"
-        
-        # Create TwiML response
-        twiml_response = twilio_client.create_speech_response(
-            ai_response, 
-            continue_conversation=continue_conversation
-        )
+        if reused:
+            # A partial transcript already took this turn: pick up where its preview left off
+            voice_agent = ClinicalTrialVoiceAgent.from_snapshot(tentative.snapshot)
+            voice_agent.finalize_turn(turn, speech_result, confidence)
+            conversation['voice_agent'] = voice_agent
+            continue_conversation = tentative.continue_conversation
+            twiml_response = tentative.twiml
+        else:
+            # Process patient response
+            ai_response = voice_agent.process_patient_response(speech_result, asr_confidence=confidence)
+            
+            # Check if conversation should continue
+            continue_conversation = voice_agent.conversation_stage != "conclusion"
+            
+            # Create TwiML response
+            twiml_response = twilio_client.create_speech_response(
+                ai_response, 
+                continue_conversation=continue_conversation,
+                gather=voice_agent.gather_options() if continue_conversation else {}
+            )
         
         # If conversation is ending, log the summary
         if not continue_conversation:
             _log_conversation_summary(call_sid, voice_agent)
-            del active_conversations[call_sid]
+            active_conversations.delete(call_sid)
+            session_reaper.forget(call_sid)
+        else:
+            # Write the updated state back so any worker can take the next turn
+            session_reaper.touch(call_sid, conversation)
+            active_conversations[call_sid] = conversation
         
         return Response(twiml_response, mimetype='text/xml')
         
@@ -107,12 +201,63 @@ def process_speech():
         )
         return Response(error_response, mimetype='text/xml')
 
+@app.route('/partial_speech', methods=['POST'])
+def partial_speech():
+    """Work out the next turn from a partial transcript while the caller is still speaking"""
+    try:
+        call_sid = request.form.get('CallSid')
+        transcript = _partial_transcript(request.form.get('StableSpeechResult', ''),
+                                         request.form.get('UnstableSpeechResult', ''))
+        conversation = _load_conversation(call_sid)
+        if not transcript or conversation is None:
+            return '', 204
+        
+        voice_agent = conversation['voice_agent']
+        turn = len(voice_agent.conversation_log)
+        key = transcript_key(transcript)
+        pending = partial_results.get(call_sid)
+        if pending is not None and pending.turn == turn and pending.transcript == key:
+            return '', 204
+        
+        # A throwaway copy: the call itself only moves on the final result
+        preview = ClinicalTrialVoiceAgent.from_snapshot(voice_agent.to_snapshot())
+        response = preview.process_patient_response(transcript)
+        continue_conversation = preview.conversation_stage != "conclusion"
+        gather = preview.gather_options() if continue_conversation else {}
+        twiml = twilio_client.create_speech_response(response, continue_conversation=continue_conversation,
+                                                     gather=gather)
+        partial_results.put(call_sid, TentativeTurn(key, turn, response, continue_conversation, gather, twiml,
+                                                    preview.to_snapshot(), preview.turn_certainty(turn)))
+    except Exception as e:
+        logger.error(f"Error pre-extracting partial result: {e}")
+    return '', 204
+
+def _partial_transcript(stable: str, unstable: str) -> str:
+    """The caller's words so far: the settled part plus the part still changing"""
+    stable, unstable = stable.strip(), unstable.strip()
+    if unstable.lower().startswith(stable.lower()):
+        return unstable
+    return f"{stable} {unstable}".strip()
+
+def _speech_confidence(value: Optional[str]) -> Optional[float]:
+    """Twilio's Confidence field as a float; None when missing or 0.0, which some speech models post instead of a score"""
+    try:
+        confidence = float(value)
+    except (TypeError, ValueError):
+        return None
+    return confidence if 0.0 < confidence <= 1.0 else None
+
 @app.route('/call_status', methods=['POST'])
 def handle_call_status():
     """Handle call status updates from Twilio"""
     call_sid = request.form.get('CallSid')
     call_status = request.form.get('CallStatus')
     logger.info(f"Call {call_sid} status: {call_status}")
+    
+    # Caller hung up mid-screening: flush what we have and free the session
+    if call_status in TERMINAL_CALL_STATUSES:
+        session_reaper.evict(call_sid, call_status)
+    
     return '', 200
 
 @app.route('/create_number', methods=['POST'])
@@ -149,6 +294,8 @@ def health_check():
         'service': 'MediScreen Voice Agent',
         'version': '1.0.0',
         'active_conversations': len(active_conversations),
+        'session_reaper': session_reaper.stats(),
+        'partial_results': partial_results.stats(),
         'components': {
             'twilio': twilio_client.client is not None,
             'elevenlabs': elevenlabs_client.api_key is not None
@@ -158,13 +305,14 @@ def health_check():
 @app.route('/conversations/<call_sid>', methods=['GET'])
 def get_conversation(call_sid):
     """Get conversation data for a specific call"""
-    if call_sid in active_conversations:
-        voice_agent = active_conversations[call_sid]['voice_agent']
+    conversation = _load_conversation(call_sid)
+    if conversation is not None:
+        voice_agent = conversation['voice_agent']
         return jsonify(voice_agent.get_conversation_summary())
     else:
         return jsonify({'error': 'Conversation not found'}), 404
 
-def _log_conversation_summary(call_sid: str, voice_agent: ClinicalTrialVoiceAgent):
+def _log_conversation_summary(call_sid: str, voice_agent: ClinicalTrialVoiceAgent, end_reason: str = 'conclusion'):
     """Log conversation summary for follow-up"""
     try:
         summary = voice_agent.get_conversation_summary()
@@ -176,18 +324,17 @@ def _log_conversation_summary(call_sid: str, voice_agent: ClinicalTrialVoiceAgen
             'start_time': conversation_data.get('start_time'),
             'duration': time.time() - conversation_data.get('start_time', time.time()),
             'summary': summary,
+            'end_reason': end_reason,
             'timestamp': time.time()
         }
         
-        # Log to file (in production, this would go to a database)
-        os.makedirs('conversations', exist_ok=True)
-        with open(f'conversations/{call_sid}.json', 'w') as f:
-            json.dump(log_data, f, indent=2)
+        get_conversation_store().save(log_data)
         
         logger.info(f"Conversation logged for call {call_sid}")
         
-        # Send follow-up SMS if patient is eligible
-        if summary.get('eligible') and conversation_data.get('from_number'):
+        # Send follow-up SMS if patient is eligible and finished the screening
+        if (summary.get('eligible') and summary.get('conversation_stage') == 'conclusion'
+                and conversation_data.get('from_number')):
             _send_follow_up_sms(conversation_data['from_number'], summary)
             
     except Exception as e:
@@ -209,15 +356,6 @@ def _send_follow_up_sms(phone_number: str, summary: Dict[str, Any]):
     except Exception as e:
         logger.error(f"Error sending follow-up SMS: {e}")
 
-if __name__ == '__main__':
-    print("🏥 MediScreen Voice Agent Starting...")
-    print("=" * 50)
-    print("📞 Twilio Integration: Ready")
-    print("🎤 ElevenLabs Voice: Ready") 
-    print("🤖 AI Voice Agent: Ready")
-    print("🌐 Flask Server: Starting on port 5000")
-    print("=" * 50)
-    
 @app.route('/calendar')
 def calendar():
     """Serve the calendar UI"""
@@ -225,56 +363,185 @@ def calendar():
 
 @app.route('/api/appointments')
 def get_appointments():
-    """API endpoint to get all appointments"""
-    appointments = []
+    """
+    API endpoint to get appointments
+    
+    Query parameters (all optional):
+        date_from / date_to: availability day range, YYYY-MM-DD, inclusive
+        eligible: true/false
+        limit: page size; the next page's cursor is returned in X-Next-Cursor
+        cursor: value of X-Next-Cursor from the previous page
+        format: 'ndjson' streams one appointment per line (also chosen by
+            Accept: application/x-ndjson)
+        stream: 'true' streams the JSON array as rows are read from storage
+    
+    Streaming responses keep memory flat for large archives but cannot
+    report X-Next-Cursor, since headers are sent before the last row is read.
+    
+    Responses carry an ETag and Last-Modified derived from the store version,
+    so an unchanged poll gets 304 Not Modified without a body. The ETag
+    also names the format, since Accept alone can pick NDJSON.
+    """
+    ndjson = (request.args.get('format') == 'ndjson'
+              or request.accept_mimetypes.best == 'application/x-ndjson')
+    etag = get_conversation_store().version() + ('-ndjson' if ndjson else '')
+    if request.if_none_match.contains(etag):
+        return _not_modified(etag)
+    
+    try:
+        filters = _parse_appointment_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if ndjson or request.args.get('stream', '').lower() in ('true', '1'):
+        rows = get_conversation_store().iter_appointments(**filters)
+        appointments = (_appointment_json(row) for row in rows)
+        body = iter_ndjson(appointments) if ndjson else iter_json_array(appointments)
+        response = Response(
+            stream_with_context(body),
+            mimetype='application/x-ndjson' if ndjson else 'application/json'
+        )
+        return _conditional(response, etag)
+    
+    limit = filters.pop('limit')
+    rows = list(get_conversation_store().iter_appointments(
+        limit=limit + 1 if limit is not None else None, **filters
+    ))
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1])
+    
+    appointments = [_appointment_json(row) for row in rows]
+    
+    response = jsonify(appointments)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+        next_args = request.args.to_dict()
+        next_args['cursor'] = next_cursor
+        response.headers['Link'] = f'<{request.path}?{urlencode(next_args)}>; rel="next"'
+    return _conditional(response, etag)
+
+def _appointment_json(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a stored appointment row for the calendar API"""
+    return {
+        'id': row['call_sid'],
+        'phone': row['phone'],
+        'age': row['age'],
+        'availability_date': row['availability_date'],
+        'availability_day': row['availability_day'],
+        'medical_conditions': row['medical_conditions'],
+        'medications': row['medications'],
+        'eligible': row['eligible'],
+        'created_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(row['timestamp']))
+    }
+
+def _parse_appointment_filters(args) -> Dict[str, Any]:
+    """Validate /api/appointments query parameters"""
+    filters = {'eligible': None, 'date_from': None, 'date_to': None, 'after': None, 'limit': None}
+    
+    eligible = args.get('eligible')
+    if eligible is not None:
+        if eligible.lower() not in ('true', 'false', '1', '0'):
+            raise ValueError("eligible must be true or false")
+        filters['eligible'] = eligible.lower() in ('true', '1')
+    
+    for name in ('date_from', 'date_to'):
+        value = args.get(name)
+        if value:
+            try:
+                filters[name] = datetime.strptime(value, '%Y-%m-%d').date().isoformat()
+            except ValueError:
+                raise ValueError(f"{name} must be a date in YYYY-MM-DD format")
+    
+    limit = args.get('limit')
+    if limit is not None:
+        if not limit.isdigit() or not 1 <= int(limit) <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        filters['limit'] = int(limit)
     
-    # Read all conversation files
-    conversations_dir = 'conversations'
-    if os.path.exists(conversations_dir):
-        for filename in os.listdir(conversations_dir):
-            if filename.endswith('.json'):
-                try:
-                    with open(os.path.join(conversations_dir, filename), 'r') as f:
-                        data = json.load(f)
-                        
-                        patient_info = data['summary']['patient_info']
-                        
-                        # Only include patients with availability dates
-                        if patient_info.get('availability_date') and patient_info.get('contact_info'):
-                            appointment = {
-                                'id': filename.replace('.json', ''),
-                                'phone': patient_info['contact_info'],
-                                'age': patient_info['age'],
-                                'availability_date': patient_info['availability_date'],
-                                'medical_conditions': patient_info.get('medical_conditions', []),
-                                'medications': patient_info.get('medications', []),
-                                'eligible': data['summary']['eligible'],
-                                'created_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(data['timestamp']))
-                            }
-                            appointments.append(appointment)
-                except Exception as e:
-                    logger.error(f"Error reading conversation file {filename}: {e}")
+    cursor = args.get('cursor')
+    if cursor:
+        filters['after'] = _decode_cursor(cursor)
     
-    return jsonify(appointments)
+    return filters
+
+def _encode_cursor(row: Dict[str, Any]) -> str:
+    """Opaque keyset cursor pointing just past a row"""
+    raw = json.dumps([row['timestamp'], row['call_sid']]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        timestamp, call_sid = json.loads(raw)
+        return (float(timestamp), str(call_sid))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def _conditional(response: Response, etag: str) -> Response:
+    """Attach validators so clients can revalidate with If-None-Match / If-Modified-Since"""
+    response.set_etag(etag)
+    last_modified = get_conversation_store().last_modified()
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'no-cache'
+    # The same URL serves JSON or NDJSON depending on Accept
+    response.vary.add('Accept')
+    return response.make_conditional(request)
+
+def _not_modified(etag: str) -> Response:
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept')
+    return response
 
 @app.route('/api/export')
 def export_appointments():
-    """Export appointments to various formats"""
-    try:
-        # Run the export script
-        import subprocess
-        result = subprocess.run(['python', 'export_appointments.py'], 
-                              capture_output=True, text=True, cwd='.')
+    """
+    Export eligible appointments
+    
+    With ?format=csv|json|ndjson|ics the export is streamed straight into the
+    response as a download (date_from/date_to filters apply). Without a
+    format, appointments.csv/.json/.ics are rewritten in place.
+    """
+    export_format = request.args.get('format')
+    if export_format:
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'success': False, 'message': f'Unsupported format: {export_format}'}), 400
+        try:
+            filters = _parse_appointment_filters(request.args)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
         
-        if result.returncode == 0:
-            return jsonify({'success': True, 'message': 'Appointments exported successfully'})
-        else:
-            return jsonify({'success': False, 'message': result.stderr})
+        encoder = EXPORT_FORMATS[export_format]
+        body = stream_export(export_format, get_conversation_store(),
+                             date_from=filters['date_from'], date_to=filters['date_to'])
+        response = Response(stream_with_context(body), mimetype=encoder.mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename=appointments.{encoder.extension}'
+        return response
+    
+    try:
+        exported = export_appointments_to_files(store=get_conversation_store())
+        return jsonify({'success': True, 'message': f'Exported {exported} appointments successfully'})
     except Exception as e:
+        logger.error(f"Error exporting appointments: {e}")
         return jsonify({'success': False, 'message': str(e)})
 
+if __name__ == '__main__':
+    print("🏥 MediScreen Voice Agent Starting...")
+    print("=" * 50)
+    print("📞 Twilio Integration: Ready")
+    print("🎤 ElevenLabs Voice: Ready") 
+    print("🤖 AI Voice Agent: Ready")
+    print("🌐 Flask Server: Starting on port 5000")
+    print("=" * 50)
+    
     # Create conversations directory
     os.makedirs('conversations', exist_ok=True)
+    # Open (and migrate) the conversation store before taking calls
+    get_conversation_store()
     
     # Start the Flask app
     app.run(debug=True, port=5000, host='0.0.0.0')
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Spoken Number Benchmark
+Measures per-utterance cost of the spoken number grammar on typical
+phone-number and age responses
+"""
+
+import argparse
+import timeit
+
+from spoken_numbers import extract_digits, parse_number
+
+DIGIT_UTTERANCES = [
+    "four oh eight",
+    "um it's five five five",
+    "double five nine triple oh",
+    "forty five sixty seven",
+    "four hundred eight",
+    "six six nine two nine oh nine six oh eight",
+    "my number is 408 555 1234"
+]
+
+AGE_UTTERANCES = [
+    "forty five",
+    "I am 52 years old",
+    "I'm going to be thirty next month",
+    "one hundred and two"
+]
+
+def bench(func, utterances, number: int):
+    print(f"{func.__name__}:")
+    for utterance in utterances:
+        seconds = timeit.timeit(lambda: func(utterance), number=number)
+        print(f"  {seconds / number * 1e6:8.2f} µs  {utterance!r}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the spoken number grammar")
+    parser.add_argument('--number', type=int, default=20000, help='Iterations per utterance')
+    args = parser.parse_args()
+
+    bench(extract_digits, DIGIT_UTTERANCES, args.number)
+    bench(parse_number, AGE_UTTERANCES, args.number)
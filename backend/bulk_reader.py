@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Bulk Conversation Reader
+Parses large conversations/*.json archives with a process pool and yields
+only the fields a back-office job needs (export, audits, re-scoring)
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+from multiprocessing import Pool
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Projectable fields and where they live in a logged conversation
+FIELD_PATHS = {
+    'call_sid': ('call_sid',),
+    'from_number': ('from_number',),
+    'timestamp': ('timestamp',),
+    'end_reason': ('end_reason',),
+    'eligible': ('summary', 'eligible'),
+    'conversation_stage': ('summary', 'conversation_stage'),
+    'phone': ('summary', 'patient_info', 'contact_info'),
+    'age': ('summary', 'patient_info', 'age'),
+    'medical_conditions': ('summary', 'patient_info', 'medical_conditions'),
+    'medications': ('summary', 'patient_info', 'medications'),
+    'pregnant': ('summary', 'patient_info', 'pregnant'),
+    'severe_conditions': ('summary', 'patient_info', 'severe_conditions'),
+    'availability_date': ('summary', 'patient_info', 'availability_date')
+}
+
+DEFAULT_FIELDS = ['call_sid', 'phone', 'age', 'eligible', 'availability_date', 'timestamp']
+
+@dataclass
+class BulkReadStats:
+    """Throughput counters for one bulk read"""
+    files: int = 0
+    bytes: int = 0
+    errors: int = 0
+    workers: int = 1
+    elapsed: float = 0.0
+
+    def report(self) -> str:
+        megabytes = self.bytes / (1024 * 1024)
+        files_per_second = self.files / self.elapsed if self.elapsed else 0.0
+        megabytes_per_second = megabytes / self.elapsed if self.elapsed else 0.0
+        return (f"Parsed {self.files} files ({megabytes:.1f} MB, {self.errors} errors) "
+                f"in {self.elapsed:.2f}s with {self.workers} worker(s): "
+                f"{files_per_second:,.0f} files/s, {megabytes_per_second:.1f} MB/s")
+
+def _project(log_data: Dict[str, Any], paths: List[Tuple[str, ...]]) -> tuple:
+    values = []
+    for path in paths:
+        value = log_data
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        values.append(value)
+    return tuple(values)
+
+def _read_chunk(task: Tuple[str, List[str], Optional[List[Tuple[str, ...]]]]) -> Tuple[list, int, int]:
+    """Worker: parse a chunk of files, returning (rows, bytes read, errors)"""
+    directory, filenames, paths = task
+    rows = []
+    total_bytes = 0
+    errors = 0
+    for filename in filenames:
+        try:
+            with open(os.path.join(directory, filename), 'rb') as f:
+                raw = f.read()
+            total_bytes += len(raw)
+            log_data = json.loads(raw)
+            log_data.setdefault('call_sid', filename[:-len('.json')])
+            rows.append(log_data if paths is None else _project(log_data, paths))
+        except Exception:
+            errors += 1
+    return rows, total_bytes, errors
+
+def list_conversation_files(directory: str) -> List[str]:
+    """Names of the conversation JSON files in a directory"""
+    with os.scandir(directory) as entries:
+        return [entry.name for entry in entries if entry.name.endswith('.json') and entry.is_file()]
+
+def iter_projected(directory: str = "conversations", fields: Optional[List[str]] = DEFAULT_FIELDS,
+                   workers: Optional[int] = None, chunk_size: int = 256,
+                   stats: Optional[BulkReadStats] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Parse every conversation file in parallel and yield projected rows
+
+    Rows arrive in completion order, not file order.
+
+    Args:
+        directory: Directory of conversation JSON files
+        fields: Names from FIELD_PATHS to keep, or None for the full conversation log
+        workers: Worker processes (defaults to the CPU count; 1 parses in-process)
+        chunk_size: Files handed to a worker at a time
+        stats: Optional BulkReadStats filled in as the read progresses
+
+    Returns:
+        Iterator of dicts with the requested fields
+    """
+    if fields is not None:
+        unknown = [field for field in fields if field not in FIELD_PATHS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    paths = [FIELD_PATHS[field] for field in fields] if fields is not None else None
+
+    workers = workers or os.cpu_count() or 1
+    stats = stats if stats is not None else BulkReadStats()
+    start = time.perf_counter()
+
+    filenames = list_conversation_files(directory) if os.path.isdir(directory) else []
+    tasks = [(directory, filenames[i:i + chunk_size], paths) for i in range(0, len(filenames), chunk_size)]
+
+    def consume(results):
+        for rows, total_bytes, errors in results:
+            stats.files += len(rows) + errors
+            stats.bytes += total_bytes
+            stats.errors += errors
+            for row in rows:
+                yield row if fields is None else dict(zip(fields, row))
+            stats.elapsed = time.perf_counter() - start
+
+    if workers == 1 or len(tasks) <= 1:
+        stats.workers = 1
+        yield from consume(map(_read_chunk, tasks))
+    else:
+        stats.workers = min(workers, len(tasks))
+        with Pool(processes=stats.workers) as pool:
+            yield from consume(pool.imap_unordered(_read_chunk, tasks))
+
+    stats.elapsed = time.perf_counter() - start
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse a conversations/ archive in parallel and report throughput")
+    parser.add_argument('--dir', default='conversations', help='Directory of conversation JSON files')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=256, help='Files per worker task')
+    parser.add_argument('--fields', default=','.join(DEFAULT_FIELDS),
+                        help=f"Comma-separated fields to project ({', '.join(FIELD_PATHS)})")
+    parser.add_argument('--output', help='Write projected rows as NDJSON to this file ("-" for stdout)')
+    args = parser.parse_args()
+
+    stats = BulkReadStats()
+    rows = iter_projected(args.dir, args.fields.split(','), args.workers, args.chunk_size, stats)
+
+    if args.output:
+        out = sys.stdout if args.output == '-' else open(args.output, 'w')
+        try:
+            for row in rows:
+                out.write(json.dumps(row) + '\n')
+        finally:
+            if out is not sys.stdout:
+                out.close()
+    else:
+        for _ in rows:
+            pass
+
+    print(f"📊 {stats.report()}", file=sys.stderr)
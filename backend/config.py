@@ -21,5 +21,41 @@ WEBHOOK_BASE_URL = os.getenv('WEBHOOK_BASE_URL', 'https://intemerately-flagless-
 # Phone Number
 REGISTERED_PHONE_NUMBER = "6692909608"
 
+# Session Store ('memory' for a single process, 'sqlite' to share calls across workers)
+SESSION_STORE = os.getenv('SESSION_STORE', 'memory')
+SESSION_DB_PATH = os.getenv('SESSION_DB_PATH', 'sessions.db')
+
+# Conversation Store ('sqlite' for the indexed database, 'json' for one file per call
+# with an in-memory appointments cache)
+CONVERSATION_STORE = os.getenv('CONVERSATION_STORE', 'sqlite')
+CONVERSATION_DB_PATH = os.getenv('CONVERSATION_DB_PATH', 'conversations.db')
+CONVERSATIONS_DIR = os.getenv('CONVERSATIONS_DIR', 'conversations')
+
+# Screening protocol (protocols/<TRIAL_PROTOCOL>.json, reloaded when the file changes)
+TRIAL_PROTOCOL = os.getenv('TRIAL_PROTOCOL', 'default')
+PROTOCOLS_DIR = os.getenv('PROTOCOLS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'protocols'))
+# Condition and medication vocabularies (lexicons/<name>.json), compiled once at startup
+LEXICONS_DIR = os.getenv('LEXICONS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lexicons'))
+# Comma-separated trial protocols to screen each caller against at once (two or more)
+TRIAL_PROTOCOLS = [name for name in os.getenv('TRIAL_PROTOCOLS', '').split(',') if name]
+
+# Per-question exclusion rates written by question_stats.py; questions that rule
+# callers out most often are asked first (empty to keep protocol order)
+QUESTION_STATS_PATH = os.getenv('QUESTION_STATS_PATH', 'question_stats.json')
+
+# Speech recognition confidence (Twilio's score times the extractor's certainty):
+# accept at or above ACCEPT, read the answer back for confirmation at or above
+# CONFIRM, ask the question again below it
+ASR_ACCEPT_CONFIDENCE = float(os.getenv('ASR_ACCEPT_CONFIDENCE', '0.7'))
+ASR_CONFIRM_CONFIDENCE = float(os.getenv('ASR_CONFIRM_CONFIDENCE', '0.4'))
+
+# Twilio posts partial transcripts here while the caller speaks, so the next turn
+# is worked out before the final result arrives (empty to turn off)
+PARTIAL_RESULT_CALLBACK = os.getenv('PARTIAL_RESULT_CALLBACK', '/partial_speech')
+
+# Abandoned call eviction (seconds)
+SESSION_IDLE_TTL = float(os.getenv('SESSION_IDLE_TTL', '300'))
+SESSION_MAX_AGE = float(os.getenv('SESSION_MAX_AGE', '3600'))
+
 # Logging
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
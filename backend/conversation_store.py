@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+"""
+Conversation Store
+Persists completed screening conversations and answers appointment queries
+without re-reading every conversations/*.json file
+"""
+
+import os
+import json
+import uuid
+import bisect
+import itertools
+import sqlite3
+import threading
+import time
+import argparse
+import logging
+from datetime import datetime
+from typing import Dict, Any, Optional, Iterator, List, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def normalize_availability_date(date_text: Optional[str], timestamp: Optional[float] = None) -> Optional[str]:
+    """
+    Resolve a stored availability date to an ISO day (YYYY-MM-DD)
+
+    Args:
+        date_text: Availability date as captured ('10/16' or '2025-10-16')
+        timestamp: When the call was logged; 'MM/DD' dates before the call roll into the next year
+
+    Returns:
+        ISO date string, or None if the text is not a recognisable date
+    """
+    if not date_text:
+        return None
+
+    text = date_text.strip()
+    try:
+        return datetime.strptime(text[:10], '%Y-%m-%d').date().isoformat()
+    except ValueError:
+        pass
+
+    if '/' not in text:
+        return None
+    try:
+        month, day = (int(part) for part in text.split('/')[:2])
+        reference = datetime.fromtimestamp(timestamp).date() if timestamp else datetime.now().date()
+        resolved = reference.replace(month=month, day=day)
+        if resolved < reference:
+            resolved = resolved.replace(year=reference.year + 1)
+        return resolved.isoformat()
+    except ValueError:
+        return None
+
+def _sort_key(row: Dict[str, Any]) -> Tuple[float, str]:
+    return (row['timestamp'], row['call_sid'])
+
+def appointment_row(call_sid: str, log_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Project a logged conversation onto an appointment row
+
+    Returns:
+        Appointment dict, or None if the caller left no availability date or phone
+    """
+    summary = log_data['summary']
+    patient_info = summary['patient_info']
+
+    # Only patients with availability dates and contact info become appointments
+    if not (patient_info.get('availability_date') and patient_info.get('contact_info')):
+        return None
+
+    return {
+        'call_sid': call_sid,
+        'phone': patient_info['contact_info'],
+        'age': patient_info.get('age'),
+        'availability_date': patient_info['availability_date'],
+        'availability_day': normalize_availability_date(patient_info['availability_date'], log_data.get('timestamp')),
+        'medical_conditions': patient_info.get('medical_conditions', []),
+        'medications': patient_info.get('medications', []),
+        'eligible': bool(summary.get('eligible')),
+        'timestamp': log_data['timestamp']
+    }
+
+class ConversationStore:
+    """Storage interface for logged conversations"""
+
+    def save(self, log_data: Dict[str, Any]):
+        """Persist one conversation log (as built by _log_conversation_summary)"""
+        raise NotImplementedError
+
+    def save_many(self, logs: List[Dict[str, Any]]):
+        """Persist several conversation logs"""
+        for log_data in logs:
+            self.save(log_data)
+
+    def get(self, call_sid: str) -> Optional[Dict[str, Any]]:
+        """Load a full conversation log"""
+        raise NotImplementedError
+
+    def iter_logs(self) -> Iterator[Dict[str, Any]]:
+        """Yield every full conversation log (for offline analysis jobs)"""
+        raise NotImplementedError
+
+    def iter_appointments(self, eligible: Optional[bool] = None, date_from: Optional[str] = None,
+                          date_to: Optional[str] = None, after: Optional[Tuple[float, str]] = None,
+                          limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield appointment rows in (timestamp, call_sid) order
+
+        Args:
+            eligible: Only eligible (True) or ineligible (False) callers
+            date_from: Earliest availability day, inclusive (YYYY-MM-DD)
+            date_to: Latest availability day, inclusive (YYYY-MM-DD)
+            after: Keyset cursor; only rows after this (timestamp, call_sid)
+            limit: Maximum number of rows
+        """
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def version(self) -> str:
+        """Opaque token that changes whenever stored conversations change"""
+        raise NotImplementedError
+
+    def last_modified(self) -> Optional[float]:
+        """Unix time of the last change, if known"""
+        raise NotImplementedError
+
+class JSONDirectoryConversationStore(ConversationStore):
+    """
+    One JSON file per call in a directory (the original storage layout)
+
+    Parsed appointment rows are cached per file. save() updates the cache
+    directly; changes made by other processes are picked up by a cheap
+    directory stat, and only files whose mtime or size changed are re-parsed.
+    Because rewriting an existing file does not touch the directory mtime,
+    a full stat pass also runs at least every rescan_interval seconds.
+    The version token is per process, so workers never share a stale ETag.
+    """
+
+    def __init__(self, directory: str = "conversations", rescan_interval: float = 30.0):
+        self.directory = directory
+        self.rescan_interval = rescan_interval
+        self._epoch = uuid.uuid4().hex[:8]
+        self._version = 0
+        self._modified_at: Optional[float] = None
+        self._cache: Dict[str, Tuple[int, int, Optional[Dict[str, Any]]]] = {}
+        self._sorted_rows: Optional[List[Dict[str, Any]]] = None
+        self._dir_mtime_ns: Optional[int] = None
+        self._last_scan = 0.0
+        self._lock = threading.RLock()
+
+    def save(self, log_data: Dict[str, Any]):
+        os.makedirs(self.directory, exist_ok=True)
+        filename = f"{log_data['call_sid']}.json"
+        path = os.path.join(self.directory, filename)
+        with open(path, 'w') as f:
+            json.dump(log_data, f, indent=2)
+
+        # Update the cache in place instead of waiting for the next scan
+        stat = os.stat(path)
+        with self._lock:
+            self._cache[filename] = (stat.st_mtime_ns, stat.st_size, self._project(log_data))
+            self._changed()
+
+    def get(self, call_sid: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self.directory, f"{call_sid}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def iter_logs(self) -> Iterator[Dict[str, Any]]:
+        """Yield every conversation log in the directory"""
+        if not os.path.exists(self.directory):
+            return
+        for filename in os.listdir(self.directory):
+            if filename.endswith('.json'):
+                log_data = self._read_file(filename)
+                if log_data is not None:
+                    yield log_data
+
+    def _read_file(self, filename: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.directory, filename), 'r') as f:
+                log_data = json.load(f)
+            log_data.setdefault('call_sid', filename[:-len('.json')])
+            return log_data
+        except Exception as e:
+            logger.error(f"Error reading conversation file {filename}: {e}")
+            return None
+
+    def _project(self, log_data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if log_data is None:
+            return None
+        try:
+            return appointment_row(log_data['call_sid'], log_data)
+        except (KeyError, TypeError) as e:
+            logger.error(f"Malformed conversation {log_data.get('call_sid')}: {e}")
+            return None
+
+    def refresh(self, force: bool = False):
+        """Re-parse files added or modified outside this process"""
+        with self._lock:
+            try:
+                dir_mtime_ns = os.stat(self.directory).st_mtime_ns
+            except FileNotFoundError:
+                if self._cache:
+                    self._cache.clear()
+                    self._changed()
+                return
+
+            now = time.monotonic()
+            if (not force and dir_mtime_ns == self._dir_mtime_ns
+                    and now - self._last_scan < self.rescan_interval):
+                return
+
+            changed = False
+            seen = set()
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if not entry.name.endswith('.json'):
+                        continue
+                    seen.add(entry.name)
+                    stat = entry.stat()
+                    cached = self._cache.get(entry.name)
+                    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                        continue
+                    self._cache[entry.name] = (stat.st_mtime_ns, stat.st_size, self._project(self._read_file(entry.name)))
+                    changed = True
+
+            for filename in set(self._cache) - seen:
+                del self._cache[filename]
+                changed = True
+
+            self._dir_mtime_ns = dir_mtime_ns
+            self._last_scan = now
+            if changed:
+                self._changed()
+
+    def _changed(self):
+        self._sorted_rows = None
+        self._version += 1
+        self._modified_at = time.time()
+
+    def version(self) -> str:
+        with self._lock:
+            self.refresh()
+            return f"{self._epoch}-{self._version}"
+
+    def last_modified(self) -> Optional[float]:
+        with self._lock:
+            self.refresh()
+            return self._modified_at
+
+    def _appointments(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self.refresh()
+            if self._sorted_rows is None:
+                rows = [row for _, _, row in self._cache.values() if row is not None]
+                rows.sort(key=_sort_key)
+                self._sorted_rows = rows
+            return self._sorted_rows
+
+    def iter_appointments(self, eligible: Optional[bool] = None, date_from: Optional[str] = None,
+                          date_to: Optional[str] = None, after: Optional[Tuple[float, str]] = None,
+                          limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        rows = self._appointments()
+        start = bisect.bisect_right(rows, tuple(after), key=_sort_key) if after else 0
+
+        def matches(row):
+            if eligible is not None and row['eligible'] != eligible:
+                return False
+            if date_from or date_to:
+                day = row['availability_day']
+                if day is None or (date_from and day < date_from) or (date_to and day > date_to):
+                    return False
+            return True
+
+        selected = (row for row in itertools.islice(rows, start, None) if matches(row))
+        return itertools.islice(selected, limit) if limit is not None else selected
+
+    def count(self) -> int:
+        if not os.path.exists(self.directory):
+            return 0
+        return sum(1 for filename in os.listdir(self.directory) if filename.endswith('.json'))
+
+class SQLiteConversationStore(ConversationStore):
+    """
+    Embedded SQLite database with indexes on timestamp, eligibility,
+    availability date and phone
+
+    Appointment queries read only the indexed columns; the full conversation
+    log is kept as JSON in the 'record' column for get().
+    """
+
+    SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS conversations ("
+        "call_sid TEXT PRIMARY KEY, "
+        "timestamp REAL NOT NULL, "
+        "eligible INTEGER NOT NULL, "
+        "phone TEXT, "
+        "from_number TEXT, "
+        "age INTEGER, "
+        "availability_date TEXT, "
+        "availability_day TEXT, "
+        "medical_conditions TEXT, "
+        "medications TEXT, "
+        "record TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS idx_conversations_timestamp ON conversations (timestamp, call_sid)",
+        "CREATE INDEX IF NOT EXISTS idx_conversations_eligible ON conversations (eligible, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_conversations_availability ON conversations (availability_day)",
+        "CREATE INDEX IF NOT EXISTS idx_conversations_phone ON conversations (phone)",
+        "CREATE INDEX IF NOT EXISTS idx_conversations_appointments ON conversations (timestamp, call_sid) "
+        "WHERE phone IS NOT NULL AND availability_date IS NOT NULL",
+        "CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+    ]
+
+    def __init__(self, db_path: str = "conversations.db"):
+        self.db_path = db_path
+        self._local = threading.local()
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+
+        conn = self._connection()
+        for statement in self.SCHEMA:
+            conn.execute(statement)
+
+        # Version counter for conditional GETs; the epoch changes if the database is recreated
+        conn.executemany(
+            "INSERT OR IGNORE INTO store_meta (key, value) VALUES (?, ?)",
+            [('epoch', uuid.uuid4().hex[:8]), ('version', '0'), ('modified_at', str(time.time()))]
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _row_values(self, log_data: Dict[str, Any]) -> tuple:
+        summary = log_data.get('summary') or {}
+        patient_info = summary.get('patient_info') or {}
+        return (
+            log_data['call_sid'],
+            log_data.get('timestamp') or 0.0,
+            1 if summary.get('eligible') else 0,
+            patient_info.get('contact_info') or None,
+            log_data.get('from_number'),
+            patient_info.get('age'),
+            patient_info.get('availability_date') or None,
+            normalize_availability_date(patient_info.get('availability_date'), log_data.get('timestamp')),
+            json.dumps(patient_info.get('medical_conditions')),
+            json.dumps(patient_info.get('medications')),
+            json.dumps(log_data)
+        )
+
+    def save(self, log_data: Dict[str, Any]):
+        self.save_many([log_data])
+
+    def save_many(self, logs: List[Dict[str, Any]]):
+        """Insert or replace several conversations in one transaction"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO conversations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [self._row_values(log_data) for log_data in logs]
+            )
+            conn.execute("UPDATE store_meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'version'")
+            conn.execute("UPDATE store_meta SET value = ? WHERE key = 'modified_at'", (str(time.time()),))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(self, call_sid: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT record FROM conversations WHERE call_sid = ?", (call_sid,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def iter_logs(self) -> Iterator[Dict[str, Any]]:
+        for row in self._connection().execute("SELECT record FROM conversations ORDER BY timestamp, call_sid"):
+            yield json.loads(row[0])
+
+    def iter_appointments(self, eligible: Optional[bool] = None, date_from: Optional[str] = None,
+                          date_to: Optional[str] = None, after: Optional[Tuple[float, str]] = None,
+                          limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        query = (
+            "SELECT call_sid, phone, age, availability_date, availability_day, "
+            "medical_conditions, medications, eligible, timestamp "
+            "FROM conversations WHERE phone IS NOT NULL AND availability_date IS NOT NULL"
+        )
+        params: List[Any] = []
+        if eligible is not None:
+            query += " AND eligible = ?"
+            params.append(1 if eligible else 0)
+        if date_from:
+            query += " AND availability_day >= ?"
+            params.append(date_from)
+        if date_to:
+            query += " AND availability_day <= ?"
+            params.append(date_to)
+        if after:
+            query += " AND (timestamp > ? OR (timestamp = ? AND call_sid > ?))"
+            params.extend([after[0], after[0], after[1]])
+        query += " ORDER BY timestamp, call_sid"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        for row in self._connection().execute(query, params):
+            yield {
+                'call_sid': row[0],
+                'phone': row[1],
+                'age': row[2],
+                'availability_date': row[3],
+                'availability_day': row[4],
+                'medical_conditions': json.loads(row[5]),
+                'medications': json.loads(row[6]),
+                'eligible': bool(row[7]),
+                'timestamp': row[8]
+            }
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+
+    def _meta(self) -> Dict[str, str]:
+        return dict(self._connection().execute("SELECT key, value FROM store_meta").fetchall())
+
+    def version(self) -> str:
+        meta = self._meta()
+        return f"{meta['epoch']}-{meta['version']}"
+
+    def last_modified(self) -> Optional[float]:
+        return float(self._meta()['modified_at'])
+
+def migrate_json_directory(store: ConversationStore, directory: str = "conversations",
+                           batch_size: int = 500, workers: Optional[int] = 1) -> int:
+    """
+    Import every conversations/*.json file into a store (idempotent)
+
+    Args:
+        store: Destination store
+        directory: Directory of legacy conversation files
+        batch_size: Conversations written per transaction
+        workers: Parser processes (None for the CPU count); see bulk_reader
+
+    Returns:
+        Number of conversations imported
+    """
+    from bulk_reader import iter_projected, BulkReadStats
+
+    stats = BulkReadStats()
+    imported = 0
+    batch = []
+    for log_data in iter_projected(directory, fields=None, workers=workers, stats=stats):
+        batch.append(log_data)
+        if len(batch) >= batch_size:
+            store.save_many(batch)
+            imported += len(batch)
+            batch = []
+    if batch:
+        store.save_many(batch)
+        imported += len(batch)
+
+    if stats.errors:
+        logger.error(f"Skipped {stats.errors} unreadable conversation files in {directory}")
+    logger.info(f"Imported {imported} conversations from {directory}: {stats.report()}")
+    return imported
+
+def create_conversation_store(backend: Optional[str] = None) -> ConversationStore:
+    """
+    Create the conversation store selected by configuration
+
+    A new, empty SQLite store imports the legacy conversations/ directory once.
+
+    Args:
+        backend: 'sqlite' or 'json' (defaults to CONVERSATION_STORE from config)
+
+    Returns:
+        Conversation store instance
+    """
+    from config import CONVERSATION_STORE, CONVERSATION_DB_PATH, CONVERSATIONS_DIR
+    backend = (backend or CONVERSATION_STORE).lower()
+
+    if backend == 'json':
+        return JSONDirectoryConversationStore(CONVERSATIONS_DIR)
+    if backend == 'sqlite':
+        store = SQLiteConversationStore(CONVERSATION_DB_PATH)
+        if store.count() == 0 and os.path.isdir(CONVERSATIONS_DIR):
+            migrate_json_directory(store, CONVERSATIONS_DIR)
+        return store
+
+    raise ValueError(f"Unknown conversation store backend: {backend}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import conversations/*.json into the SQLite conversation store")
+    parser.add_argument('--dir', default='conversations', help='Directory of conversation JSON files')
+    parser.add_argument('--db', default='conversations.db', help='SQLite database to import into')
+    parser.add_argument('--workers', type=int, default=None, help='Parser processes (default: CPU count)')
+    args = parser.parse_args()
+
+    count = migrate_json_directory(SQLiteConversationStore(args.db), args.dir, workers=args.workers)
+    print(f"✅ Imported {count} conversations into {args.db}")
@@ -2,81 +2,140 @@
 """
 Simple Calendar Export - No API Required
 Exports appointment data for manual calendar entry
+
+Each output format is an encoder that turns appointments into text
+(header, one chunk per row, footer), so the same code streams an export
+straight into an HTTP response or writes every file in a single pass.
 """
 
-import json
+import io
+import os
 import csv
-from datetime import datetime
-from typing import Dict, List, Any
-
-def export_appointments_to_files():
-    """Export all conversation data to calendar-friendly formats"""
-    
-    # Read all conversation files
-    import os
-    conversations_dir = "conversations"
-    appointments = []
-    
-    for filename in os.listdir(conversations_dir):
-        if filename.endswith('.json'):
-            with open(os.path.join(conversations_dir, filename), 'r') as f:
-                data = json.load(f)
-                
-                patient_info = data['summary']['patient_info']
-                
-                # Only include eligible patients with availability dates
-                if (data['summary']['eligible'] and 
-                    patient_info.get('availability_date') and 
-                    patient_info.get('contact_info')):
-                    
-                    appointment = {
-                        'call_id': filename.replace('.json', ''),
-                        'phone': patient_info['contact_info'],
-                        'age': patient_info['age'],
-                        'availability_date': patient_info['availability_date'],
-                        'medical_conditions': patient_info.get('medical_conditions', []),
-                        'medications': patient_info.get('medications', []),
-                        'created_at': datetime.fromtimestamp(data['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
-                    }
-                    appointments.append(appointment)
-    
-    if not appointments:
-        print("No eligible appointments found")
-        return
-    
-    # Export to CSV
-    with open('appointments.csv', 'w', newline='') as csvfile:
-        fieldnames = ['call_id', 'phone', 'age', 'availability_date', 'medical_conditions', 'medications', 'created_at']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        
-        writer.writeheader()
-        for appointment in appointments:
-            # Convert lists to strings for CSV
-            appointment_copy = appointment.copy()
-            appointment_copy['medical_conditions'] = ', '.join(appointment['medical_conditions']) if appointment['medical_conditions'] else 'None'
-            appointment_copy['medications'] = ', '.join(appointment['medications']) if appointment['medications'] else 'None'
-            writer.writerow(appointment_copy)
-    
-    # Export to JSON
-    with open('appointments.json', 'w') as jsonfile:
-        json.dump(appointments, jsonfile, indent=2)
-    
-    # Export to iCal format
-    ical_content = "BEGIN:VCALENDAR\nVERSION:2.0\nPRODID:-//MediScreen//Appointments//EN\n"
-    
-    for appointment in appointments:
-        # Parse availability date
-        date_str = appointment['availability_date']
-        if '/' in date_str:
-            month, day = date_str.split('/')
-            current_year = datetime.now().year
-            start_dt = datetime(current_year, int(month), int(day), 10, 0)  # 10 AM
-            end_dt = datetime(current_year, int(month), int(day), 10, 30)  # 30 min
-            
-            start_ical = start_dt.strftime("%Y%m%dT%H%M%S")
-            end_ical = end_dt.strftime("%Y%m%dT%H%M%S")
-            
-            ical_content += f"""BEGIN:VEVENT
+import json
+import argparse
+import tempfile
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Any, Iterable, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: exports are not serialized across processes
+    fcntl = None
+
+# Rows serialized per chunk when streaming, to keep per-yield overhead low
+STREAM_CHUNK_ROWS = 200
+
+# Incremental export state, kept next to the exported files
+WATERMARK_FILE = '.export_watermark.json'
+INCREMENTAL_FORMATS = ['csv', 'json', 'ndjson', 'ics']
+
+CSV_FIELDNAMES = ['call_id', 'phone', 'age', 'availability_date', 'medical_conditions', 'medications', 'created_at']
+
+class AppointmentEncoder:
+    """Serializes a sequence of appointments; one instance per output"""
+
+    mimetype = 'text/plain'
+    extension = 'txt'
+
+    def header(self) -> str:
+        return ''
+
+    def row(self, appointment: Dict[str, Any]) -> str:
+        raise NotImplementedError
+
+    def footer(self) -> str:
+        return ''
+
+    def resume(self, rows_written: int):
+        """Continue an existing output that already holds rows_written rows"""
+
+class CSVEncoder(AppointmentEncoder):
+    """Spreadsheet-friendly CSV; lists are joined into a single cell"""
+
+    mimetype = 'text/csv'
+    extension = 'csv'
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.DictWriter(self._buffer, fieldnames=CSV_FIELDNAMES, extrasaction='ignore')
+
+    def _take(self) -> str:
+        text = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return text
+
+    def header(self) -> str:
+        self._writer.writeheader()
+        return self._take()
+
+    def row(self, appointment: Dict[str, Any]) -> str:
+        # Convert lists to strings for CSV
+        appointment_copy = appointment.copy()
+        appointment_copy['medical_conditions'] = ', '.join(appointment['medical_conditions']) if appointment['medical_conditions'] else 'None'
+        appointment_copy['medications'] = ', '.join(appointment['medications']) if appointment['medications'] else 'None'
+        self._writer.writerow(appointment_copy)
+        return self._take()
+
+class JSONArrayEncoder(AppointmentEncoder):
+    """JSON array with one object per line"""
+
+    mimetype = 'application/json'
+    extension = 'json'
+
+    def __init__(self):
+        self._first = True
+
+    def header(self) -> str:
+        return '['
+
+    def row(self, appointment: Dict[str, Any]) -> str:
+        separator = '\n' if self._first else ',\n'
+        self._first = False
+        return separator + json.dumps(appointment)
+
+    def footer(self) -> str:
+        return ']' if self._first else '\n]'
+
+    def resume(self, rows_written: int):
+        self._first = rows_written == 0
+
+class NDJSONEncoder(AppointmentEncoder):
+    """Newline-delimited JSON for ingestion jobs"""
+
+    mimetype = 'application/x-ndjson'
+    extension = 'ndjson'
+
+    def row(self, appointment: Dict[str, Any]) -> str:
+        return json.dumps(appointment) + '\n'
+
+class ICSEncoder(AppointmentEncoder):
+    """iCalendar feed with a 30 minute event per appointment"""
+
+    mimetype = 'text/calendar'
+    extension = 'ics'
+
+    def header(self) -> str:
+        return "BEGIN:VCALENDAR\nVERSION:2.0\nPRODID:-//MediScreen//Appointments//EN\n"
+
+    def row(self, appointment: Dict[str, Any]) -> str:
+        # availability_day is resolved to an ISO date (with year) when the call is stored
+        day_str = appointment.get('availability_day')
+        if not day_str:
+            return ''
+
+        try:
+            day = date.fromisoformat(day_str)
+        except ValueError:
+            return ''
+        start_dt = datetime.combine(day, time(10, 0))  # 10 AM
+        end_dt = start_dt + timedelta(minutes=30)  # 30 min
+
+        start_ical = start_dt.strftime("%Y%m%dT%H%M%S")
+        end_ical = end_dt.strftime("%Y%m%dT%H%M%S")
+
+        return f"""BEGIN:VEVENT
 UID:{appointment['call_id']}@mediscreen.com
 DTSTART:{start_ical}
 DTEND:{end_ical}
@@ -85,21 +144,287 @@ DESCRIPTION:Phone: {appointment['phone']}\\nAge: {appointment['age']}\\nConditio
 LOCATION:MediScreen Clinic
 END:VEVENT
 """
-    
-    ical_content += "END:VCALENDAR"
-    
-    with open('appointments.ics', 'w') as icalfile:
-        icalfile.write(ical_content)
-    
-    print(f"✅ Exported {len(appointments)} appointments:")
-    print("   📄 appointments.csv (for Excel/Google Sheets)")
-    print("   📄 appointments.json (for data processing)")
-    print("   📅 appointments.ics (for calendar apps)")
-    print("\n📅 You can import appointments.ics into:")
-    print("   - Google Calendar")
-    print("   - Apple Calendar")
-    print("   - Outlook")
-    print("   - Any calendar app that supports .ics files")
+
+    def footer(self) -> str:
+        return "END:VCALENDAR"
+
+EXPORT_FORMATS = {
+    'csv': CSVEncoder,
+    'json': JSONArrayEncoder,
+    'ndjson': NDJSONEncoder,
+    'ics': ICSEncoder
+}
+
+def iter_encoded(encoder: AppointmentEncoder, rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """
+    Serialize rows with an encoder, one chunk at a time
+
+    Args:
+        encoder: Fresh encoder instance
+        rows: Any iterable of appointments (read lazily)
+
+    Returns:
+        Iterator of text chunks
+    """
+    yield encoder.header()
+    chunk = []
+    for row in rows:
+        chunk.append(encoder.row(row))
+        if len(chunk) >= STREAM_CHUNK_ROWS:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+    yield encoder.footer()
+
+def iter_json_array(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Serialize rows as a JSON array, one chunk at a time"""
+    return iter_encoded(JSONArrayEncoder(), rows)
+
+def iter_ndjson(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Serialize rows as newline-delimited JSON, one chunk at a time"""
+    return iter_encoded(NDJSONEncoder(), rows)
+
+def _iter_export_rows(store=None, **filters) -> Iterator[tuple]:
+    """Yield ((timestamp, call_sid), appointment) pairs for eligible appointments"""
+    if store is None:
+        from conversation_store import create_conversation_store
+        store = create_conversation_store()
+
+    for row in store.iter_appointments(eligible=True, **filters):
+        yield (row['timestamp'], row['call_sid']), {
+            'call_id': row['call_sid'],
+            'phone': row['phone'],
+            'age': row['age'],
+            'availability_date': row['availability_date'],
+            'availability_day': row['availability_day'],
+            'medical_conditions': row['medical_conditions'],
+            'medications': row['medications'],
+            'created_at': datetime.fromtimestamp(row['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+def iter_export_appointments(store=None, **filters) -> Iterator[Dict[str, Any]]:
+    """
+    Yield eligible appointments in export shape, straight from the store
+
+    Args:
+        store: Conversation store (defaults to the configured store)
+        **filters: Extra ConversationStore.iter_appointments filters
+    """
+    for _, appointment in _iter_export_rows(store, **filters):
+        yield appointment
+
+def stream_export(export_format: str, store=None, **filters) -> Iterator[str]:
+    """
+    Stream one export format, e.g. into an HTTP response
+
+    Args:
+        export_format: 'csv', 'json', 'ndjson' or 'ics'
+        store: Conversation store (defaults to the configured store)
+
+    Returns:
+        Iterator of text chunks
+    """
+    encoder = EXPORT_FORMATS[export_format]()
+    return iter_encoded(encoder, iter_export_appointments(store, **filters))
+
+def _output_path(output_dir: str, export_format: str) -> str:
+    return os.path.join(output_dir, f'appointments.{EXPORT_FORMATS[export_format].extension}')
+
+@contextmanager
+def _export_lock(output_dir: str):
+    """Serialize exports that write into the same directory"""
+    with open(os.path.join(output_dir, '.export.lock'), 'w') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _write_full_export(output_dir: str, formats: List[str], store=None) -> tuple:
+    """
+    Write every format in one pass through private temp files
+
+    Returns:
+        (number of appointments, (timestamp, call_sid) of the last one or None)
+    """
+    outputs = []
+    try:
+        for export_format in formats:
+            encoder = EXPORT_FORMATS[export_format]()
+            handle = tempfile.NamedTemporaryFile(
+                'w', dir=output_dir, prefix=f'.appointments.{encoder.extension}.',
+                suffix='.tmp', delete=False, newline=''
+            )
+            handle.write(encoder.header())
+            outputs.append((export_format, encoder, handle))
+
+        count = 0
+        last_key = None
+        for last_key, appointment in _iter_export_rows(store):
+            for _, encoder, handle in outputs:
+                handle.write(encoder.row(appointment))
+            count += 1
+
+        for export_format, encoder, handle in outputs:
+            handle.write(encoder.footer())
+            handle.close()
+            os.replace(handle.name, _output_path(output_dir, export_format))
+        return count, last_key
+    finally:
+        for _, _, handle in outputs:
+            if not handle.closed:
+                handle.close()
+            if os.path.exists(handle.name):
+                os.remove(handle.name)
+
+def export_appointments_to_files(output_dir: str = '.', formats: Optional[List[str]] = None, store=None) -> int:
+    """
+    Export eligible appointments to calendar-friendly files in one pass
+
+    Every format is written to a private temp file and atomically renamed
+    into place, so concurrent exports never interleave or leave a partial file.
+
+    Args:
+        output_dir: Directory for appointments.<ext>
+        formats: Formats to write (defaults to csv, json and ics)
+        store: Conversation store (defaults to the configured store)
+
+    Returns:
+        Number of appointments exported
+    """
+    with _export_lock(output_dir):
+        count, _ = _write_full_export(output_dir, formats or ['csv', 'json', 'ics'], store)
+
+        # The rewritten files no longer match the incremental watermark
+        watermark_path = os.path.join(output_dir, WATERMARK_FILE)
+        if os.path.exists(watermark_path):
+            os.remove(watermark_path)
+        return count
+
+def _save_watermark(output_dir: str, watermark: Dict[str, Any]):
+    path = os.path.join(output_dir, WATERMARK_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(watermark, f)
+    os.replace(path + '.tmp', path)
+
+def _load_watermark(output_dir: str, formats: List[str]) -> Optional[Dict[str, Any]]:
+    """Load the watermark if it still describes the files on disk"""
+    try:
+        with open(os.path.join(output_dir, WATERMARK_FILE)) as f:
+            watermark = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if sorted(watermark.get('sizes', {})) != sorted(formats):
+        return None
+    for export_format, size in watermark['sizes'].items():
+        path = _output_path(output_dir, export_format)
+        if not os.path.exists(path) or os.path.getsize(path) < size:
+            return None
+    return watermark
+
+def _file_sizes(output_dir: str, formats: List[str]) -> Dict[str, int]:
+    return {export_format: os.path.getsize(_output_path(output_dir, export_format)) for export_format in formats}
+
+def export_appointments_incremental(output_dir: str = '.', formats: Optional[List[str]] = None, store=None) -> int:
+    """
+    Append appointments logged since the last run to the existing exports
+
+    A watermark file records the (timestamp, call_sid) of the last exported
+    appointment and the byte size of every output. CSV and NDJSON files are
+    appended to; JSON and ICS files are spliced by cutting their closing
+    footer, appending the new rows and re-adding the footer. Files are first
+    truncated to their recorded size, which rolls back any half-finished
+    previous run. Without a usable watermark a full export is written.
+
+    Conversations are assumed to be logged in timestamp order; a
+    conversation re-saved after it was exported is not exported again.
+
+    Args:
+        output_dir: Directory holding appointments.<ext>
+        formats: Formats to maintain (defaults to csv, json, ndjson and ics)
+        store: Conversation store (defaults to the configured store)
+
+    Returns:
+        Number of appointments appended (or written, on a full export)
+    """
+    formats = formats or INCREMENTAL_FORMATS
+    with _export_lock(output_dir):
+        watermark = _load_watermark(output_dir, formats)
+        if watermark is None or watermark.get('last') is None:
+            count, last_key = _write_full_export(output_dir, formats, store)
+            _save_watermark(output_dir, {
+                'last': list(last_key) if last_key else None,
+                'count': count,
+                'sizes': _file_sizes(output_dir, formats)
+            })
+            return count
+
+        previous_count = watermark['count']
+        outputs = []
+        try:
+            for export_format in formats:
+                encoder = EXPORT_FORMATS[export_format]()
+                encoder.resume(previous_count)
+                handle = open(_output_path(output_dir, export_format), 'rb+')
+                outputs.append((encoder, handle))
+
+                # Roll back to the last good state, then cut the closing footer
+                size = watermark['sizes'][export_format]
+                handle.truncate(size)
+                footer = encoder.footer().encode('utf-8')
+                handle.seek(size - len(footer))
+                if footer and handle.read() != footer:
+                    raise ValueError(f"appointments.{encoder.extension} does not end with the expected footer")
+                handle.seek(size - len(footer))
+                handle.truncate()
+
+            count = 0
+            last_key = tuple(watermark['last'])
+            for last_key, appointment in _iter_export_rows(store, after=last_key):
+                for encoder, handle in outputs:
+                    handle.write(encoder.row(appointment).encode('utf-8'))
+                count += 1
+
+            for encoder, handle in outputs:
+                handle.write(encoder.footer().encode('utf-8'))
+        finally:
+            for _, handle in outputs:
+                handle.close()
+
+        _save_watermark(output_dir, {
+            'last': list(last_key),
+            'count': previous_count + count,
+            'sizes': _file_sizes(output_dir, formats)
+        })
+        return count
 
 if __name__ == "__main__":
-    export_appointments_to_files()
+    parser = argparse.ArgumentParser(description="Export eligible appointments to CSV, JSON and ICS")
+    parser.add_argument('--output-dir', default='.', help='Directory for the appointments.* files')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Append only appointments logged since the last incremental export')
+    args = parser.parse_args()
+
+    if args.incremental:
+        exported = export_appointments_incremental(args.output_dir)
+        print(f"✅ Appended {exported} new appointments (appointments.csv/.json/.ndjson/.ics)")
+        raise SystemExit(0)
+
+    exported = export_appointments_to_files(args.output_dir)
+
+    if not exported:
+        print("No eligible appointments found")
+    else:
+        print(f"✅ Exported {exported} appointments:")
+        print("   📄 appointments.csv (for Excel/Google Sheets)")
+        print("   📄 appointments.json (for data processing)")
+        print("   📅 appointments.ics (for calendar apps)")
+        print("\n📅 You can import appointments.ics into:")
+        print("   - Google Calendar")
+        print("   - Apple Calendar")
+        print("   - Outlook")
+        print("   - Any calendar app that supports .ics files")
@@ -0,0 +1,497 @@
+"""
+Answer Extractors
+Turn a patient's spoken answer into a typed field value. Each screening
+question type maps to an extractor class; extractors are built once per
+question and reused by every call.
+
+Questions with a 'volunteer' option can also be filled from answers to
+other questions ("I'm 52 and not pregnant"). Volunteering only reacts to
+phrases specific to the field, never to a bare yes/no or number.
+"""
+
+import re
+from datetime import date
+from typing import Dict, List, Optional, Any, Set, Tuple
+
+from spoken_numbers import extract_digits, parse_number, parse_leading_number
+from spoken_dates import parse_spoken_date
+from lexicon import LexiconMatcher, get_lexicon, normalize
+from phonetic import PhoneticIndex
+from yes_no import FIRST_PERSON, YesNoClassifier, negated_positions
+from config import PARTIAL_RESULT_CALLBACK
+
+# Digits in a full (US) phone number
+PHONE_NUMBER_DIGITS = 10
+
+def phone_number_digits(digits: List[str]) -> Optional[str]:
+    """
+    Ten-digit phone number from a run of digits
+
+    Args:
+        digits: Digits as spoken, keyed in or read from caller ID ("+1" country code allowed)
+
+    Returns:
+        The 10 digits, or None if this is not a full number
+    """
+    if len(digits) == PHONE_NUMBER_DIGITS + 1 and digits[0] == '1':
+        digits = digits[1:]
+    if len(digits) != PHONE_NUMBER_DIGITS:
+        return None
+    return ''.join(digits)
+
+# Certainty of a term resolved only by how it sounds ("listen april"): below the
+# accept threshold, so the caller hears it read back before it is stored
+PHONETIC_CERTAINTY = 0.6
+
+# Most phrases Twilio accepts as speech hints for one gather
+MAX_HINTS = 500
+
+# Gather tuning for a plain yes or no: a short answer, so give up sooner on silence
+# and end the turn after a one-second pause instead of waiting out the default
+YES_NO_GATHER = {
+    'hints': 'yes, no, yeah, nope, not sure',
+    'speech_model': 'numbers_and_commands',
+    'timeout': 5,
+    'speech_timeout': 1
+}
+
+def _hints(phrases: List[str]) -> str:
+    """Comma-separated speech hints, without duplicates, within Twilio's limits"""
+    unique = [phrase for phrase in dict.fromkeys(phrases) if phrase and len(phrase) <= 100]
+    return ', '.join(unique[:MAX_HINTS])
+
+def _partial_results() -> Dict[str, Any]:
+    """
+    Partial transcript webhook for answers long enough to pre-extract while the
+    caller is still speaking (lists, dates); empty if PARTIAL_RESULT_CALLBACK is off
+    """
+    if not PARTIAL_RESULT_CALLBACK:
+        return {}
+    return {'partial_result_callback': PARTIAL_RESULT_CALLBACK, 'partial_result_callback_method': 'POST'}
+
+# Clause boundaries, so a volunteered number is read from the right part of an answer
+_CLAUSE_RE = re.compile(r"[,;.]|\band\b|\bbut\b")
+_WORD_RE = re.compile(r"[a-z]+")
+
+# A number counting these is a duration, not an age ("I'm six months pregnant")
+_DURATION_UNITS = frozenset({'minute', 'minutes', 'hour', 'hours', 'day', 'days', 'week', 'weeks',
+                             'month', 'months'})
+
+# Someone other than the caller ("my mother had cancer")
+_OTHER_PEOPLE = frozenset({'he', 'she', 'they', 'his', 'her', 'their', 'son', 'daughter', 'kid', 'kids',
+                           'child', 'children', 'baby', 'mother', 'mom', 'father', 'dad', 'parents',
+                           'husband', 'wife', 'brother', 'sister', 'grandmother', 'grandma', 'grandfather',
+                           'grandpa', 'aunt', 'uncle', 'cousin', 'family', 'partner', 'friend'})
+
+# ... as the subject of an age ("my son is 12 years old")
+_OTHER_PERSON_WORDS = _OTHER_PEOPLE | {'is', 'are', 'was', 'were'}
+
+# Said of the past, not now ("I was pregnant last year")
+_PAST_WORDS = frozenset({'was', 'were', 'wasn', 'weren', 'used', 'ago', 'last', 'previously'})
+
+# Least classifier confidence for a yes/no field filled from an answer to another question
+VOLUNTEER_CONFIDENCE = 0.85
+
+def _phrase_positions(words: List[str], phrase: Tuple[str, ...]) -> List[int]:
+    """Positions where a phrase's words start in a run of words"""
+    return [position for position in range(len(words) - len(phrase) + 1)
+            if tuple(words[position:position + len(phrase)]) == phrase]
+
+def _attributed_positions(words: List[str]) -> Set[int]:
+    """Positions of the words said about someone else, up to where the caller speaks of themselves again"""
+    attributed: Set[int] = set()
+    other = False
+    for position, word in enumerate(words):
+        if word in _OTHER_PEOPLE:
+            other = True
+        elif word in FIRST_PERSON:
+            other = False
+        elif other:
+            attributed.add(position)
+    return attributed
+
+# A term the caller no longer takes or has ("I used to take metformin")
+_FORMER_WORDS = frozenset({'used', 'stopped', 'quit', 'formerly'})
+
+def _former_positions(words: List[str]) -> Set[int]:
+    """Positions of the words after a former-use cue, up to where the caller starts a new statement"""
+    former: Set[int] = set()
+    active = False
+    for position, word in enumerate(words):
+        if word in _FORMER_WORDS:
+            active = True
+        elif word in FIRST_PERSON:
+            active = False
+        elif active:
+            former.add(position)
+    return former
+
+def _skipped_positions(words: List[str]) -> Set[int]:
+    """Positions of the words that do not describe the caller now: negated, someone else's or former"""
+    return negated_positions(words) | _attributed_positions(words) | _former_positions(words)
+
+class Extractor:
+    """Base class: parse an answer and store it on PatientInfo"""
+
+    # Whether the agent records the extracted value in the conversation log
+    logged = False
+
+    # Whether volunteer() may fill this field from answers to other questions
+    volunteers = False
+
+    # Asked once, before the question itself, when an answer could not be read at all
+    reprompt: Optional[str] = None
+
+    # Twilio <Gather> options for this question (set by build_extractor)
+    gather: Dict[str, Any] = {}
+
+    # Whether the number the caller is calling from can answer this question
+    caller_id = False
+
+    @classmethod
+    def from_question(cls, question: Dict[str, Any]) -> "Extractor":
+        return cls()
+
+    def extract(self, speech_text: str) -> Any:
+        """Parse an answer; None means nothing usable was said"""
+        raise NotImplementedError
+
+    def gather_options(self) -> Dict[str, Any]:
+        """Twilio <Gather> options suited to this kind of answer (hints, speech model, timeouts)"""
+        return {}
+
+    def score(self, speech_text: str) -> Tuple[Any, float]:
+        """Parse an answer with the extractor's certainty in it (0.0 to 1.0)"""
+        value = self.extract(speech_text)
+        return value, 1.0 if value is not None else 0.0
+
+    def volunteer(self, speech_text: str) -> Any:
+        """Parse this field from an answer to a different question; None if not mentioned"""
+        return None
+
+    def keyword_answer(self, speech_text: str) -> Any:
+        """Baseline reading before smarter parsing, used to measure what it saves"""
+        return self.extract(speech_text)
+
+    def apply(self, patient_info, field: str, value: Any):
+        """Store an extracted value on the patient record"""
+        setattr(patient_info, field, value)
+
+    def spoken(self, value: Any) -> str:
+        """How to read an extracted value back to the caller for confirmation"""
+        return str(value)
+
+class NumberExtractor(Extractor):
+    """Cardinal number within an accepted range, spoken or as digits"""
+
+    def __init__(self, minimum: int = 0, maximum: Optional[int] = None,
+                 before: Optional[List[str]] = None, after: Optional[List[str]] = None):
+        """
+        Args:
+            minimum / maximum: Accepted range
+            before: Volunteer cues spoken right before the number ("i'm")
+            after: Volunteer cues spoken right after the number ("years old")
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self._before_re = re.compile(r"\b(?:%s)\s+(.*)" % '|'.join(map(re.escape, before))) if before else None
+        self._after_re = re.compile(r"(.*?)\s*\b(?:%s)\b" % '|'.join(map(re.escape, after))) if after else None
+        self.volunteers = bool(before or after)
+
+    @classmethod
+    def from_question(cls, question: Dict[str, Any]) -> "NumberExtractor":
+        cues = question.get('volunteer') or {}
+        return cls(question.get('min', 0), question.get('max'), cues.get('before'), cues.get('after'))
+
+    def _in_range(self, value: Optional[int]) -> Optional[int]:
+        if value is None or value < self.minimum:
+            return None
+        if self.maximum is not None and value > self.maximum:
+            return None
+        return value
+
+    def extract(self, speech_text: str) -> Optional[int]:
+        return self._in_range(parse_number(speech_text))
+
+    def gather_options(self) -> Dict[str, Any]:
+        return {'hints': '$OPERAND', 'speech_model': 'numbers_and_commands', 'timeout': 8}
+
+    def volunteer(self, speech_text: str) -> Optional[int]:
+        text_lower = speech_text.lower()
+        if self._after_re:
+            match = self._after_re.search(text_lower)
+            if match:
+                # Only the clause right before "years old", and only about the caller
+                clause = _CLAUSE_RE.split(match.group(1))[-1]
+                if _OTHER_PERSON_WORDS.isdisjoint(_WORD_RE.findall(clause)):
+                    value = self._in_range(parse_number(clause))
+                    if value is not None:
+                        return value
+        if self._before_re:
+            for match in self._before_re.finditer(text_lower):
+                # "I'm 2 weeks away from surgery" counts time, not years
+                clause = _CLAUSE_RE.split(match.group(1))[0]
+                if not _DURATION_UNITS.isdisjoint(_WORD_RE.findall(clause)):
+                    continue
+                value = self._in_range(parse_leading_number(match.group(1)))
+                if value is not None:
+                    return value
+        return None
+
+class BooleanExtractor(Extractor):
+    """Yes/no answer read by a negation-aware classifier over generic and question phrases"""
+
+    logged = True
+    reprompt = "Sorry, I didn't catch that. Please answer yes or no."
+
+    def __init__(self, yes: List[str], no: List[str], volunteer_yes: Optional[List[str]] = None,
+                 volunteer_no: Optional[List[str]] = None):
+        """
+        Args:
+            yes / no: Phrases answering the question
+            volunteer_yes / volunteer_no: Field-specific phrases that answer it unprompted
+        """
+        self.yes = tuple(yes)
+        self.no = tuple(no)
+        self.classifier = YesNoClassifier(yes, no)
+        self.volunteer_yes = tuple(volunteer_yes or ())
+        self.volunteer_no = tuple(volunteer_no or ())
+        self._volunteer_yes = [tuple(normalize(phrase).split()) for phrase in self.volunteer_yes]
+        self._volunteer_no = [tuple(normalize(phrase).split()) for phrase in self.volunteer_no]
+        # The question's phrases plus the cues, so "not pregnant" reads as no
+        self._volunteer_classifier = YesNoClassifier(self.yes + self.volunteer_yes, self.no + self.volunteer_no)
+        self.volunteers = bool(self.volunteer_yes or self.volunteer_no)
+
+    @classmethod
+    def from_question(cls, question: Dict[str, Any]) -> "BooleanExtractor":
+        cues = question.get('volunteer') or {}
+        return cls(question.get('yes', ['yes']), question.get('no', ['no']), cues.get('yes'), cues.get('no'))
+
+    def extract(self, speech_text: str) -> Optional[bool]:
+        return self.classifier.classify(speech_text)[0]
+
+    def score(self, speech_text: str) -> Tuple[Optional[bool], float]:
+        answer, confidence = self.classifier.classify(speech_text)
+        return answer, confidence if answer is not None else 0.0
+
+    def keyword_answer(self, speech_text: str) -> Optional[bool]:
+        """The plain substring reading (yes phrases first) the classifier replaced"""
+        text_lower = speech_text.lower()
+        if any(word in text_lower for word in self.yes):
+            return True
+        if any(word in text_lower for word in self.no):
+            return False
+        return None
+
+    def spoken(self, value: bool) -> str:
+        return "yes" if value else "no"
+
+    def gather_options(self) -> Dict[str, Any]:
+        # The question's own phrases ("pregnant", "mild") on top of plain yes and no
+        hints = YES_NO_GATHER['hints'].split(', ') + list(self.yes + self.no)
+        return {**YES_NO_GATHER, 'hints': _hints(hints)}
+
+    def volunteer(self, speech_text: str) -> Optional[bool]:
+        # Only clauses naming the field count; a bare yes or no answers the question
+        # being asked. Clauses about someone else ("my wife is pregnant") or the past
+        # ("I was pregnant last year") say nothing about the caller now, and a negated
+        # phrase ("never been pregnant") never says yes.
+        for clause in _CLAUSE_RE.split(speech_text.lower()):
+            words = normalize(clause).split()
+            if not _PAST_WORDS.isdisjoint(words):
+                continue
+            attributed = _attributed_positions(words)
+            yes_hits = [position for phrase in self._volunteer_yes for position in _phrase_positions(words, phrase)
+                        if position not in attributed]
+            no_hits = [position for phrase in self._volunteer_no for position in _phrase_positions(words, phrase)
+                       if position not in attributed]
+            if not yes_hits and not no_hits:
+                continue
+            answer, confidence = self._volunteer_classifier.classify(clause)
+            if answer is None or confidence < VOLUNTEER_CONFIDENCE:
+                continue
+            if answer and not no_hits and yes_hits and set(yes_hits) <= negated_positions(words):
+                continue
+            return answer
+        return None
+
+class ListExtractor(Extractor):
+    """Canonical terms mentioned in the answer, matched by their synonyms in one pass"""
+
+    def __init__(self, terms: Dict[str, List[str]], volunteers: bool = False, phonetic: bool = False):
+        """
+        Args:
+            terms: Canonical term -> synonyms
+            volunteers: Whether answers to other questions may fill this field
+            phonetic: Also resolve words that merely sound like a term ("listen april")
+        """
+        self.matcher = LexiconMatcher(terms)
+        self.phonetic = PhoneticIndex(terms) if phonetic else None
+        self.volunteers = volunteers
+        # Canonical names first, so a long lexicon drops rare synonyms rather than terms
+        self._hints = _hints([term.replace('_', ' ') for term in terms] +
+                             [synonym for synonyms in terms.values() for synonym in synonyms])
+
+    @classmethod
+    def from_question(cls, question: Dict[str, Any]) -> "ListExtractor":
+        # A shared lexicon ('lexicon': 'medications') plus any terms defined inline
+        terms = {term: list(synonyms) for term, synonyms in get_lexicon(question['lexicon']).items()} \
+            if question.get('lexicon') else {}
+        for term, synonyms in question.get('terms', {}).items():
+            terms.setdefault(term, []).extend(synonyms)
+        return cls(terms, bool(question.get('volunteer')), bool(question.get('phonetic')))
+
+    def _exact(self, speech_text: str) -> Tuple[List[str], List[str], Set[int]]:
+        """
+        The caller's own terms matched exactly, the normalized words and the words accounted for
+
+        Terms negated ("I'm not on insulin", "no diabetes"), said about someone
+        else ("my wife takes lisinopril") or no longer current ("I used to take
+        metformin") are not the caller's; an answer naming only those is "none".
+        """
+        mentions, words = self.matcher.mentions(speech_text)
+        skipped = _skipped_positions(words)
+        found = sorted({term for term, first_word, _ in mentions if first_word not in skipped},
+                       key=self.matcher.order.get)
+        covered = skipped.union(*(range(first_word, last_word + 1) for _, first_word, last_word in mentions))
+        return found, words, covered
+
+    def _resolve(self, speech_text: str) -> Tuple[List[str], List[str]]:
+        """Terms matched exactly, and terms only matched by sound"""
+        found, words, covered = self._exact(speech_text)
+        garbled: List[str] = []
+        if self.phonetic is not None and len(covered) < len(words):
+            # Only words no exact synonym accounted for
+            garbled = [term for term in self.phonetic.find(words, covered) if term not in found]
+        return found, garbled
+
+    def extract(self, speech_text: str) -> Optional[List[str]]:
+        found, garbled = self._resolve(speech_text)
+        if garbled:
+            found = sorted(found + garbled, key=self.matcher.order.get)
+        return found or None
+
+    def score(self, speech_text: str) -> Tuple[Optional[List[str]], float]:
+        # Common words can sound like a drug ("a cold" -> loratadine)
+        found, garbled = self._resolve(speech_text)
+        if not garbled:
+            return found or None, 1.0 if found else 0.0
+        return sorted(found + garbled, key=self.matcher.order.get), PHONETIC_CERTAINTY
+
+    def gather_options(self) -> Dict[str, Any]:
+        # Lists of names run long, with pauses between them
+        return {'hints': self._hints, 'speech_model': 'phone_call', 'enhanced': True, 'speech_timeout': 2,
+                **_partial_results()}
+
+    def volunteer(self, speech_text: str) -> Optional[List[str]]:
+        # Exact term names are specific enough to trust outside their own question;
+        # sound-alikes are not
+        return self._exact(speech_text)[0] or None
+
+    def apply(self, patient_info, field: str, value: List[str]):
+        existing = getattr(patient_info, field) or []
+        setattr(patient_info, field, existing + value)
+
+    def spoken(self, value: List[str]) -> str:
+        names = [term.replace('_', ' ') for term in value]
+        return names[0] if len(names) == 1 else f"{', '.join(names[:-1])} and {names[-1]}"
+
+class PhonePartExtractor(Extractor):
+    """Fixed-length group of phone digits; completes contact_info on the last group"""
+
+    logged = True
+
+    def __init__(self, digits: int, full_number: bool = False, caller_id: bool = False):
+        """
+        Args:
+            digits: Length of this group (3 for the area code)
+            full_number: Also take the whole 10-digit number in one answer, spoken or keyed in
+            caller_id: Offer the number the caller is calling from before asking
+        """
+        self.digits = digits
+        self.full_number = full_number
+        self.caller_id = caller_id
+        # Keypad entry ends on its own once this many digits are pressed
+        self.keypad_digits = PHONE_NUMBER_DIGITS if full_number else digits
+
+    @classmethod
+    def from_question(cls, question: Dict[str, Any]) -> "PhonePartExtractor":
+        return cls(question['digits'], bool(question.get('full_number')), bool(question.get('caller_id')))
+
+    def extract(self, speech_text: str) -> Optional[str]:
+        digits = extract_digits(speech_text)
+        if self.full_number:
+            number = phone_number_digits(digits)
+            if number:
+                return number
+        if len(digits) < self.digits:
+            return None
+        return ''.join(digits[:self.digits])
+
+    def gather_options(self) -> Dict[str, Any]:
+        hints = ['$OOV_CLASS_DIGIT_SEQUENCE', 'oh', 'double']
+        if self.full_number:
+            hints.insert(0, '$OOV_CLASS_FULLPHONENUM')
+        # Spoken or keyed in; keypad entry ends as soon as the digits are in
+        return {'input': 'dtmf speech', 'num_digits': self.keypad_digits, 'finish_on_key': '#',
+                'hints': _hints(hints), 'speech_model': 'numbers_and_commands', 'timeout': 10}
+
+    def apply(self, patient_info, field: str, value: str):
+        if len(value) == PHONE_NUMBER_DIGITS and len(value) != self.digits:
+            # The whole number answers every group at once
+            patient_info.phone_area_code, patient_info.phone_middle, patient_info.phone_last_four = \
+                value[:3], value[3:6], value[6:]
+        else:
+            setattr(patient_info, field, value)
+        parts = (patient_info.phone_area_code, patient_info.phone_middle, patient_info.phone_last_four)
+        if all(parts):
+            patient_info.contact_info = '-'.join(parts)
+
+    def spoken(self, value: str) -> str:
+        # Digit by digit, as the caller said them, pausing between groups
+        groups = (value[:3], value[3:6], value[6:]) if len(value) == PHONE_NUMBER_DIGITS else (value,)
+        return ', '.join(' '.join(group) for group in groups)
+
+class DateExtractor(Extractor):
+    """Calendar date, stored as an ISO string"""
+
+    logged = True
+
+    def extract(self, speech_text: str) -> Optional[str]:
+        resolved = parse_spoken_date(speech_text)
+        return resolved.isoformat() if resolved else None
+
+    def spoken(self, value: str) -> str:
+        day = date.fromisoformat(value)
+        return f"{day:%A, %B} {day.day}"
+
+    def gather_options(self) -> Dict[str, Any]:
+        return {'hints': _hints(['$FULLDATE', '$MONTH', '$DAY', 'today', 'tomorrow', 'next week']),
+                'speech_model': 'phone_call', 'enhanced': True, **_partial_results()}
+
+EXTRACTOR_TYPES = {
+    'number': NumberExtractor,
+    'boolean': BooleanExtractor,
+    'list': ListExtractor,
+    'phone_part': PhonePartExtractor,
+    'date': DateExtractor
+}
+
+def build_extractor(question: Dict[str, Any]) -> Extractor:
+    """
+    Build the extractor for a screening question from its 'type'
+
+    Args:
+        question: Question definition (type plus any extractor options)
+
+    Returns:
+        Extractor instance to reuse for every answer to this question
+    """
+    try:
+        extractor_class = EXTRACTOR_TYPES[question['type']]
+    except KeyError:
+        raise ValueError(f"Unknown question type for {question.get('field')}: {question.get('type')}")
+    extractor = extractor_class.from_question(question)
+    # A protocol's own 'gather' options win over the type's defaults
+    extractor.gather = {**extractor.gather_options(), **question.get('gather', {})}
+    return extractor
@@ -0,0 +1,166 @@
+"""
+Term Lexicon
+Multi-pattern matcher over condition and medication vocabularies
+(lexicons/<name>.json). Every synonym, brand name and common misspelling
+is compiled once into an Aho-Corasick automaton, so an utterance is scanned
+in a single pass whatever the size of the lexicon.
+"""
+
+import os
+import json
+import threading
+from collections import deque
+from typing import Dict, List, Iterable, Set, Tuple
+
+def normalize(text: str) -> str:
+    """Lowercase, turn punctuation into spaces and pad with spaces for whole-word matching"""
+    return ' ' + ' '.join(''.join(ch if ch.isalnum() else ' ' for ch in text.lower()).split()) + ' '
+
+class LexiconMatcher:
+    """
+    Aho-Corasick automaton from synonyms to canonical terms
+
+    Patterns are padded with spaces, so only whole words match ("statin" does
+    not fire inside "nystatin"). When matches overlap, the longest one wins
+    ("type 1 diabetes" over "diabetes").
+    """
+
+    def __init__(self, terms: Dict[str, Iterable[str]]):
+        """
+        Args:
+            terms: Canonical term -> synonyms (the term itself always matches)
+        """
+        self.terms: Tuple[str, ...] = tuple(terms)
+        self.order: Dict[str, int] = {term: index for index, term in enumerate(self.terms)}
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Per state: (pattern length, term index) for every pattern ending there
+        self._output: List[Tuple[Tuple[int, int], ...]] = [()]
+
+        outputs: List[List[Tuple[int, int]]] = [[]]
+        for term_index, (term, synonyms) in enumerate(terms.items()):
+            for synonym in {normalize(term), *(normalize(synonym) for synonym in synonyms)}:
+                if not synonym.strip():
+                    continue
+                state = 0
+                for ch in synonym:
+                    next_state = self._goto[state].get(ch)
+                    if next_state is None:
+                        next_state = len(self._goto)
+                        self._goto[state][ch] = next_state
+                        self._goto.append({})
+                        self._fail.append(0)
+                        outputs.append([])
+                    state = next_state
+                outputs[state].append((len(synonym), term_index))
+
+        # Breadth-first failure links; each state inherits its fallback's outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(ch, 0)
+                outputs[next_state].extend(outputs[self._fail[next_state]])
+        self._output = [tuple(output) for output in outputs]
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def find(self, text: str) -> List[str]:
+        """
+        Canonical terms mentioned in the text
+
+        Args:
+            text: Utterance to scan
+
+        Returns:
+            Terms in lexicon order, without duplicates
+        """
+        return self.scan(text)[0]
+
+    def scan(self, text: str) -> Tuple[List[str], List[str], Set[int]]:
+        """
+        Canonical terms mentioned in the text, plus the words they cover
+
+        Args:
+            text: Utterance to scan
+
+        Returns:
+            (terms in lexicon order, normalized words, positions of the
+            words inside a match)
+        """
+        mentions, words = self.mentions(text)
+        found = sorted({self.order[term] for term, _, _ in mentions})
+        covered: Set[int] = set()
+        for _, first_word, last_word in mentions:
+            covered.update(range(first_word, last_word + 1))
+        return [self.terms[term_index] for term_index in found], words, covered
+
+    def mentions(self, text: str) -> Tuple[List[Tuple[str, int, int]], List[str]]:
+        """
+        Every match in the text with the words it spans
+
+        Args:
+            text: Utterance to scan
+
+        Returns:
+            ([(term, first word, last word)] in order of mention, normalized words)
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        normalized = normalize(text)
+        matches: List[Tuple[int, int, int]] = []
+        state = 0
+        for position, ch in enumerate(normalized):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, term_index in output[state]:
+                matches.append((position + 1 - length, position + 1, term_index))
+
+        # Drop matches inside a longer one
+        matches.sort(key=lambda match: (match[0], -match[1]))
+        mentions: List[Tuple[str, int, int]] = []
+        covered_end = -1
+        for start, end, term_index in matches:
+            if end <= covered_end:
+                continue
+            covered_end = end
+            # Matches start and end on a padding space; count the words in between
+            first_word = normalized.count(' ', 0, start + 1) - 1
+            mentions.append((self.terms[term_index], first_word,
+                             first_word + normalized.count(' ', start + 1, end - 1)))
+        return mentions, normalized.split()
+
+def load_lexicon(path: str) -> Dict[str, List[str]]:
+    """Read a lexicon file: {"terms": {term: [synonyms]}}"""
+    with open(path, 'r') as f:
+        return json.load(f)['terms']
+
+_lexicons: Dict[str, Dict[str, List[str]]] = {}
+_lexicons_lock = threading.Lock()
+
+def get_lexicon(name: str) -> Dict[str, List[str]]:
+    """
+    Terms of a shared lexicon from the configured lexicons directory, read once
+
+    Args:
+        name: Lexicon file name without .json
+
+    Raises:
+        ValueError: If the lexicon does not exist
+    """
+    terms = _lexicons.get(name)
+    if terms is not None:
+        return terms
+    with _lexicons_lock:
+        if name not in _lexicons:
+            from config import LEXICONS_DIR
+            path = os.path.join(LEXICONS_DIR, f"{name}.json")
+            if not os.path.exists(path):
+                raise ValueError(f"Unknown lexicon: {name}")
+            _lexicons[name] = load_lexicon(path)
+        return _lexicons[name]
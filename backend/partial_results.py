@@ -0,0 +1,99 @@
+"""
+Partial Result Cache
+Holds each call's tentative next turn, computed from Twilio's partial
+transcripts (partialResultCallback) while the caller is still speaking, so
+the final speech webhook can take that turn without parsing the answer again
+"""
+
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+
+from config import ASR_ACCEPT_CONFIDENCE
+
+@dataclass(frozen=True)
+class TentativeTurn:
+    """The agent's reply to a partial transcript, as the final result would produce it"""
+    transcript: str
+    turn: int
+    response: str
+    continue_conversation: bool
+    gather: Dict[str, Any]
+    twiml: str
+    snapshot: tuple
+    certainty: float
+
+    def matches(self, turn: int, transcript: str, asr_confidence: Optional[float]) -> bool:
+        """
+        Whether the final result takes this same turn, so its snapshot and TwiML stand
+
+        Partials carry no recognizer score, so the preview ran as if the words
+        were heard clearly. The final result only reuses it when its score would
+        not have changed anything: the same words on the same turn, and every
+        value the preview accepted still at or above ASR_ACCEPT_CONFIDENCE
+        (a turn that read an answer back or asked again has certainty 0.0).
+
+        Args:
+            turn: The call's conversation log length when the final result arrived
+            transcript: transcript_key() of the final result
+            asr_confidence: Twilio's Confidence for it, None if unavailable
+        """
+        if self.turn != turn or self.transcript != transcript:
+            return False
+        return asr_confidence is None or self.certainty * asr_confidence >= ASR_ACCEPT_CONFIDENCE
+
+class PartialResultCache:
+    """
+    Latest tentative turn per call
+
+    Only the newest partial of a call is kept; a turn is taken (removed)
+    by the final webhook whether or not it is reused. Calls that end
+    without a final result are dropped oldest first past max_calls.
+    """
+
+    def __init__(self, max_calls: int = 1000):
+        """
+        Args:
+            max_calls: Most calls with a tentative turn held at once
+        """
+        self.max_calls = max_calls
+        self._turns: Dict[str, TentativeTurn] = {}
+        self._outcomes: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def get(self, call_sid: str) -> Optional[TentativeTurn]:
+        """The call's tentative turn, left in place"""
+        with self._lock:
+            return self._turns.get(call_sid)
+
+    def put(self, call_sid: str, turn: TentativeTurn):
+        """Replace the call's tentative turn with one from a newer partial"""
+        with self._lock:
+            self._turns.pop(call_sid, None)
+            self._turns[call_sid] = turn
+            while len(self._turns) > self.max_calls:
+                del self._turns[next(iter(self._turns))]
+
+    def take(self, call_sid: str) -> Optional[TentativeTurn]:
+        """Remove and return the call's tentative turn"""
+        with self._lock:
+            return self._turns.pop(call_sid, None)
+
+    def discard(self, call_sid: str):
+        """Forget a call that ended"""
+        self.take(call_sid)
+
+    def record(self, reused: bool):
+        """Count whether a final result reused its tentative turn"""
+        with self._lock:
+            self._outcomes['reused' if reused else 'rebuilt'] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Pending tentative turns and how often final results reused one"""
+        with self._lock:
+            return {
+                'pending': len(self._turns),
+                'reused': self._outcomes['reused'],
+                'rebuilt': self._outcomes['rebuilt']
+            }
@@ -0,0 +1,247 @@
+"""
+Phonetic Term Index
+Resolves speech recognition garbles of lexicon terms ("met forming",
+"listen april") by sound. Every synonym is reduced to a simplified
+Metaphone key once; keys are indexed by their deletion neighbourhood so a
+lookup within a bounded edit distance is a handful of dict hits.
+"""
+
+import re
+from typing import Dict, List, Iterable, Optional, Set, Tuple
+
+_VOWELS = frozenset('aeiou')
+_FRONT_VOWELS = frozenset('eiy')
+_WORD_RE = re.compile(r"[a-z]+")
+
+# Spans never start or end on these, so filler around a term cannot bend its sound
+_STOP_WORDS = frozenset({
+    'a', 'an', 'the', 'i', 'im', 'ive', 'me', 'my', 'and', 'or', 'of', 'for', 'on',
+    'in', 'to', 'at', 'it', 'is', 'some', 'take', 'taking', 'have', 'had', 'got',
+    'use', 'just', 'also', 'no', 'not', 'yes', 'yeah', 'um', 'uh', 'like', 'that', 'this'
+})
+
+# Largest edit distance ever searched; the index stores deletes up to this depth
+MAX_DISTANCE = 2
+
+def phonetic_key(word: str) -> str:
+    """
+    Simplified Metaphone key: consonant skeleton with an initial vowel kept
+
+    Args:
+        word: Letters to encode (anything else is ignored)
+
+    Returns:
+        Uppercase key, '' for an empty word
+    """
+    letters = ''.join(_WORD_RE.findall(word.lower()))
+    # Doubled letters sound single
+    word = ''.join(ch for i, ch in enumerate(letters) if i == 0 or ch != letters[i - 1] or ch == 'c')
+    if not word:
+        return ''
+    if word[:2] in ('kn', 'gn', 'pn', 'wr', 'ae'):
+        word = word[1:]
+    elif word[0] == 'x':
+        word = 's' + word[1:]
+    elif word[:2] == 'wh':
+        word = 'w' + word[2:]
+
+    key = []
+    length = len(word)
+    for i, ch in enumerate(word):
+        prev = word[i - 1] if i > 0 else ''
+        nxt = word[i + 1] if i + 1 < length else ''
+        after = word[i + 2] if i + 2 < length else ''
+
+        if ch in _VOWELS:
+            if i == 0:
+                key.append('A')
+        elif ch == 'b':
+            if not (prev == 'm' and not nxt):
+                key.append('B')
+        elif ch == 'c':
+            if nxt == 'h' or (nxt == 'i' and after == 'a'):
+                key.append('K' if prev == 's' else 'X')
+            elif nxt in _FRONT_VOWELS:
+                if prev != 's':
+                    key.append('S')
+            else:
+                key.append('K')
+        elif ch == 'd':
+            key.append('J' if nxt == 'g' and after in _FRONT_VOWELS else 'T')
+        elif ch == 'g':
+            if nxt == 'h' and after not in _VOWELS:
+                continue
+            if nxt == 'n' and (not after or word[i + 2:] == 'ed'):
+                continue
+            if prev == 'n' and not nxt:
+                # "forming" ~ "formin"
+                continue
+            if prev == 'd' and nxt in _FRONT_VOWELS:
+                continue
+            key.append('J' if nxt in _FRONT_VOWELS else 'K')
+        elif ch == 'h':
+            if prev and prev in 'csptg':
+                continue
+            if (nxt in _VOWELS or nxt == 'y') and prev not in _VOWELS:
+                key.append('H')
+        elif ch == 'k':
+            if prev != 'c':
+                key.append('K')
+        elif ch == 'p':
+            key.append('F' if nxt == 'h' else 'P')
+        elif ch == 'q':
+            key.append('K')
+        elif ch == 's':
+            if nxt == 'h' or (nxt == 'i' and after and after in 'oa'):
+                key.append('X')
+            else:
+                key.append('S')
+        elif ch == 't':
+            if nxt == 'i' and after and after in 'oa':
+                key.append('X')
+            elif nxt == 'h':
+                key.append('0')
+            elif not (nxt == 'c' and after == 'h'):
+                key.append('T')
+        elif ch == 'v':
+            key.append('F')
+        elif ch in 'wy':
+            if nxt in _VOWELS:
+                key.append(ch.upper())
+        elif ch == 'x':
+            key.append('KS')
+        elif ch == 'z':
+            key.append('S')
+        else:
+            key.append(ch.upper())
+    return ''.join(key)
+
+def _deletes(key: str, depth: int) -> Set[str]:
+    """The key and every string reachable from it by up to depth deletions"""
+    found = {key}
+    frontier = {key}
+    for _ in range(depth):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        found |= frontier
+    return found
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, returning limit + 1 as soon as it is exceeded"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ch in enumerate(a, 1):
+        current = [i]
+        for j, other in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ch != other)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+def allowed_distance(key: str) -> int:
+    """Edit budget for a key: -1 (not indexed) for very short keys, more for long ones"""
+    if len(key) < 4:
+        return -1
+    if len(key) < 5:
+        return 0
+    if len(key) < 8:
+        return 1
+    return MAX_DISTANCE
+
+class PhoneticIndex:
+    """
+    Sound-alike lookup from spoken word spans to canonical terms
+
+    Multi-word synonyms and spans are keyed with their words run together,
+    so a drug name split by the recognizer ("met forming") still lines up.
+    """
+
+    def __init__(self, terms: Dict[str, Iterable[str]], max_words: int = 3):
+        """
+        Args:
+            terms: Canonical term -> synonyms (the term itself is included)
+            max_words: Longest span of spoken words tried as one term
+        """
+        self.max_words = max_words
+        keys: Dict[str, Set[str]] = {}
+        for term, synonyms in terms.items():
+            for synonym in {term, *synonyms}:
+                key = phonetic_key(synonym)
+                if allowed_distance(key) >= 0:
+                    keys.setdefault(key, set()).add(term)
+        self._terms_by_key: Dict[str, Tuple[str, ...]] = {key: tuple(sorted(found)) for key, found in keys.items()}
+        neighbourhood: Dict[str, Set[str]] = {}
+        for key in self._terms_by_key:
+            for variant in _deletes(key, allowed_distance(key)):
+                neighbourhood.setdefault(variant, set()).add(key)
+        self._keys_by_delete: Dict[str, Tuple[str, ...]] = {
+            variant: tuple(found) for variant, found in neighbourhood.items()}
+
+    def lookup(self, spoken: str) -> Optional[str]:
+        """
+        Term that sounds like a spoken span
+
+        Args:
+            spoken: One to max_words words
+
+        Returns:
+            The closest term within the edit budget, or None if there is
+            none or two different terms are equally close
+        """
+        key = phonetic_key(spoken)
+        limit = allowed_distance(key)
+        if limit < 0:
+            return None
+        exact = self._terms_by_key.get(key)
+        if exact is not None:
+            return exact[0] if len(exact) == 1 else None
+
+        best_distance = limit + 1
+        best: Set[str] = set()
+        for variant in _deletes(key, limit):
+            for candidate in self._keys_by_delete.get(variant, ()):
+                # Garbles keep the opening sound
+                if candidate[0] != key[0]:
+                    continue
+                distance = _edit_distance(key, candidate, min(limit, allowed_distance(candidate)))
+                if distance > min(limit, allowed_distance(candidate)):
+                    continue
+                if distance < best_distance:
+                    best_distance, best = distance, set(self._terms_by_key[candidate])
+                elif distance == best_distance:
+                    best.update(self._terms_by_key[candidate])
+        return next(iter(best)) if len(best) == 1 else None
+
+    def find(self, words: List[str], skip: Iterable[int] = ()) -> List[str]:
+        """
+        Terms that spans of the words sound like, longest spans first
+
+        Args:
+            words: Normalized words of the utterance
+            skip: Word positions already accounted for (e.g. exact matches)
+
+        Returns:
+            Terms in order of mention, without duplicates
+        """
+        skipped = set(skip)
+        found: List[str] = []
+        position = 0
+        while position < len(words):
+            if position in skipped:
+                position += 1
+                continue
+            for span in range(min(self.max_words, len(words) - position), 0, -1):
+                if skipped.intersection(range(position, position + span)):
+                    continue
+                if words[position] in _STOP_WORDS or words[position + span - 1] in _STOP_WORDS:
+                    continue
+                term = self.lookup(''.join(words[position:position + span]))
+                if term is not None:
+                    if term not in found:
+                        found.append(term)
+                    position += span
+                    break
+            else:
+                position += 1
+        return found
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Question Exclusion Statistics
+Offline job over the conversation store that measures how often each
+screening question rules callers out. The agent reads the resulting file
+to ask the highest-yield exclusion questions first.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import logging
+from types import MappingProxyType
+from typing import Dict, Any, Iterable, Mapping, Optional, Set, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Seconds between mtime checks of the stats file
+RELOAD_CHECK_INTERVAL = 5.0
+
+def _patient_record(log_data: Dict[str, Any]):
+    from voice_agent import PatientInfo, PATIENT_FIELDS
+
+    patient_info = (log_data.get('summary') or {}).get('patient_info') or {}
+    return PatientInfo(**{name: patient_info.get(name) for name in PATIENT_FIELDS})
+
+def _lists_answered_none(log_data: Dict[str, Any], list_questions: Dict[str, str]) -> Set[str]:
+    """
+    List fields the caller was asked and the call moved past without a term
+
+    An explicit "no" to a list question leaves its field empty, so only the
+    conversation log shows it was answered: the agent went on to another
+    question, a read-back of another answer, or the conclusion.
+
+    Args:
+        log_data: Full conversation log
+        list_questions: Question text -> field, for the panel's list questions
+    """
+    events = (log_data.get('summary') or {}).get('conversation_log') or []
+    answered: Set[str] = set()
+    asked_index, asked_field = None, None
+    for event in events:
+        index = event.get('question_index', event.get('confirm_index'))
+        if asked_field is not None and ('conclusion' in event or (index is not None and index != asked_index)):
+            answered.add(asked_field)
+            asked_field = None
+        if 'question_index' in event:
+            asked_index, asked_field = event['question_index'], list_questions.get(event.get('question'))
+    return answered
+
+def compute_exclusion_rates(logs: Iterable[Dict[str, Any]], matcher) -> Dict[str, Any]:
+    """
+    Per-question exclusion rates across logged calls
+
+    A question counts as answered when its field was captured, or when a
+    list question was answered without naming a term ("no"), and as
+    excluding when that answer alone rules the caller out of every trial
+    in the panel.
+
+    Args:
+        logs: Full conversation logs
+        matcher: TrialMatcher for the trial panel being screened
+
+    Returns:
+        Stats dict with 'calls', 'fields' ({field: answered, excluded, rate})
+        and 'generated_at'
+    """
+    exclusion_fields = [question['field'] for index, question in enumerate(matcher.questions)
+                        if index not in matcher.contact_questions]
+    list_questions = {question['question']: question['field'] for question in matcher.questions
+                      if question.get('type') == 'list' and question['field'] in exclusion_fields}
+    counts = {field: [0, 0] for field in exclusion_fields}
+    calls = 0
+
+    for log_data in logs:
+        calls += 1
+        patient_info = _patient_record(log_data)
+        answered_none = _lists_answered_none(log_data, list_questions)
+        for field in exclusion_fields:
+            value = getattr(patient_info, field)
+            if value is None:
+                counts[field][0] += field in answered_none
+                continue
+            counts[field][0] += 1
+            if not matcher.prune(matcher.all_trials, field, value):
+                counts[field][1] += 1
+
+    return {
+        'generated_at': time.time(),
+        'panel': matcher.panel_id,
+        'calls': calls,
+        'fields': {
+            field: {'answered': answered, 'excluded': excluded,
+                    'rate': excluded / answered if answered else 0.0}
+            for field, (answered, excluded) in counts.items()
+        }
+    }
+
+def expected_turns(logs: Iterable[Dict[str, Any]], matcher) -> float:
+    """
+    Average screening questions per call if every logged caller were
+    screened again with this matcher's ordering and early termination
+
+    Contact questions are not counted; they are asked on every call.
+    """
+    calls = 0
+    turns = 0
+    for log_data in logs:
+        patient_info = _patient_record(log_data)
+        candidates = matcher.all_trials
+        asked = set()
+        while True:
+            index = matcher.next_question(candidates, asked)
+            if index is None or index in matcher.contact_questions:
+                break
+            asked.add(index)
+            field = matcher.questions[index]['field']
+            candidates = matcher.prune(candidates, field, getattr(patient_info, field))
+        calls += 1
+        turns += len(asked)
+    return turns / calls if calls else 0.0
+
+def save_stats(stats: Dict[str, Any], path: str):
+    """Write stats atomically so agents never read a partial file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(stats, f, indent=2)
+    os.replace(tmp_path, path)
+
+# Returned whenever there are no statistics, always the same object so the
+# shared matchers built from it stay cached (see trial_matcher.get_matcher)
+NO_RATES: Mapping[str, float] = MappingProxyType({})
+
+_rates_cache: Dict[str, Tuple[float, float, Mapping[str, float]]] = {}
+_rates_lock = threading.Lock()
+
+def get_exclusion_rates(path: Optional[str] = None) -> Mapping[str, float]:
+    """
+    Exclusion rate per field from the stats file, reloaded when it changes
+
+    Args:
+        path: Stats file (defaults to QUESTION_STATS_PATH)
+
+    Returns:
+        {field: rate}, NO_RATES if there is no stats file yet; the same
+        object until the file changes
+    """
+    if path is None:
+        from config import QUESTION_STATS_PATH
+        path = QUESTION_STATS_PATH
+    if not path:
+        return NO_RATES
+
+    now = time.monotonic()
+    cached = _rates_cache.get(path)
+    if cached is not None and now - cached[0] < RELOAD_CHECK_INTERVAL:
+        return cached[2]
+
+    with _rates_lock:
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            _rates_cache[path] = (now, 0.0, NO_RATES)
+            return NO_RATES
+        if cached is not None and cached[1] == mtime:
+            _rates_cache[path] = (now, mtime, cached[2])
+            return cached[2]
+        try:
+            with open(path, 'r') as f:
+                stats = json.load(f)
+            rates = {field: values['rate'] for field, values in stats.get('fields', {}).items()}
+        except Exception as e:
+            logger.error(f"Error reading question stats {path}: {e}")
+            rates = cached[2] if cached is not None else NO_RATES
+        _rates_cache[path] = (now, mtime, rates)
+        return rates
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute per-question exclusion rates from logged conversations")
+    parser.add_argument('--output', default=None, help='Stats file to write (default: QUESTION_STATS_PATH)')
+    parser.add_argument('--trials', default=None, help="Trial panel, e.g. 'default+blood_pressure' (default: configured)")
+    args = parser.parse_args()
+
+    from config import QUESTION_STATS_PATH
+    from conversation_store import create_conversation_store
+    from trial_matcher import TrialMatcher, get_matcher
+
+    output = args.output or QUESTION_STATS_PATH
+    protocols = list(get_matcher(args.trials).protocols.values())
+    fixed = TrialMatcher(protocols)
+    logs = list(create_conversation_store().iter_logs())
+
+    stats = compute_exclusion_rates(logs, fixed)
+    adaptive = TrialMatcher(protocols, exclusion_rates={
+        field: values['rate'] for field, values in stats['fields'].items()
+    })
+    stats['expected_turns'] = {
+        'protocol_order': expected_turns(logs, fixed),
+        'adaptive_order': expected_turns(logs, adaptive)
+    }
+    save_stats(stats, output)
+
+    for field, values in sorted(stats['fields'].items(), key=lambda item: -item[1]['rate']):
+        print(f"{field:20} {values['rate']:6.1%} excluded ({values['excluded']}/{values['answered']})")
+    print(f"📊 {stats['calls']} calls, expected screening turns: "
+          f"{stats['expected_turns']['protocol_order']:.2f} in protocol order, "
+          f"{stats['expected_turns']['adaptive_order']:.2f} adaptive", file=sys.stderr)
+    print(f"✅ Wrote {output}")
@@ -0,0 +1,151 @@
+"""
+Session Reaper
+Evicts abandoned conversations from the session store using idle and maximum
+call-age TTLs, and on Twilio hangup status callbacks
+"""
+
+import heapq
+import threading
+import time
+import logging
+from collections import Counter
+from typing import Dict, Any, Optional, Callable, List, Tuple
+
+from session_store import SessionStore
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Twilio CallStatus values that mean the caller is gone
+TERMINAL_CALL_STATUSES = frozenset(['completed', 'no-answer', 'failed', 'busy', 'canceled'])
+
+class SessionReaper:
+    """
+    Tracks a deadline per active call in a min-heap and evicts expired sessions
+
+    Every turn calls touch(), which pushes a fresh deadline; superseded heap
+    entries are skipped lazily when they surface. Before evicting, the
+    session's own 'last_activity' is re-checked so a call that moved to
+    another worker process is re-armed instead of evicted.
+    """
+
+    def __init__(self, store: SessionStore, idle_ttl: float = 300, max_age: float = 3600,
+                 on_evict: Optional[Callable[[str, Dict[str, Any], str], None]] = None):
+        """
+        Args:
+            store: Session store holding active conversations
+            idle_ttl: Seconds without a turn before a call is considered abandoned
+            max_age: Hard limit on call length in seconds
+            on_evict: Called with (call_sid, session, reason) before the session is deleted
+        """
+        self.store = store
+        self.idle_ttl = idle_ttl
+        self.max_age = max_age
+        self.on_evict = on_evict
+        self._heap: List[Tuple[float, str]] = []
+        self._deadlines: Dict[str, float] = {}
+        self._evictions: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def _deadline_for(self, session: Dict[str, Any], now: float) -> float:
+        last_activity = session.get('last_activity') or session.get('start_time') or now
+        start_time = session.get('start_time') or now
+        return min(last_activity + self.idle_ttl, start_time + self.max_age)
+
+    def touch(self, call_sid: str, session: Dict[str, Any], now: Optional[float] = None):
+        """Record activity on a call and (re)arm its deadline"""
+        now = time.time() if now is None else now
+        session['last_activity'] = now
+        deadline = self._deadline_for(session, now)
+        with self._lock:
+            self._deadlines[call_sid] = deadline
+            heapq.heappush(self._heap, (deadline, call_sid))
+
+    def forget(self, call_sid: str):
+        """Stop tracking a call that ended normally"""
+        with self._lock:
+            self._deadlines.pop(call_sid, None)
+
+    def reap(self, now: Optional[float] = None) -> int:
+        """
+        Evict every session whose deadline has passed
+
+        Returns:
+            Number of sessions evicted
+        """
+        now = time.time() if now is None else now
+        evicted = 0
+        while True:
+            with self._lock:
+                if not self._heap or self._heap[0][0] > now:
+                    break
+                deadline, call_sid = heapq.heappop(self._heap)
+                if self._deadlines.get(call_sid) != deadline:
+                    continue  # Superseded by a later touch() or already gone
+
+            session = self._load(call_sid)
+            if session is None:
+                self.forget(call_sid)
+                continue
+
+            # Another worker may have served a turn since we armed this deadline
+            current_deadline = self._deadline_for(session, now)
+            if current_deadline > now:
+                with self._lock:
+                    self._deadlines[call_sid] = current_deadline
+                    heapq.heappush(self._heap, (current_deadline, call_sid))
+                continue
+
+            start_time = session.get('start_time') or now
+            reason = 'max_age' if start_time + self.max_age <= now else 'idle_timeout'
+            if self._evict(call_sid, session, reason):
+                evicted += 1
+
+        return evicted
+
+    def evict(self, call_sid: str, reason: str) -> bool:
+        """
+        Evict a call immediately, e.g. after a hangup status callback
+
+        Returns:
+            True if an active session was found and evicted
+        """
+        session = self._load(call_sid)
+        if session is None:
+            self.forget(call_sid)
+            return False
+        return self._evict(call_sid, session, reason)
+
+    def _load(self, call_sid: str) -> Optional[Dict[str, Any]]:
+        """The stored session; one that can no longer be restored is deleted without a flush"""
+        try:
+            return self.store.get(call_sid)
+        except ValueError as e:
+            logger.error(f"Dropping unrestorable call {call_sid}: {e}")
+            self.store.delete(call_sid)
+            return None
+
+    def _evict(self, call_sid: str, session: Dict[str, Any], reason: str) -> bool:
+        if self.on_evict:
+            try:
+                self.on_evict(call_sid, session, reason)
+            except Exception as e:
+                logger.error(f"Error flushing evicted call {call_sid}: {e}")
+
+        removed = self.store.delete(call_sid)
+        self.forget(call_sid)
+        if removed:
+            with self._lock:
+                self._evictions[reason] += 1
+            logger.info(f"Evicted call {call_sid} ({reason})")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Eviction counters by reason and number of tracked calls"""
+        with self._lock:
+            return {
+                'tracked': len(self._deadlines),
+                'evictions': dict(self._evictions),
+                'total_evictions': sum(self._evictions.values())
+            }
@@ -0,0 +1,183 @@
+"""
+Session Store for Active Conversations
+Keeps per-call conversation state keyed by CallSid so that /handle_call and
+/process_speech can be served by any worker process
+"""
+
+import os
+import marshal
+import sqlite3
+import threading
+import logging
+from typing import Dict, Any, Optional, Iterator
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class SessionStore:
+    """
+    Dict-like store of active conversations keyed by CallSid
+
+    Entries are plain dicts ({'voice_agent': ..., 'from_number': ..., 'start_time': ...}).
+    Backends that live outside the process only see changes when an entry is
+    written back with ``store[call_sid] = session``, so callers must save the
+    session after every turn that mutates it.
+    """
+
+    def get(self, call_sid: str, default: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def put(self, call_sid: str, session: Dict[str, Any]):
+        raise NotImplementedError
+
+    def delete(self, call_sid: str) -> bool:
+        raise NotImplementedError
+
+    def keys(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __contains__(self, call_sid: str) -> bool:
+        return self.get(call_sid) is not None
+
+    def __getitem__(self, call_sid: str) -> Dict[str, Any]:
+        session = self.get(call_sid)
+        if session is None:
+            raise KeyError(call_sid)
+        return session
+
+    def __setitem__(self, call_sid: str, session: Dict[str, Any]):
+        self.put(call_sid, session)
+
+    def __delitem__(self, call_sid: str):
+        if not self.delete(call_sid):
+            raise KeyError(call_sid)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+class InMemorySessionStore(SessionStore):
+    """Process-local store; only correct when the app runs as a single process"""
+
+    def __init__(self):
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+
+    def get(self, call_sid: str, default: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        return self._sessions.get(call_sid, default)
+
+    def put(self, call_sid: str, session: Dict[str, Any]):
+        self._sessions[call_sid] = session
+
+    def delete(self, call_sid: str) -> bool:
+        return self._sessions.pop(call_sid, None) is not None
+
+    def keys(self) -> Iterator[str]:
+        return iter(list(self._sessions))
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Store backed by a local SQLite file shared by every worker on the box
+
+    The database runs in WAL mode so readers never block the single writer,
+    and each thread keeps its own connection. The voice agent is stored as
+    its compact snapshot (see ClinicalTrialVoiceAgent.to_snapshot) so a turn
+    only pays for the changing state.
+    """
+
+    def __init__(self, db_path: str = "sessions.db"):
+        self.db_path = db_path
+        self._local = threading.local()
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "call_sid TEXT PRIMARY KEY, "
+            "data BLOB NOT NULL, "
+            "updated_at REAL NOT NULL DEFAULT (julianday('now')))"
+        )
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _encode(self, session: Dict[str, Any]) -> bytes:
+        record = dict(session)
+        agent = record.pop('voice_agent', None)
+        record['agent_snapshot'] = agent.to_snapshot() if agent is not None else None
+        return marshal.dumps(record)
+
+    def _decode(self, data: bytes) -> Dict[str, Any]:
+        from voice_agent import ClinicalTrialVoiceAgent
+        session = marshal.loads(data)
+        snapshot = session.pop('agent_snapshot', None)
+        session['voice_agent'] = ClinicalTrialVoiceAgent.from_snapshot(snapshot) if snapshot is not None else None
+        return session
+
+    def get(self, call_sid: str, default: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT data FROM sessions WHERE call_sid = ?", (call_sid,)
+        ).fetchone()
+        if row is None:
+            return default
+        return self._decode(row[0])
+
+    def put(self, call_sid: str, session: Dict[str, Any]):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO sessions (call_sid, data, updated_at) "
+            "VALUES (?, ?, julianday('now'))",
+            (call_sid, self._encode(session))
+        )
+
+    def delete(self, call_sid: str) -> bool:
+        cursor = self._connection().execute(
+            "DELETE FROM sessions WHERE call_sid = ?", (call_sid,)
+        )
+        return cursor.rowcount > 0
+
+    def keys(self) -> Iterator[str]:
+        rows = self._connection().execute("SELECT call_sid FROM sessions").fetchall()
+        return iter([row[0] for row in rows])
+
+    def __contains__(self, call_sid: str) -> bool:
+        row = self._connection().execute(
+            "SELECT 1 FROM sessions WHERE call_sid = ?", (call_sid,)
+        ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+def create_session_store(backend: Optional[str] = None, db_path: Optional[str] = None) -> SessionStore:
+    """
+    Create the session store selected by configuration
+
+    Args:
+        backend: 'memory' or 'sqlite' (defaults to SESSION_STORE from config)
+        db_path: SQLite database path (defaults to SESSION_DB_PATH from config)
+
+    Returns:
+        Session store instance
+    """
+    from config import SESSION_STORE, SESSION_DB_PATH
+    backend = (backend or SESSION_STORE).lower()
+
+    if backend == 'memory':
+        return InMemorySessionStore()
+    if backend == 'sqlite':
+        return SQLiteSessionStore(db_path or SESSION_DB_PATH)
+
+    raise ValueError(f"Unknown session store backend: {backend}")
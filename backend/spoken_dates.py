@@ -0,0 +1,208 @@
+"""
+Spoken Date Parser
+Compiled once at import; resolves an availability answer ("October sixteenth",
+"ten sixteen", "next Tuesday", "tomorrow") to a calendar date in a single
+pass over the tokens
+"""
+
+import re
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+# Token classes
+MONTH, WEEKDAY, CARDINAL, TENS, ORDINAL, RELATIVE, NEXT, THIS, ARTICLE, AFTER, UNIT, NUMERAL, SLASHED, ISO = range(14)
+
+_TOKEN_RE = re.compile(
+    r"(?P<iso>\d{4}-\d{1,2}-\d{1,2})"
+    r"|(?P<slashed>\d{1,2}/\d{1,2}(?:/\d{2,4})?)"
+    r"|(?P<numeral>\d+)(?:st|nd|rd|th)?"
+    r"|(?P<word>[a-z]+)"
+)
+
+_MONTHS = {
+    'january': 1, 'jan': 1, 'february': 2, 'feb': 2, 'march': 3, 'mar': 3,
+    'april': 4, 'apr': 4, 'may': 5, 'june': 6, 'jun': 6, 'july': 7, 'jul': 7,
+    'august': 8, 'aug': 8, 'september': 9, 'sep': 9, 'sept': 9,
+    'october': 10, 'oct': 10, 'november': 11, 'nov': 11, 'december': 12, 'dec': 12
+}
+_WEEKDAYS = {
+    'monday': 0, 'mon': 0, 'tuesday': 1, 'tue': 1, 'tues': 1,
+    'wednesday': 2, 'wed': 2, 'thursday': 3, 'thu': 3, 'thur': 3, 'thurs': 3,
+    'friday': 4, 'fri': 4, 'saturday': 5, 'sat': 5, 'sunday': 6, 'sun': 6
+}
+_CARDINALS = {
+    'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7,
+    'eight': 8, 'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12, 'thirteen': 13,
+    'fourteen': 14, 'fifteen': 15, 'sixteen': 16, 'seventeen': 17, 'eighteen': 18,
+    'nineteen': 19
+}
+_TENS = {'twenty': 20, 'thirty': 30}
+_ORDINALS = {
+    'first': 1, 'second': 2, 'third': 3, 'fourth': 4, 'fifth': 5, 'sixth': 6,
+    'seventh': 7, 'eighth': 8, 'ninth': 9, 'tenth': 10, 'eleventh': 11, 'twelfth': 12,
+    'thirteenth': 13, 'fourteenth': 14, 'fifteenth': 15, 'sixteenth': 16,
+    'seventeenth': 17, 'eighteenth': 18, 'nineteenth': 19, 'twentieth': 20, 'thirtieth': 30
+}
+_RELATIVE = {'today': 0, 'tonight': 0, 'tomorrow': 1}
+_UNITS = {'day': 1, 'days': 1, 'week': 7, 'weeks': 7}
+
+def _build_lexicon() -> dict:
+    lexicon = {}
+    for table, kind in ((_CARDINALS, CARDINAL), (_TENS, TENS), (_ORDINALS, ORDINAL),
+                        (_WEEKDAYS, WEEKDAY), (_MONTHS, MONTH), (_RELATIVE, RELATIVE), (_UNITS, UNIT)):
+        for word, value in table.items():
+            lexicon[word] = (kind, value)
+    lexicon['next'] = (NEXT, None)
+    lexicon['this'] = (THIS, None)
+    lexicon['coming'] = (THIS, None)
+    lexicon['a'] = (ARTICLE, None)
+    lexicon['after'] = (AFTER, None)
+    return lexicon
+
+_LEXICON = _build_lexicon()
+
+def _tokens(text: str) -> List[Tuple[int, object]]:
+    """Classify each token; unknown words become (None, None) separators"""
+    tokens = []
+    for match in _TOKEN_RE.finditer(text.lower()):
+        if match.group('iso'):
+            tokens.append((ISO, match.group('iso')))
+        elif match.group('slashed'):
+            tokens.append((SLASHED, match.group('slashed')))
+        elif match.group('numeral'):
+            tokens.append((NUMERAL, int(match.group('numeral'))))
+        else:
+            tokens.append(_LEXICON.get(match.group('word'), (None, None)))
+    return tokens
+
+def _month_day(month: int, day: int, today: date, year: Optional[int] = None) -> Optional[date]:
+    """Resolve month/day to the next such date on or after today (or in the given year)"""
+    if year is not None:
+        try:
+            return date(year, month, day)
+        except ValueError:
+            return None
+    # Feb 29 may be up to four years out
+    for candidate_year in range(today.year, today.year + 5):
+        try:
+            resolved = date(candidate_year, month, day)
+        except ValueError:
+            continue
+        if resolved >= today:
+            return resolved
+    return None
+
+def parse_spoken_date(speech_text: str, today: Optional[date] = None) -> Optional[date]:
+    """
+    Resolve a spoken availability date
+
+    Month names and ordinals may come in any order ("October sixteenth",
+    "the sixteenth of October"), bare number pairs read as month then day
+    ("ten sixteen", "10/16"), and dates without a year roll into next year
+    once they have passed. A lone weekday means its next occurrence;
+    "next <weekday>" is the occurrence in the following calendar week.
+
+    Args:
+        speech_text: Speech recognition result
+        today: Reference date (defaults to date.today())
+
+    Returns:
+        The date, or None if the utterance does not name one
+    """
+    today = today or date.today()
+
+    month: Optional[int] = None
+    year: Optional[int] = None
+    numbers: List[int] = []       # day/month candidates in spoken order
+    pending: Optional[int] = None  # number still open to a compound ("twenty" + "first")
+    weekday: Optional[int] = None
+    next_week = False
+    offset: Optional[int] = None
+    modifier = None
+
+    def close():
+        nonlocal pending
+        if pending is not None:
+            numbers.append(pending)
+            pending = None
+
+    for kind, value in _tokens(speech_text):
+        if kind == TENS:
+            close()
+            pending = value
+            continue
+        if kind in (CARDINAL, ORDINAL) and pending is not None and pending % 10 == 0 and value < 10:
+            pending += value
+            close()
+            continue
+        close()
+
+        if kind == ISO:
+            try:
+                return date.fromisoformat('-'.join(part.zfill(2) for part in value.split('-')))
+            except ValueError:
+                continue
+        elif kind == SLASHED:
+            parts = [int(part) for part in value.split('/')]
+            slashed_year = None
+            if len(parts) == 3:
+                slashed_year = parts[2] + 2000 if parts[2] < 100 else parts[2]
+            resolved = _month_day(parts[0], parts[1], today, slashed_year)
+            if resolved:
+                return resolved
+        elif kind == NUMERAL:
+            if 1900 <= value <= 2100:
+                year = value
+            else:
+                numbers.append(value)
+        elif kind in (CARDINAL, ORDINAL):
+            numbers.append(value)
+        elif kind == MONTH:
+            month = value
+        elif kind == WEEKDAY:
+            weekday = value
+            next_week = modifier == NEXT
+        elif kind == RELATIVE:
+            # "the day after tomorrow"
+            offset = value + 1 if modifier == AFTER else value
+        elif kind == UNIT:
+            # "in two weeks", "in a week", "next week"
+            if numbers:
+                offset = numbers.pop() * value
+            elif modifier in (ARTICLE, NEXT):
+                offset = value
+        elif kind in (NEXT, THIS, ARTICLE, AFTER):
+            modifier = kind
+            continue
+        modifier = None
+    close()
+
+    # Explicit calendar dates win over relative phrases
+    if month is not None:
+        day = next((n for n in numbers if 1 <= n <= 31), None)
+        if day is not None:
+            return _month_day(month, day, today, year)
+    elif len(numbers) >= 2 and 1 <= numbers[0] <= 12 and 1 <= numbers[1] <= 31:
+        return _month_day(numbers[0], numbers[1], today, year)
+
+    if weekday is not None:
+        days_ahead = (weekday - today.weekday()) % 7 or 7
+        if next_week and today.weekday() + days_ahead < 7:
+            days_ahead += 7
+        return today + timedelta(days=days_ahead)
+
+    if offset is not None:
+        return today + timedelta(days=offset)
+
+    # "the fifteenth": that day this month, or next month once it has passed
+    if len(numbers) == 1 and 1 <= numbers[0] <= 31:
+        for months_ahead in range(3):
+            month_index = today.month - 1 + months_ahead
+            try:
+                resolved = date(today.year + month_index // 12, month_index % 12 + 1, numbers[0])
+            except ValueError:
+                continue
+            if resolved >= today:
+                return resolved
+
+    return None
@@ -0,0 +1,233 @@
+"""
+Spoken Number Grammar
+Compiled once at import; turns speech-to-text output into digit strings
+(phone numbers) or cardinal values (ages) in a single pass over the tokens
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+# Token classes
+DIGIT, TEEN, TENS, HUNDRED, REPEAT, FILLER, NUMERAL = range(7)
+
+_TOKEN_RE = re.compile(r"[a-z]+|\d+")
+
+_DIGIT_WORDS = {
+    'zero': 0, 'one': 1, 'two': 2, 'three': 3, 'four': 4,
+    'five': 5, 'six': 6, 'seven': 7, 'eight': 8, 'nine': 9
+}
+# Read as digits only inside digit strings, never as cardinals
+_DIGIT_HOMOPHONES = {
+    'oh': 0, 'o': 0,  # 'oh' and 'o' are often used for zero
+    'to': 2, 'too': 2, 'for': 4, 'ate': 8  # Common mispronunciations
+}
+_TEEN_WORDS = {
+    'ten': 10, 'eleven': 11, 'twelve': 12, 'thirteen': 13, 'fourteen': 14,
+    'fifteen': 15, 'sixteen': 16, 'seventeen': 17, 'eighteen': 18, 'nineteen': 19
+}
+_TENS_WORDS = {
+    'twenty': 20, 'thirty': 30, 'forty': 40, 'fifty': 50,
+    'sixty': 60, 'seventy': 70, 'eighty': 80, 'ninety': 90
+}
+_REPEAT_WORDS = {'double': 2, 'triple': 3}
+_FILLER_WORDS = {'um', 'uh', 'like', 'the', 'and', 'or', 'is', 'are', 'a'}
+
+def _build_lexicon(include_homophones: bool) -> dict:
+    lexicon = {}
+    for word, value in _DIGIT_WORDS.items():
+        lexicon[word] = (DIGIT, value)
+    if include_homophones:
+        for word, value in _DIGIT_HOMOPHONES.items():
+            lexicon[word] = (DIGIT, value)
+    for word, value in _TEEN_WORDS.items():
+        lexicon[word] = (TEEN, value)
+    for word, value in _TENS_WORDS.items():
+        lexicon[word] = (TENS, value)
+    for word, value in _REPEAT_WORDS.items():
+        lexicon[word] = (REPEAT, value)
+    lexicon['hundred'] = (HUNDRED, 100)
+    for word in _FILLER_WORDS:
+        lexicon.setdefault(word, (FILLER, word))
+    return lexicon
+
+_DIGIT_LEXICON = _build_lexicon(include_homophones=True)
+_CARDINAL_LEXICON = _build_lexicon(include_homophones=False)
+
+def _tokens(text: str, lexicon: dict) -> List[Tuple[int, object]]:
+    """Classify each token; unknown words become (None, None) separators"""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token.isdigit():
+            tokens.append((NUMERAL, token))
+        else:
+            tokens.append(lexicon.get(token, (None, None)))
+    return tokens
+
+def extract_digits(speech_text: str) -> List[str]:
+    """
+    Read a spoken digit string such as a phone number
+
+    Handles single digits ("four oh eight"), numerals ("408"), repeats
+    ("double five", "triple oh"), teens ("sixteen"), compound tens
+    ("sixty seven" -> 67) and hundreds ("four hundred eight" -> 408).
+
+    Args:
+        speech_text: Speech recognition result
+
+    Returns:
+        List of digit characters in spoken order
+    """
+    digits: List[str] = []
+    repeat = 1
+    tens: Optional[int] = None      # pending "sixty" waiting for a unit
+    hundreds: Optional[int] = None  # pending "four hundred" waiting for its remainder
+    remainder = 0
+
+    def flush_tens():
+        nonlocal tens
+        if tens is not None:
+            if hundreds is None:
+                digits.extend(str(tens))
+            tens = None
+
+    def flush_hundreds():
+        nonlocal hundreds, remainder, tens
+        if hundreds is not None:
+            digits.extend(f"{hundreds}{(remainder + (tens or 0)):02d}")
+            hundreds = None
+            remainder = 0
+            tens = None
+
+    for kind, value in _tokens(speech_text, _DIGIT_LEXICON):
+        if kind == FILLER:
+            continue
+
+        if kind == DIGIT:
+            if hundreds is not None and remainder == 0:
+                remainder = (tens or 0) + value
+                tens = None
+                flush_hundreds()
+            elif tens is not None:
+                digits.extend(str(tens + value))
+                tens = None
+            else:
+                digits.extend(str(value) * repeat)
+            repeat = 1
+        elif kind == TEEN:
+            if hundreds is not None and tens is None and remainder == 0:
+                remainder = value
+                flush_hundreds()
+            else:
+                flush_hundreds()
+                flush_tens()
+                digits.extend(str(value))
+            repeat = 1
+        elif kind == TENS:
+            if hundreds is None:
+                flush_tens()
+            elif tens is not None:
+                flush_hundreds()
+            tens = value
+            repeat = 1
+        elif kind == HUNDRED:
+            flush_tens()
+            if hundreds is None and digits:
+                hundreds = int(digits.pop())
+            else:
+                flush_hundreds()
+        elif kind == REPEAT:
+            flush_hundreds()
+            flush_tens()
+            repeat = value
+        elif kind == NUMERAL:
+            flush_hundreds()
+            flush_tens()
+            digits.extend(value[0] * repeat + value[1:])
+            repeat = 1
+        else:
+            # Any other word ends a pending compound
+            flush_hundreds()
+            flush_tens()
+            repeat = 1
+
+    flush_hundreds()
+    flush_tens()
+    return digits
+
+def parse_number(speech_text: str) -> Optional[int]:
+    """
+    Read the first cardinal number in an utterance
+
+    "I'm forty five" -> 45, "52 years old" -> 52, "one hundred and two" -> 102.
+    Digit homophones such as "to" and "for" are not treated as numbers here.
+
+    Args:
+        speech_text: Speech recognition result
+
+    Returns:
+        The number, or None if the utterance contains none
+    """
+    value: Optional[int] = None
+    last_kind = None
+
+    for kind, token_value in _tokens(speech_text, _CARDINAL_LEXICON):
+        if kind == FILLER:
+            # "and" only continues a number after "hundred"
+            if value is None or (token_value == 'and' and last_kind == HUNDRED):
+                continue
+            break
+
+        if kind == NUMERAL:
+            if value is not None:
+                break
+            return int(token_value)
+        if kind == DIGIT:
+            if value is None:
+                value = token_value
+            elif last_kind in (TENS, HUNDRED):
+                value += token_value
+            else:
+                break
+        elif kind == TEEN:
+            if value is None:
+                value = token_value
+            elif last_kind == HUNDRED:
+                value += token_value
+            else:
+                break
+        elif kind == TENS:
+            if value is None:
+                value = token_value
+            elif last_kind == HUNDRED:
+                value += token_value
+            else:
+                break
+        elif kind == HUNDRED:
+            if value is None or value >= 100:
+                break
+            value *= 100
+        else:
+            if value is not None:
+                break
+            last_kind = None
+            continue
+        last_kind = kind
+
+    return value
+
+def parse_leading_number(speech_text: str) -> Optional[int]:
+    """
+    Read a cardinal only if the utterance starts with one
+
+    "52 and healthy" -> 52, "going to be 40" -> None.
+
+    Args:
+        speech_text: Speech recognition result (or a slice of one)
+
+    Returns:
+        The number, or None if the first token is not part of a number
+    """
+    tokens = _tokens(speech_text, _CARDINAL_LEXICON)
+    if not tokens or tokens[0][0] not in (DIGIT, TEEN, TENS, NUMERAL):
+        return None
+    return parse_number(speech_text)
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Test snapshot/restore of voice agent state
+"""
+
+import time
+import marshal
+from voice_agent import ClinicalTrialVoiceAgent
+
+def test_agent_snapshot():
+    print("Testing agent snapshot/restore:")
+    print("=" * 50)
+    
+    agent = ClinicalTrialVoiceAgent()
+    agent.process_incoming_call()
+    for response in ["yes", "I'm 34", "diabetes", "no", "no", "no", "four oh eight", "five five five", "one two three four"]:
+        agent.process_patient_response(response)
+    
+    snapshot = agent.to_snapshot()
+    encoded = marshal.dumps(snapshot)
+    print(f"Snapshot size: {len(encoded)} bytes for {len(agent.conversation_log)} log events")
+    
+    restored = ClinicalTrialVoiceAgent.from_snapshot(marshal.loads(encoded))
+    assert restored.screening_questions is agent.screening_questions
+    assert restored.conversation_stage == agent.conversation_stage
+    assert restored.current_question_index == agent.current_question_index
+    assert restored.patient_info == agent.patient_info
+    assert restored.conversation_log == agent.conversation_log
+    assert restored.get_conversation_summary() == agent.get_conversation_summary()
+    print(f"Restored stage={restored.conversation_stage} index={restored.current_question_index} contact={restored.patient_info.contact_info}")
+    
+    # Restored agent keeps working
+    restored.process_patient_response("October sixteenth")
+    assert restored.conversation_stage == "conclusion"
+    
+    runs = 2000
+    start = time.perf_counter()
+    for _ in range(runs):
+        ClinicalTrialVoiceAgent.from_snapshot(snapshot)
+    per_restore = (time.perf_counter() - start) / runs * 1e6
+    print(f"Restore cost: {per_restore:.1f} µs")
+
+if __name__ == "__main__":
+    test_agent_snapshot()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Test conditional GET on /api/appointments across its JSON and NDJSON formats
+"""
+
+import os
+import tempfile
+
+import app as app_module
+from app import app
+from conversation_store import SQLiteConversationStore
+
+# Keep the app's conversation database out of the working directory
+app_module.conversation_store = SQLiteConversationStore(os.path.join(tempfile.mkdtemp(), 'conversations.db'))
+
+def test_format_specific_etags():
+    print("Testing appointment ETags per format:")
+    print("=" * 50)
+
+    with app.test_client() as client:
+        as_json = client.get('/api/appointments')
+        as_ndjson = client.get('/api/appointments', headers={'Accept': 'application/x-ndjson'})
+        print(f"JSON: {as_json.headers['ETag']}, NDJSON: {as_ndjson.headers['ETag']}")
+        assert as_json.mimetype == 'application/json' and as_ndjson.mimetype == 'application/x-ndjson'
+        assert as_json.headers['ETag'] != as_ndjson.headers['ETag']
+        assert 'Accept' in as_json.headers['Vary'] and 'Accept' in as_ndjson.headers['Vary']
+
+        # Revalidating one format's ETag never returns 304 for the other
+        json_etag = as_json.headers['ETag']
+        assert client.get('/api/appointments', headers={'If-None-Match': json_etag}).status_code == 304
+        assert client.get('/api/appointments', headers={'If-None-Match': json_etag,
+                                                        'Accept': 'application/x-ndjson'}).status_code == 200
+
+if __name__ == "__main__":
+    test_format_specific_etags()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test confidence-aware acceptance, read-back confirmation and re-asking
+"""
+
+from voice_agent import ClinicalTrialVoiceAgent
+
+def agent_at(field):
+    """Agent on a fresh call, answering plainly until the given question is asked"""
+    answers = {'age': "40", 'medical_conditions': "no", 'medications': "no", 'pregnant': "no",
+               'severe_conditions': "no"}
+    agent = ClinicalTrialVoiceAgent()
+    agent.process_incoming_call()
+    agent.process_patient_response("yes")
+    while agent.screening_questions[agent.current_question_index]['field'] != field:
+        agent.process_patient_response(answers[agent.screening_questions[agent.current_question_index]['field']])
+    return agent
+
+def test_confidence_actions():
+    print("Testing confidence-aware answers:")
+    print("=" * 50)
+
+    # Clearly heard: accepted straight away
+    agent = agent_at('phone_area_code')
+    response = agent.process_patient_response("four oh eight", asr_confidence=0.92)
+    print(f"0.92 -> {response}")
+    assert agent.patient_info.phone_area_code == "408" and "next 3 digits" in response
+
+    # Unsure: read back, stored once confirmed
+    agent = agent_at('phone_area_code')
+    response = agent.process_patient_response("four oh eight", asr_confidence=0.55)
+    print(f"0.55 -> {response}")
+    assert response == "Did you say 4 0 8?"
+    assert agent.patient_info.phone_area_code is None
+    response = agent.process_patient_response("yes that's right")
+    assert agent.patient_info.phone_area_code == "408" and "next 3 digits" in response
+    summary = agent.get_conversation_summary()
+    print(f"Field confidence: {summary['field_confidence']}")
+    # The confidence it was heard with; the confirmation is counted on its own
+    assert summary['field_confidence']['phone_area_code'] == 0.55
+    assert summary['confirmations'] == {"asked": 1, "confirmed": 1}
+
+    # Denied read-back: the question is asked once more
+    agent = agent_at('phone_area_code')
+    agent.process_patient_response("four oh eight", asr_confidence=0.55)
+    response = agent.process_patient_response("no")
+    print(f"Denied -> {response}")
+    assert response.startswith("Sorry, I didn't catch that.") and "area code" in response
+    agent.process_patient_response("four one five", asr_confidence=0.95)
+    assert agent.patient_info.phone_area_code == "415"
+
+    # Barely heard: asked again, then read back rather than asked a third time
+    agent = agent_at('age')
+    response = agent.process_patient_response("forty", asr_confidence=0.2)
+    print(f"0.20 -> {response}")
+    assert response.startswith("Sorry") and agent.patient_info.age is None
+    response = agent.process_patient_response("forty", asr_confidence=0.3)
+    assert response == "Did you say 40?"
+
+def test_field_confidence_recorded():
+    agent = agent_at('severe_conditions')
+    agent.process_patient_response("not that I know of", asr_confidence=0.95)
+    confidence = agent.get_conversation_summary()['field_confidence']
+    print(f"\nField confidence: {confidence}")
+    assert confidence['age'] == 1.0
+    assert 0.7 <= confidence['severe_conditions'] < 0.8
+
+    restored = ClinicalTrialVoiceAgent.from_snapshot(agent.to_snapshot())
+    assert restored.field_confidence() == confidence
+
+def test_response_after_conclusion():
+    print("\nTesting a response after the conclusion:")
+    agent = agent_at('phone_area_code')
+    agent.process_patient_response("4 0 8 5 5 5 1 2 3 4")
+    agent.process_patient_response("next monday")
+    assert agent.conversation_stage == "conclusion"
+
+    for speech, confidence in [("hello?", None), ("what was that", 0.2)]:
+        response = agent.process_patient_response(speech, asr_confidence=confidence)
+        print(f"  {speech!r} -> {response!r}")
+        assert not response.startswith("I apologize")
+        assert agent.conversation_stage == "conclusion"
+
+if __name__ == "__main__":
+    test_confidence_actions()
+    test_field_confidence_recorded()
+    test_response_after_conclusion()
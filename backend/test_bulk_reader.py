@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Test the parallel bulk conversation reader
+"""
+
+import os
+import json
+import shutil
+import tempfile
+from bulk_reader import iter_projected, BulkReadStats
+
+def test_bulk_reader():
+    print("Testing parallel bulk reader:")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        # Fan the shipped conversations out into a larger archive
+        sources = [f for f in os.listdir('conversations') if f.endswith('.json')]
+        for i in range(40):
+            for source in sources:
+                shutil.copy(os.path.join('conversations', source), os.path.join(tmp, f'{i:03d}_{source}'))
+        with open(os.path.join(tmp, 'broken.json'), 'w') as f:
+            f.write('{not json')
+        
+        fields = ['call_sid', 'phone', 'age', 'eligible', 'availability_date', 'timestamp']
+        serial = list(iter_projected(tmp, fields, workers=1))
+        
+        stats = BulkReadStats()
+        parallel = list(iter_projected(tmp, fields, workers=2, chunk_size=16, stats=stats))
+        print(stats.report())
+        
+        key = lambda row: json.dumps(row, sort_keys=True)
+        assert sorted(serial, key=key) == sorted(parallel, key=key)
+        assert len(parallel) == 40 * len(sources)
+        assert stats.errors == 1 and stats.workers == 2
+        assert set(parallel[0]) == set(fields)
+
+if __name__ == "__main__":
+    test_bulk_reader()
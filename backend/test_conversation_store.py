@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test the indexed conversation store and the JSON migrator
+"""
+
+import os
+import json
+import tempfile
+from conversation_store import (
+    SQLiteConversationStore, JSONDirectoryConversationStore,
+    migrate_json_directory, normalize_availability_date
+)
+
+def test_conversation_store():
+    print("Testing conversation store:")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteConversationStore(os.path.join(tmp, 'conversations.db'))
+        
+        # Import the archived conversations shipped with the repo
+        imported = migrate_json_directory(store, 'conversations')
+        legacy = JSONDirectoryConversationStore('conversations')
+        print(f"Imported {imported} conversations")
+        assert imported == legacy.count() == store.count()
+        
+        # Re-running the migrator is idempotent
+        migrate_json_directory(store, 'conversations')
+        assert store.count() == imported
+        
+        # Indexed queries return the same appointments as the directory scan
+        for eligible in (None, True, False):
+            indexed = list(store.iter_appointments(eligible=eligible))
+            scanned = list(legacy.iter_appointments(eligible=eligible))
+            print(f"eligible={eligible}: {len(indexed)} appointments")
+            assert indexed == scanned
+        
+        store.save({
+            'call_sid': 'CA_new', 'from_number': '+15555550100', 'timestamp': 1760000000.0,
+            'summary': {'eligible': True, 'patient_info': {
+                'age': 40, 'contact_info': '555-555-0100', 'availability_date': '10/16',
+                'medical_conditions': None, 'medications': None
+            }}
+        })
+        assert store.get('CA_new')['from_number'] == '+15555550100'
+        new_rows = [row for row in store.iter_appointments(eligible=True) if row['call_sid'] == 'CA_new']
+        assert new_rows[0]['availability_day'] == '2025-10-16'
+    
+    # Dates earlier than the call roll into the next year
+    assert normalize_availability_date('01/05', 1760000000.0) == '2026-01-05'
+    assert normalize_availability_date('2025-12-01') == '2025-12-01'
+    assert normalize_availability_date('October 15th.') is None
+
+def _log(call_sid, timestamp, date='10/16'):
+    return {
+        'call_sid': call_sid, 'timestamp': timestamp,
+        'summary': {'eligible': True, 'patient_info': {
+            'age': 40, 'contact_info': '555-555-0100', 'availability_date': date
+        }}
+    }
+
+def test_json_directory_cache():
+    print("\nTesting incremental appointments cache:")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JSONDirectoryConversationStore(tmp, rescan_interval=0)
+        store.save(_log('CA_1', 1.0))
+        assert [row['call_sid'] for row in store.iter_appointments()] == ['CA_1']
+        version = store.version()
+        
+        # Unchanged directory: no re-parse, same version
+        list(store.iter_appointments())
+        assert store.version() == version
+        
+        # File written by another process
+        with open(os.path.join(tmp, 'CA_2.json'), 'w') as f:
+            json.dump(_log('CA_2', 2.0), f)
+        assert [row['call_sid'] for row in store.iter_appointments()] == ['CA_1', 'CA_2']
+        
+        # In-place rewrite with a new date is re-parsed
+        with open(os.path.join(tmp, 'CA_1.json'), 'w') as f:
+            json.dump(_log('CA_1', 1.0, date='11/20'), f)
+        os.utime(os.path.join(tmp, 'CA_1.json'), ns=(1, 1))
+        rows = list(store.iter_appointments())
+        print(f"Rows after external changes: {[(row['call_sid'], row['availability_date']) for row in rows]}")
+        assert rows[0]['availability_date'] == '11/20'
+        
+        os.remove(os.path.join(tmp, 'CA_2.json'))
+        assert [row['call_sid'] for row in store.iter_appointments()] == ['CA_1']
+        assert store.version() != version
+
+def test_appointment_filters():
+    print("\nTesting appointment filters and keyset pagination:")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = [SQLiteConversationStore(os.path.join(tmp, 'conversations.db')),
+                  JSONDirectoryConversationStore(os.path.join(tmp, 'json'))]
+        for store in stores:
+            version = store.version()
+            for i in range(6):
+                log_data = _log(f'CA_{i}', 1760000000.0 + i, date=f'10/{20 + i}')
+                log_data['summary']['eligible'] = i % 2 == 0
+                store.save(log_data)
+            assert store.version() != version
+            
+            ids = lambda rows: [row['call_sid'] for row in rows]
+            page = list(store.iter_appointments(limit=4))
+            assert ids(page) == ['CA_0', 'CA_1', 'CA_2', 'CA_3']
+            after = (page[1]['timestamp'], page[1]['call_sid'])
+            assert ids(store.iter_appointments(after=after, limit=2)) == ['CA_2', 'CA_3']
+            assert ids(store.iter_appointments(eligible=True, date_from='2025-10-21', date_to='2025-10-24')) == ['CA_2', 'CA_4']
+            print(f"{type(store).__name__}: filters OK")
+
+if __name__ == "__main__":
+    test_conversation_store()
+    test_json_directory_cache()
+    test_appointment_filters()
@@ -3,6 +3,9 @@
 Test the date extraction functionality
 """
 
+from datetime import date
+
+from spoken_dates import parse_spoken_date
 from voice_agent import ClinicalTrialVoiceAgent
 
 def test_date_extraction():
@@ -30,6 +33,39 @@ def test_date_extraction():
         print(f"\nTesting: '{test_input}'")
         extracted_date = agent._extract_date_from_speech(test_input)
         print(f"  Extracted: '{extracted_date}'")
+        assert isinstance(extracted_date, date)
+
+def test_relative_dates_and_rollover():
+    print("\nTesting relative dates against Sunday 2026-10-18:")
+    print("=" * 60)
+    
+    today = date(2026, 10, 18)
+    test_cases = [
+        ("October sixteenth", date(2027, 10, 16)),  # already passed -> next year
+        ("november twenty fifth", date(2026, 11, 25)),
+        ("the first of january", date(2027, 1, 1)),
+        ("10/16/2026", date(2026, 10, 16)),
+        ("2026-12-01", date(2026, 12, 1)),
+        ("tomorrow", date(2026, 10, 19)),
+        ("the day after tomorrow", date(2026, 10, 20)),
+        ("Tuesday", date(2026, 10, 20)),
+        ("this friday", date(2026, 10, 23)),
+        ("in two weeks", date(2026, 11, 1)),
+        ("the thirtieth", date(2026, 10, 30)),
+        ("february 29", date(2028, 2, 29)),
+        ("I'm not sure", None)
+    ]
+    
+    for test_input, expected in test_cases:
+        resolved = parse_spoken_date(test_input, today)
+        status = "[OK]" if resolved == expected else "[FAILED]"
+        print(f"  '{test_input}' -> {resolved} {status}")
+        assert resolved == expected
+    
+    # "next Tuesday" on a Monday skips the Tuesday of the same week
+    assert parse_spoken_date("Tuesday", date(2026, 10, 19)) == date(2026, 10, 20)
+    assert parse_spoken_date("next Tuesday", date(2026, 10, 19)) == date(2026, 10, 27)
 
 if __name__ == "__main__":
     test_date_extraction()
+    test_relative_dates_and_rollover()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test the streaming appointment serializers and the in-process exporter
+"""
+
+import os
+import csv
+import json
+import tempfile
+from conversation_store import SQLiteConversationStore
+from export_appointments import (
+    iter_json_array, iter_ndjson, stream_export, export_appointments_to_files,
+    export_appointments_incremental, STREAM_CHUNK_ROWS
+)
+
+def test_streaming_serializers():
+    print("Testing streaming serializers:")
+    print("=" * 50)
+    
+    for count in (0, 1, STREAM_CHUNK_ROWS, STREAM_CHUNK_ROWS * 2 + 3):
+        rows = [{'id': f'CA_{i}', 'age': i} for i in range(count)]
+        
+        chunks = list(iter_json_array(iter(rows)))
+        assert json.loads(''.join(chunks)) == rows
+        
+        lines = ''.join(iter_ndjson(iter(rows))).splitlines()
+        assert [json.loads(line) for line in lines] == rows
+        print(f"{count} rows -> {len(chunks)} JSON chunks, {len(lines)} NDJSON lines")
+
+def _save(store, i, eligible=True):
+    store.save({
+        'call_sid': f'CA_{i}', 'timestamp': 1760000000.0 + i,
+        'summary': {'eligible': eligible, 'patient_info': {
+            'age': 30 + i, 'contact_info': '555-555-0100', 'availability_date': f'10/{16 + i}',
+            'medical_conditions': None, 'medications': ['metformin'] if i else None
+        }}
+    })
+
+def test_export_formats():
+    print("\nTesting in-process export:")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteConversationStore(os.path.join(tmp, 'conversations.db'))
+        for i, eligible in enumerate([True, False, True]):
+            _save(store, i, eligible)
+        
+        exported = export_appointments_to_files(tmp, store=store)
+        print(f"Exported {exported} appointments to {sorted(f for f in os.listdir(tmp) if f.startswith('appointments'))}")
+        assert exported == 2
+        
+        with open(os.path.join(tmp, 'appointments.csv'), newline='') as f:
+            csv_rows = list(csv.DictReader(f))
+        assert [row['call_id'] for row in csv_rows] == ['CA_0', 'CA_2']
+        assert csv_rows[1]['medications'] == 'metformin'
+        
+        with open(os.path.join(tmp, 'appointments.json')) as f:
+            assert [row['call_id'] for row in json.load(f)] == ['CA_0', 'CA_2']
+        
+        with open(os.path.join(tmp, 'appointments.ics')) as f:
+            ics = f.read()
+        assert ics.count('BEGIN:VEVENT') == 2 and ics.endswith('END:VCALENDAR')
+        
+        # Streamed formats match the files
+        assert ''.join(stream_export('ics', store)) == ics
+        ndjson = ''.join(stream_export('ndjson', store)).splitlines()
+        assert [json.loads(line)['call_id'] for line in ndjson] == ['CA_0', 'CA_2']
+        assert not [f for f in os.listdir(tmp) if f.endswith('.tmp')]
+
+def test_incremental_export():
+    print("\nTesting watermark-based incremental export:")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteConversationStore(os.path.join(tmp, 'conversations.db'))
+        out = os.path.join(tmp, 'out')
+        os.makedirs(out)
+        
+        # First run has no watermark and writes everything
+        assert export_appointments_incremental(out, store=store) == 0
+        _save(store, 0)
+        _save(store, 1, eligible=False)
+        assert export_appointments_incremental(out, store=store) == 1
+        
+        # Later runs only append what is new
+        for i in range(2, 5):
+            _save(store, i)
+        appended = export_appointments_incremental(out, store=store)
+        print(f"Appended {appended} appointments")
+        assert appended == 3
+        assert export_appointments_incremental(out, store=store) == 0
+        
+        # The spliced files match a from-scratch export
+        full = os.path.join(tmp, 'full')
+        os.makedirs(full)
+        export_appointments_to_files(full, formats=['csv', 'json', 'ndjson', 'ics'], store=store)
+        for name in ('appointments.csv', 'appointments.json', 'appointments.ndjson', 'appointments.ics'):
+            with open(os.path.join(out, name)) as a, open(os.path.join(full, name)) as b:
+                assert a.read() == b.read(), name
+        with open(os.path.join(out, 'appointments.json')) as f:
+            assert len(json.load(f)) == 4
+
+if __name__ == "__main__":
+    test_streaming_serializers()
+    test_export_formats()
+    test_incremental_export()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Test the per-question answer extractors
+"""
+
+from extractors import build_extractor, EXTRACTOR_TYPES, PhonePartExtractor
+from trial_protocol import get_protocol
+from voice_agent import ClinicalTrialVoiceAgent, PatientInfo
+
+def test_extractor_registry():
+    print("Testing extractor registry:")
+    print("=" * 50)
+
+    protocol = get_protocol()
+    for question, extractor in zip(protocol.questions, protocol.extractors):
+        print(f"  {question['field']}: {type(extractor).__name__}")
+        assert isinstance(extractor, EXTRACTOR_TYPES[question['type']])
+
+    age = build_extractor({'field': 'age', 'type': 'number', 'min': 1, 'max': 119})
+    assert age.extract("I'm forty five") == 45
+    assert age.extract("two hundred") is None
+
+    conditions = build_extractor({'field': 'medical_conditions', 'type': 'list',
+                                  'terms': {'diabetes': ['diabetes', 'diabetic']}})
+    assert conditions.extract("I'm diabetic") == ['diabetes']
+    assert conditions.extract("nothing") is None
+
+    try:
+        build_extractor({'field': 'x', 'type': 'unknown'})
+        assert False, "unknown type accepted"
+    except ValueError as e:
+        print(f"  Unknown type rejected: {e}")
+
+def test_phone_parts_complete_contact_info():
+    patient_info = PatientInfo()
+    for field, digits, speech in [('phone_area_code', 3, 'five five five'),
+                                  ('phone_middle', 3, '123'),
+                                  ('phone_last_four', 4, 'four five six seven')]:
+        extractor = PhonePartExtractor(digits)
+        extractor.apply(patient_info, field, extractor.extract(speech))
+    print(f"\nContact info: {patient_info.contact_info}")
+    assert patient_info.contact_info == '555-123-4567'
+
+def test_agent_uses_registry():
+    agent = ClinicalTrialVoiceAgent()
+    agent.process_incoming_call()
+    for answer in ["yes", "40", "I have high blood pressure and diabetes"]:
+        agent.process_patient_response(answer)
+    print(f"\nConditions: {agent.patient_info.medical_conditions}")
+    assert agent.patient_info.medical_conditions == ['diabetes', 'hypertension']
+
+def test_volunteered_answers():
+    print("\nTesting volunteered answers:")
+    print("=" * 50)
+
+    age = build_extractor({'field': 'age', 'type': 'number', 'min': 1, 'max': 119,
+                           'volunteer': {'before': ["i'm", 'i am'], 'after': ['years old']}})
+    for speech, expected in [("I'm 52, not pregnant", 52),
+                             ("I have two kids and I am fifty two years old", 52),
+                             ("I am taking two pills a day", None),
+                             ("No, I'm fine", None),
+                             # Numbers that are not the caller's age
+                             ("yes I'm six months pregnant", None),
+                             ("I'm 2 weeks away from surgery", None),
+                             ("my son is 12 years old", None),
+                             ("she's twelve years old and I'm forty", 40)]:
+        print(f"  '{speech}' -> age {age.volunteer(speech)}")
+        assert age.volunteer(speech) == expected
+    assert not build_extractor({'field': 'age', 'type': 'number'}).volunteers
+
+    # A bare yes/no belongs to the question being asked, never to another field
+    pregnant = build_extractor({'field': 'pregnant', 'type': 'boolean', 'yes': ['yes'], 'no': ['no'],
+                                'volunteer': {'yes': ['pregnant'], 'no': ['not pregnant']}})
+    assert pregnant.volunteer("I'm 52, not pregnant") is False
+    assert pregnant.volunteer("I'm pregnant, due in March") is True
+    assert pregnant.volunteer("no") is None
+    for speech, expected in [("I'm 40 and I'm not currently pregnant", False),
+                             ("I've never been pregnant", False),
+                             # Someone else, or not now
+                             ("my wife is pregnant", None),
+                             ("I was pregnant last year", None),
+                             ("I'm not sure if I'm pregnant", None)]:
+        print(f"  '{speech}' -> pregnant {pregnant.volunteer(speech)}")
+        assert pregnant.volunteer(speech) is expected
+
+    # A caller who says they are not pregnant is not screened out by it
+    agent = ClinicalTrialVoiceAgent()
+    agent.process_incoming_call()
+    agent.process_patient_response("yes")
+    agent.process_patient_response("I'm 40 and I'm not currently pregnant")
+    assert agent.patient_info.age == 40 and agent.patient_info.pregnant is False
+    assert agent.screening_questions[agent.current_question_index]['field'] == 'medical_conditions'
+
+def test_volunteered_terms_belong_to_the_caller():
+    conditions = build_extractor({'field': 'medical_conditions', 'type': 'list', 'lexicon': 'conditions',
+                                  'volunteer': True})
+    medications = build_extractor({'field': 'medications', 'type': 'list', 'lexicon': 'medications',
+                                   'volunteer': True})
+    for extractor, speech, expected in [
+        (conditions, "my mother had cancer", None),
+        (medications, "I'm not on insulin", None),
+        (conditions, "I don't have diabetes", None),
+        (conditions, "I've never had cancer", None),
+        (medications, "my dad takes metformin", None),
+        # The caller's own mentions still count
+        (conditions, "my mother had cancer and I have diabetes", ['diabetes']),
+        (conditions, "my dad and I both have diabetes", ['diabetes']),
+        (medications, "I'm not diabetic but I take insulin", ['insulin']),
+        (conditions, "no, I have hypertension", ['hypertension'])
+    ]:
+        print(f"  '{speech}' -> {extractor.volunteer(speech)}")
+        assert extractor.volunteer(speech) == expected
+
+def test_list_answers_belong_to_the_caller():
+    print("\nTesting list answers about someone else or negated:")
+    print("=" * 50)
+
+    conditions = build_extractor({'field': 'medical_conditions', 'type': 'list', 'lexicon': 'conditions',
+                                  'phonetic': True})
+    medications = build_extractor({'field': 'medications', 'type': 'list', 'lexicon': 'medications',
+                                   'phonetic': True})
+    for extractor, speech, expected in [
+        (conditions, "I do not have diabetes", None),
+        (conditions, "no diabetes", None),
+        (medications, "my wife takes lisinopril", None),
+        (medications, "I used to take metformin but not anymore", None),
+        (medications, "I don't take listen april", None),
+        (medications, "I stopped lisinopril and I take metformin", ['metformin']),
+        (conditions, "I was diagnosed with diabetes", ['diabetes'])
+    ]:
+        print(f"  '{speech}' -> {extractor.score(speech)}")
+        assert extractor.extract(speech) == expected
+        assert extractor.score(speech) == (expected, 1.0 if expected else 0.0)
+
+    # Saying what you don't have is a "none", not an excluding condition
+    agent = ClinicalTrialVoiceAgent()
+    agent.process_incoming_call()
+    agent.process_patient_response("yes")
+    agent.process_patient_response("40")
+    agent.process_patient_response("I do not have diabetes")
+    assert agent.patient_info.medical_conditions is None
+    assert agent.conversation_stage == "screening"
+    assert agent.screening_questions[agent.current_question_index]['field'] == 'medications'
+
+def test_agent_skips_volunteered_questions():
+    agent = ClinicalTrialVoiceAgent()
+    agent.process_incoming_call()
+    agent.process_patient_response("yes")
+    agent.process_patient_response("I'm 52 and not pregnant")
+    answers = {'medical_conditions': "no", 'medications': "no", 'pregnant': "no", 'severe_conditions': "no",
+               'phone_area_code': "five five five", 'phone_middle': "one two three",
+               'phone_last_four': "four five six seven", 'availability_date': "November third"}
+    asked = []
+    while agent.conversation_stage != "conclusion":
+        field = agent.screening_questions[agent.current_question_index]['field']
+        asked.append(field)
+        agent.process_patient_response(answers[field])
+    summary = agent.get_conversation_summary()
+    print(f"\nAsked after volunteering: {asked}, turns saved: {summary['turns_saved']}")
+    assert agent.patient_info.age == 52 and agent.patient_info.pregnant is False
+    # Volunteered, not skipped by a decided outcome
+    assert 'pregnant' not in asked and summary['turns_saved'] == 0 and summary['eligible']
+    assert any(event.get('volunteered') is False for event in agent.conversation_log)
+
+def test_gather_options():
+    print("\nTesting per-question gather options:")
+    print("=" * 50)
+
+    pregnant = build_extractor({'field': 'pregnant', 'type': 'boolean', 'yes': ['pregnant'], 'no': ['not pregnant']})
+    medications = build_extractor({'field': 'medications', 'type': 'list', 'lexicon': 'medications'})
+    age = build_extractor({'field': 'age', 'type': 'number'})
+    tuned = build_extractor({'field': 'age', 'type': 'number', 'gather': {'timeout': 4, 'hints': 'forty'}})
+    for name, extractor in [('pregnant', pregnant), ('medications', medications), ('age', age), ('tuned', tuned)]:
+        print(f"  {name}: {extractor.gather['speech_model']}, hints {extractor.gather['hints'][:60]}")
+
+    # Yes/no answers are short: less waiting on silence than the 15 second default
+    assert pregnant.gather['timeout'] < 15 and 'pregnant' in pregnant.gather['hints']
+    assert 'lisinopril' in medications.gather['hints'].split(', ')
+    assert len(medications.gather['hints'].split(', ')) <= 500
+    # The protocol's own options win
+    assert tuned.gather['timeout'] == 4 and tuned.gather['hints'] == 'forty'
+    assert tuned.gather['speech_model'] == age.gather['speech_model']
+    # Only answers long enough to pre-extract post partial transcripts
+    date_question = build_extractor({'field': 'availability_date', 'type': 'date'})
+    assert medications.gather['partial_result_callback'] == date_question.gather['partial_result_callback']
+    assert 'partial_result_callback' not in pregnant.gather and 'partial_result_callback' not in age.gather
+
+if __name__ == "__main__":
+    test_extractor_registry()
+    test_phone_parts_complete_contact_info()
+    test_agent_uses_registry()
+    test_volunteered_answers()
+    test_volunteered_terms_belong_to_the_caller()
+    test_list_answers_belong_to_the_caller()
+    test_agent_skips_volunteered_questions()
+    test_gather_options()
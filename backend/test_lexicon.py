@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test the condition and medication lexicon matcher
+"""
+
+from lexicon import LexiconMatcher, get_lexicon
+from extractors import build_extractor
+from voice_agent import ClinicalTrialVoiceAgent
+
+def test_lexicon_matcher():
+    print("Testing lexicon matcher:")
+    print("=" * 50)
+
+    matcher = LexiconMatcher({
+        'diabetes': ['diabetic', 'type 2 diabetes'],
+        'type_1_diabetes': ['type 1 diabetes', 'type one diabetes'],
+        'statin': ['statin', 'statins']
+    })
+    test_cases = [
+        ("I have type 1 diabetes", ['type_1_diabetes']),
+        ("Type two... no, type 2 diabetes", ['diabetes']),
+        ("I'm diabetic and on statins.", ['diabetes', 'statin']),
+        ("Nystatin cream only", []),
+        ("", [])
+    ]
+    for speech, expected in test_cases:
+        result = matcher.find(speech)
+        status = "✅" if result == expected else "❌"
+        print(f"{status} '{speech}' -> {result}")
+        assert result == expected
+
+def test_shared_lexicons():
+    print("\nTesting shared lexicons:")
+    print("=" * 50)
+
+    medications = build_extractor({'field': 'medications', 'type': 'list', 'lexicon': 'medications'})
+    conditions = build_extractor({'field': 'medical_conditions', 'type': 'list', 'lexicon': 'conditions',
+                                  'terms': {'hypertension': ['pressure problems']}})
+    print(f"  {len(get_lexicon('medications'))} medications, {len(get_lexicon('conditions'))} conditions")
+
+    assert medications.extract("I take Glucophage and lisinopril, plus a baby aspirin") == ['metformin', 'lisinopril', 'aspirin']
+    assert medications.extract("just Tylenol sometimes") == ['acetaminophen']
+    assert medications.extract("no, nothing") is None
+    assert conditions.extract("high blood pressure and type two diabetes") == ['diabetes', 'hypertension']
+    assert conditions.extract("some pressure problems") == ['hypertension']
+
+    try:
+        get_lexicon('no_such_lexicon')
+        assert False, "unknown lexicon accepted"
+    except ValueError as e:
+        print(f"  Unknown lexicon rejected: {e}")
+
+def test_agent_records_medications():
+    agent = ClinicalTrialVoiceAgent()
+    agent.process_incoming_call()
+    for answer in ["yes", "40", "no", "I take Lipitor and metformin"]:
+        agent.process_patient_response(answer)
+    print(f"\nMedications: {agent.patient_info.medications}")
+    assert agent.patient_info.medications == ['metformin', 'atorvastatin']
+    assert agent.matched_trials() == []
+
+if __name__ == "__main__":
+    test_lexicon_matcher()
+    test_shared_lexicons()
+    test_agent_records_medications()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test pre-extraction of partial transcripts and reuse of the tentative turn
+"""
+
+import os
+import tempfile
+
+import app as app_module
+from app import app, partial_results
+from conversation_store import SQLiteConversationStore
+from partial_results import TentativeTurn
+from voice_agent import ClinicalTrialVoiceAgent, transcript_key
+
+# Keep the app's conversation database out of the working directory
+app_module.conversation_store = SQLiteConversationStore(os.path.join(tempfile.mkdtemp(), 'conversations.db'))
+
+def post(client, path, **form):
+    return client.post(path, data=form)
+
+def test_partial_result_reuse():
+    print("Testing partial result pre-extraction:")
+    print("=" * 50)
+
+    with app.test_client() as client:
+        twiml = post(client, '/handle_call', CallSid='CA_partial', From='+14085551234').get_data(as_text=True)
+        # Short answers (yes/no, numbers) end too soon to be worth pre-extracting
+        assert 'partialResultCallback' not in twiml
+        post(client, '/process_speech', CallSid='CA_partial', SpeechResult='Yes.', Confidence='0.9')
+        twiml = post(client, '/process_speech', CallSid='CA_partial', SpeechResult='Forty two.',
+                     Confidence='0.9').get_data(as_text=True)
+        assert 'medical conditions' in twiml and 'partialResultCallback="/partial_speech"' in twiml
+
+        # Partials stream in as the caller answers the conditions question
+        for stable, unstable in [('', 'not'), ('not', 'nothing really')]:
+            assert post(client, '/partial_speech', CallSid='CA_partial', StableSpeechResult=stable,
+                        UnstableSpeechResult=unstable).status_code == 204
+        tentative = partial_results.get('CA_partial')
+        print(f"Tentative for '{tentative.transcript}': {tentative.response}")
+        assert tentative.transcript == 'nothing really'
+
+        # The final transcript matches: the preview's turn is taken without parsing the answer again
+        before = partial_results.stats()['reused']
+        process = ClinicalTrialVoiceAgent.process_patient_response
+        ClinicalTrialVoiceAgent.process_patient_response = None
+        try:
+            twiml = post(client, '/process_speech', CallSid='CA_partial', SpeechResult='Nothing really.',
+                         Confidence='0.92').get_data(as_text=True)
+        finally:
+            ClinicalTrialVoiceAgent.process_patient_response = process
+        assert twiml == tentative.twiml and 'medications' in twiml
+        assert partial_results.stats()['reused'] == before + 1
+        assert partial_results.get('CA_partial') is None
+
+        # Barely heard: the answer is read back instead of the tentative next question
+        post(client, '/partial_speech', CallSid='CA_partial', UnstableSpeechResult='metformin')
+        tentative = partial_results.get('CA_partial')
+        before = partial_results.stats()['rebuilt']
+        twiml = post(client, '/process_speech', CallSid='CA_partial', SpeechResult='Metformin.',
+                     Confidence='0.5').get_data(as_text=True)
+        print(f"Rebuilt: {twiml[:120]}")
+        assert twiml != tentative.twiml and 'Did you say metformin?' in twiml
+        assert partial_results.stats()['rebuilt'] == before + 1
+
+        # Different final words: the turn is run on them instead
+        post(client, '/partial_speech', CallSid='CA_partial', UnstableSpeechResult='no')
+        twiml = post(client, '/process_speech', CallSid='CA_partial', SpeechResult='Yes.',
+                     Confidence='0.9').get_data(as_text=True)
+        summary = client.get('/conversations/CA_partial').get_json()
+        assert summary['patient_info']['medications'] == ['metformin'] and 'number' in twiml
+
+        # A stale partial from an earlier turn is never reused
+        partial_results.put('CA_partial', TentativeTurn('yes', 0, 'What is your age?', True, {}, '<Response/>', {}, 1.0))
+        twiml = post(client, '/process_speech', CallSid='CA_partial', SpeechResult='Yes.',
+                     Confidence='0.9').get_data(as_text=True)
+        assert twiml != '<Response/>' and 'availab' in twiml
+
+    # Partials for calls that are not active are ignored
+    with app.test_client() as client:
+        assert post(client, '/partial_speech', CallSid='CA_unknown', UnstableSpeechResult='yes').status_code == 204
+    assert partial_results.get('CA_unknown') is None
+
+def test_reused_turn_matches_rebuilt():
+    print("\nTesting a reused turn records what a rebuilt one would:")
+    summaries = []
+    with app.test_client() as client:
+        for call_sid, preview in [('CA_rebuilt', False), ('CA_reused', True)]:
+            post(client, '/handle_call', CallSid=call_sid, From='+14085551234')
+            post(client, '/process_speech', CallSid=call_sid, SpeechResult='Yes.', Confidence='0.9')
+            post(client, '/process_speech', CallSid=call_sid, SpeechResult='Forty two.', Confidence='0.9')
+            if preview:
+                post(client, '/partial_speech', CallSid=call_sid, StableSpeechResult='I have asthma',
+                     UnstableSpeechResult="I have asthma and I'm not pregnant")
+            before = partial_results.stats()['reused']
+            post(client, '/process_speech', CallSid=call_sid, SpeechResult="I have asthma and I'm not pregnant.",
+                 Confidence='0.75')
+            assert partial_results.stats()['reused'] == before + preview
+            summaries.append(client.get(f'/conversations/{call_sid}').get_json())
+    rebuilt, reused = summaries
+    print(f"  field confidence: {reused['field_confidence']}")
+    assert reused['field_confidence'] == {'age': 0.9, 'medical_conditions': 0.75, 'pregnant': 0.75}
+    assert reused == rebuilt
+
+def test_reuse_needs_a_clear_score():
+    # A yes/no the classifier was 0.8 sure of: accepted as heard, read back at a 0.8 score
+    tentative = TentativeTurn('yeah', 5, 'Next question', True, {}, '<Response/>', {}, 0.8)
+    assert tentative.matches(5, 'yeah', None) and tentative.matches(5, 'yeah', 0.95)
+    assert not tentative.matches(5, 'yeah', 0.8)
+    assert not tentative.matches(5, 'no', 0.95) and not tentative.matches(6, 'yeah', 0.95)
+    # A preview that read the answer back only stands when there is no score to change it
+    read_back = TentativeTurn('metformin', 5, 'Did you say metformin?', True, {}, '<Response/>', {}, 0.0)
+    assert read_back.matches(5, 'metformin', None) and not read_back.matches(5, 'metformin', 0.95)
+
+def test_transcript_key():
+    assert transcript_key("Forty  two.") == transcript_key("forty two") == "forty two"
+    assert transcript_key("I'm 52, not pregnant.") == "i'm 52, not pregnant"
+
+if __name__ == "__main__":
+    test_partial_result_reuse()
+    test_reused_turn_matches_rebuilt()
+    test_reuse_needs_a_clear_score()
+    test_transcript_key()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test one-shot phone capture: a whole spoken or keyed-in number, or the caller ID
+"""
+
+from voice_agent import ClinicalTrialVoiceAgent
+
+def agent_at_phone(caller_number=None):
+    """Agent on a fresh call, answering plainly until the phone number is asked for"""
+    answers = {'age': "40", 'medical_conditions': "no", 'medications': "no", 'pregnant': "no",
+               'severe_conditions': "no"}
+    agent = ClinicalTrialVoiceAgent()
+    agent.process_incoming_call(caller_number=caller_number)
+    response = agent.process_patient_response("yes")
+    while agent.screening_questions[agent.current_question_index]['field'] != 'phone_area_code':
+        response = agent.process_patient_response(answers[agent.screening_questions[agent.current_question_index]['field']])
+    return agent, response
+
+def test_whole_number():
+    print("Testing one-shot phone numbers:")
+    print("=" * 50)
+
+    # Spoken in one go: the middle and last-four questions are skipped
+    agent, _ = agent_at_phone()
+    assert agent.gather_options()['num_digits'] == 10
+    response = agent.process_patient_response("four oh eight, five five five, one two three four", asr_confidence=0.9)
+    print(f"Spoken -> {response}")
+    assert agent.patient_info.contact_info == "408-555-1234"
+    assert "next 3 digits" not in response and "last 4 digits" not in response
+
+    # Keyed in, as posted in Digits
+    agent, _ = agent_at_phone()
+    agent.process_patient_response("4155550000")
+    assert agent.patient_info.contact_info == "415-555-0000"
+
+    # Just the area code still works group by group
+    agent, _ = agent_at_phone()
+    response = agent.process_patient_response("four oh eight", asr_confidence=0.9)
+    assert agent.patient_info.phone_area_code == "408" and "next 3 digits" in response
+    assert agent.gather_options()['num_digits'] == 3
+
+def test_caller_id():
+    print("\nTesting caller ID confirmation:")
+    print("=" * 50)
+
+    agent, response = agent_at_phone(caller_number="+14085551234")
+    print(f"Offer -> {response}")
+    assert response == "Is the number you're calling from, 4 0 8, 5 5 5, 1 2 3 4, the best one to reach you?"
+    # Yes or no is spoken, not keyed
+    assert 'num_digits' not in agent.gather_options()
+    response = agent.process_patient_response("yes")
+    print(f"Yes -> {response}")
+    assert agent.patient_info.contact_info == "408-555-1234"
+    assert "digits" not in response
+    # The number itself came from caller ID, not from speech
+    assert agent.field_confidence()['phone_area_code'] == 1.0
+    # Filled from caller ID, not skipped because the outcome was decided
+    agent.process_patient_response("tomorrow")
+    assert agent.conversation_stage == "conclusion" and agent.turns_saved() == 0
+
+    # Declined: the question itself is asked, and the offer is not repeated
+    agent, _ = agent_at_phone(caller_number="+14085551234")
+    response = agent.process_patient_response("no, use my cell")
+    print(f"No -> {response}")
+    assert "area code" in response and agent.patient_info.phone_area_code is None
+    agent.process_patient_response("four one five five five five zero zero zero zero", asr_confidence=0.9)
+    assert agent.patient_info.contact_info == "415-555-0000"
+
+    # Withheld or not a full number: asked as usual
+    for caller_number in (None, "anonymous", "+4420"):
+        _, response = agent_at_phone(caller_number=caller_number)
+        assert "area code" in response
+
+    restored = ClinicalTrialVoiceAgent.from_snapshot(agent_at_phone(caller_number="4085551234")[0].to_snapshot())
+    assert restored.caller_number() == "4085551234"
+
+def test_keypad_gather():
+    try:
+        from twilio_client import TwilioClient
+    except ImportError:
+        print("\nTwilio not installed, skipping TwiML check")
+        return
+    client = TwilioClient()
+    agent, _ = agent_at_phone()
+    twiml = client.create_speech_response("What is your number?", gather=agent.gather_options())
+    print(f"\n{twiml}")
+    assert 'input="dtmf speech"' in twiml and 'numDigits="10"' in twiml
+    assert 'input="speech"' in client.create_speech_response("How old are you?")
+
+if __name__ == "__main__":
+    test_whole_number()
+    test_caller_id()
+    test_keypad_gather()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test sound-alike resolution of garbled drug and condition names
+"""
+
+import time
+
+from phonetic import PhoneticIndex, phonetic_key
+from lexicon import get_lexicon
+from extractors import build_extractor, PHONETIC_CERTAINTY
+from voice_agent import ClinicalTrialVoiceAgent
+from config import ASR_ACCEPT_CONFIDENCE
+
+def test_phonetic_keys():
+    print("Testing phonetic keys:")
+    print("=" * 50)
+
+    for spoken, term in [("met forming", "metformin"), ("hi blood presser", "high blood pressure"),
+                         ("a tour of a statin", "atorvastatin"), ("hyper tenshun", "hypertension")]:
+        print(f"  {spoken!r}: {phonetic_key(spoken)} / {term!r}: {phonetic_key(term)}")
+        assert phonetic_key(spoken) == phonetic_key(term)
+
+def test_phonetic_lookup():
+    print("\nTesting phonetic lookup:")
+    print("=" * 50)
+
+    index = PhoneticIndex(get_lexicon('medications'))
+    test_cases = [
+        ("listen april", "lisinopril"),
+        ("met forming", "metformin"),
+        ("gabba penton", "gabapentin"),
+        ("zanax", "alprazolam"),
+        ("synthroyd", "levothyroxine"),
+        ("vitamins", None),
+        ("pills", None)
+    ]
+    for spoken, expected in test_cases:
+        result = index.lookup(spoken)
+        status = "✅" if result == expected else "❌"
+        print(f"{status} '{spoken}' -> {result}")
+        assert result == expected
+
+    words = "i take listen april every morning".split()
+    assert index.find(words) == ['lisinopril']
+    assert index.find(words, skip=[2]) == []
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        index.lookup("listen april")
+    per_lookup = (time.perf_counter() - start) / 1000
+    print(f"  {per_lookup * 1e6:.0f}µs per lookup")
+    assert per_lookup < 0.001
+
+def test_list_extraction_fallback():
+    medications = build_extractor({'field': 'medications', 'type': 'list', 'lexicon': 'medications', 'phonetic': True})
+    exact_only = build_extractor({'field': 'medications', 'type': 'list', 'lexicon': 'medications'})
+
+    speech = "Lipitor and listen april"
+    print(f"\n'{speech}' -> {medications.extract(speech)} (exact only: {exact_only.extract(speech)})")
+    assert medications.extract(speech) == ['lisinopril', 'atorvastatin']
+    assert exact_only.extract(speech) == ['atorvastatin']
+    assert medications.extract("nothing really, just vitamins") is None
+    # Sound-alikes never fill a field from another question's answer
+    assert medications.volunteer("I take met forming") is None
+
+def test_sound_alikes_read_back():
+    print("\nTesting sound-alike terms are read back before they are stored:")
+    print("=" * 50)
+
+    medications = build_extractor({'field': 'medications', 'type': 'list', 'lexicon': 'medications', 'phonetic': True})
+    assert medications.score("Lipitor") == (['atorvastatin'], 1.0)
+    assert medications.score("Lipitor and listen april") == (['lisinopril', 'atorvastatin'], PHONETIC_CERTAINTY)
+    assert PHONETIC_CERTAINTY < ASR_ACCEPT_CONFIDENCE
+
+    # An everyday phrase that happens to sound like a drug name
+    agent = ClinicalTrialVoiceAgent()
+    agent.process_incoming_call()
+    agent.process_patient_response("yes")
+    while agent.screening_questions[agent.current_question_index]['field'] != 'medications':
+        agent.process_patient_response("40" if agent.current_question_index == 0 else "no")
+    response = agent.process_patient_response("I have a cold right now")
+    print(f"  'I have a cold right now' -> {response!r}")
+    assert response == "Did you say loratadine?"
+    assert agent.patient_info.medications is None
+
+    response = agent.process_patient_response("no")
+    assert agent.patient_info.medications is None
+    assert agent.screening_questions[agent.current_question_index]['field'] == 'medications'
+
+if __name__ == "__main__":
+    test_phonetic_keys()
+    test_phonetic_lookup()
+    test_list_extraction_fallback()
+    test_sound_alikes_read_back()
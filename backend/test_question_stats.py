@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test per-question exclusion statistics and adaptive question ordering
+"""
+
+import os
+import tempfile
+
+from conversation_store import JSONDirectoryConversationStore
+from question_stats import compute_exclusion_rates, expected_turns, save_stats, get_exclusion_rates
+from trial_matcher import TrialMatcher, get_matcher
+from voice_agent import ClinicalTrialVoiceAgent
+
+def _log(call_sid, **patient_info):
+    return {'call_sid': call_sid, 'timestamp': 1760000000.0, 'from_number': '+15555550100',
+            'summary': {'eligible': False, 'patient_info': patient_info}}
+
+def test_exclusion_rates_and_ordering():
+    print("Testing exclusion statistics:")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JSONDirectoryConversationStore(os.path.join(tmp, 'conversations'))
+        for i in range(6):
+            store.save(_log(f"CA_p{i}", age=30, pregnant=True))
+        for i in range(2):
+            store.save(_log(f"CA_a{i}", age=80, pregnant=False))
+        logs = list(store.iter_logs())
+
+        protocols = list(get_matcher('default').protocols.values())
+        fixed = TrialMatcher(protocols)
+        stats = compute_exclusion_rates(logs, fixed)
+        for field, values in stats['fields'].items():
+            print(f"  {field}: {values}")
+        assert stats['calls'] == 8
+        assert stats['fields']['pregnant'] == {'answered': 8, 'excluded': 6, 'rate': 0.75}
+        assert stats['fields']['age']['rate'] == 0.25
+
+        path = os.path.join(tmp, 'question_stats.json')
+        save_stats(stats, path)
+        rates = get_exclusion_rates(path)
+        assert rates['pregnant'] == 0.75
+
+        adaptive = TrialMatcher(protocols, exclusion_rates=rates)
+        order = [adaptive.questions[index]['field'] for index in adaptive.question_order]
+        print(f"Adaptive order: {order}")
+        assert order[:2] == ['pregnant', 'age']
+        assert order[-4:] == ['phone_area_code', 'phone_middle', 'phone_last_four', 'availability_date']
+
+        fixed_turns = expected_turns(logs, fixed)
+        adaptive_turns = expected_turns(logs, adaptive)
+        print(f"Expected screening turns: {fixed_turns:.2f} fixed, {adaptive_turns:.2f} adaptive")
+        assert adaptive_turns < fixed_turns
+
+        # The agent follows the adaptive order
+        agent = ClinicalTrialVoiceAgent(matcher=adaptive)
+        agent.process_incoming_call()
+        first_question = agent.process_patient_response("yes")
+        assert first_question == "Are you currently pregnant or nursing?"
+
+def _screened(matcher, answers):
+    """Log of a call through the agent, answering each question by field"""
+    agent = ClinicalTrialVoiceAgent(matcher=matcher)
+    agent.process_incoming_call()
+    agent.process_patient_response("yes")
+    while agent.conversation_stage != "conclusion":
+        agent.process_patient_response(answers[agent.screening_questions[agent.current_question_index]['field']])
+    return {'summary': agent.get_conversation_summary()}
+
+def test_list_answered_none():
+    print("\nTesting list questions answered with no terms:")
+    answers = {'age': "40", 'medical_conditions': "no", 'medications': "nothing", 'pregnant': "no",
+               'severe_conditions': "no", 'phone_area_code': "4 0 8 5 5 5 1 2 3 4", 'availability_date': "tomorrow"}
+    fixed = TrialMatcher(list(get_matcher('default').protocols.values()))
+    logs = [_screened(fixed, answers) for _ in range(9)]
+    logs.append(_screened(fixed, {**answers, 'medical_conditions': "I have diabetes"}))
+
+    stats = compute_exclusion_rates(logs, fixed)
+    for field in ('medical_conditions', 'medications'):
+        print(f"  {field}: {stats['fields'][field]}")
+    assert stats['fields']['medical_conditions'] == {'answered': 10, 'excluded': 1, 'rate': 0.1}
+    assert stats['fields']['medications'] == {'answered': 9, 'excluded': 0, 'rate': 0.0}
+
+def test_matcher_shared_without_stats():
+    with tempfile.TemporaryDirectory() as tmp:
+        missing = os.path.join(tmp, 'question_stats.json')
+        assert get_exclusion_rates(missing) is get_exclusion_rates(missing)
+
+    # No stats file: the compiled matcher is built once and shared
+    first = get_matcher()
+    assert get_matcher() is first
+    assert ClinicalTrialVoiceAgent().matcher is first
+
+if __name__ == "__main__":
+    test_exclusion_rates_and_ordering()
+    test_list_answered_none()
+    test_matcher_shared_without_stats()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test TTL eviction of abandoned calls
+"""
+
+from voice_agent import ClinicalTrialVoiceAgent
+from session_store import InMemorySessionStore
+from session_reaper import SessionReaper
+from trial_protocol import ProtocolVersionError
+
+class UnrestorableStore(InMemorySessionStore):
+    """Sessions whose protocol version is gone, as SQLiteSessionStore reports them"""
+
+    def get(self, call_sid, default=None):
+        if call_sid in self._sessions:
+            raise ProtocolVersionError("Protocol default changed")
+        return default
+
+def test_session_reaper():
+    print("Testing session reaper:")
+    print("=" * 50)
+    
+    store = InMemorySessionStore()
+    flushed = []
+    reaper = SessionReaper(store, idle_ttl=60, max_age=600,
+                           on_evict=lambda sid, session, reason: flushed.append((sid, reason)))
+    
+    for call_sid in ['CA_idle', 'CA_active', 'CA_hangup']:
+        session = {'voice_agent': ClinicalTrialVoiceAgent(), 'from_number': None, 'start_time': 1000}
+        reaper.touch(call_sid, session, now=1000)
+        store[call_sid] = session
+    
+    # Hangup status callback
+    assert reaper.evict('CA_hangup', 'completed')
+    assert not reaper.evict('CA_hangup', 'completed')
+    
+    # CA_active keeps talking, CA_idle goes quiet
+    reaper.touch('CA_active', store['CA_active'], now=1050)
+    evicted = reaper.reap(now=1070)
+    print(f"Evicted at t=1070: {evicted}, flushed: {flushed}")
+    assert evicted == 1
+    assert 'CA_idle' not in store and 'CA_active' in store
+    
+    # Turn served by another worker: only the session's last_activity moved
+    store['CA_active']['last_activity'] = 1100
+    assert reaper.reap(now=1120) == 0
+    assert reaper.reap(now=1200) == 1
+    
+    stats = reaper.stats()
+    print(f"Stats: {stats}")
+    assert stats['evictions'] == {'idle_timeout': 2, 'completed': 1}
+    assert stats['tracked'] == 0 and len(store) == 0
+
+def test_abandoned_call_verdict():
+    print("\nTesting the verdict recorded for abandoned calls:")
+    answers = ["yes", "forty", "no", "no", "no", "no"]
+    for answered, expected in [(0, None), (2, None), (len(answers), True)]:
+        agent = ClinicalTrialVoiceAgent()
+        agent.process_incoming_call()
+        for speech in answers[:answered]:
+            agent.process_patient_response(speech)
+        eligible = agent.get_conversation_summary()['eligible']
+        print(f"  Hung up after {answered} answer(s): eligible {eligible}")
+        assert eligible is expected
+
+    # Ruled out: decided as soon as the answer is in
+    agent = ClinicalTrialVoiceAgent()
+    agent.process_incoming_call()
+    agent.process_patient_response("yes")
+    agent.process_patient_response("eighty")
+    assert agent.get_conversation_summary()['eligible'] is False
+
+def test_unrestorable_sessions_dropped():
+    store = UnrestorableStore()
+    flushed = []
+    reaper = SessionReaper(store, idle_ttl=60, on_evict=lambda sid, session, reason: flushed.append(sid))
+    for call_sid in ['CA_stale', 'CA_hangup']:
+        session = {'voice_agent': None, 'start_time': 1000}
+        reaper.touch(call_sid, session, now=1000)
+        store[call_sid] = session
+
+    assert not reaper.evict('CA_hangup', 'completed')
+    assert reaper.reap(now=1100) == 0
+    assert len(store) == 0 and not flushed and reaper.stats()['tracked'] == 0
+
+if __name__ == "__main__":
+    test_session_reaper()
+    test_abandoned_call_verdict()
+    test_unrestorable_sessions_dropped()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test the shared session store used for active conversations
+"""
+
+import os
+import tempfile
+from voice_agent import ClinicalTrialVoiceAgent
+from session_store import InMemorySessionStore, SQLiteSessionStore
+
+def _run_store(store):
+    agent = ClinicalTrialVoiceAgent()
+    agent.process_incoming_call()
+    store['CA_test'] = {'voice_agent': agent, 'from_number': '+15555550100', 'start_time': 0}
+    
+    # A turn taken by "another worker": load, mutate, save back
+    session = store['CA_test']
+    session['voice_agent'].process_patient_response("yes")
+    session['voice_agent'].process_patient_response("I am 42")
+    store['CA_test'] = session
+    
+    restored = store.get('CA_test')['voice_agent']
+    print(f"   Sessions: {len(store)}, restored index: {restored.current_question_index}, age: {restored.patient_info.age}")
+    assert 'CA_test' in store
+    assert restored.patient_info.age == 42
+    assert store.delete('CA_test')
+    assert 'CA_test' not in store
+    assert store.get('CA_test') is None
+
+def test_session_store():
+    print("Testing session store backends:")
+    print("=" * 50)
+    
+    print("\n1. In-memory store")
+    _run_store(InMemorySessionStore())
+    
+    print("\n2. SQLite store (two handles on the same file, like two workers)")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'sessions.db')
+        worker_a = SQLiteSessionStore(db_path)
+        worker_b = SQLiteSessionStore(db_path)
+        
+        agent = ClinicalTrialVoiceAgent()
+        agent.process_incoming_call()
+        worker_a['CA_shared'] = {'voice_agent': agent, 'from_number': None, 'start_time': 0}
+        print(f"   Worker B sees call: {'CA_shared' in worker_b}")
+        assert 'CA_shared' in worker_b
+        
+        _run_store(worker_b)
+
+if __name__ == "__main__":
+    test_session_store()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test the spoken number grammar used for phone digits and ages
+"""
+
+from spoken_numbers import extract_digits, parse_number
+from voice_agent import ClinicalTrialVoiceAgent
+
+def test_extract_digits():
+    print("Testing digit extraction:")
+    print("=" * 50)
+
+    test_cases = [
+        ("four oh eight", "408"),
+        ("408", "408"),
+        ("555 123 4567", "5551234567"),
+        ("double five nine", "559"),
+        ("triple oh", "000"),
+        ("forty five sixty seven", "4567"),
+        ("four hundred eight", "408"),
+        ("eight hundred", "800"),
+        ("four hundred and twelve", "412"),
+        ("um four five six seven", "4567"),
+        ("it is six six nine", "669"),
+        ("sixteen", "16"),
+        ("no idea", "")
+    ]
+
+    for test_input, expected in test_cases:
+        digits = ''.join(extract_digits(test_input))
+        status = "[OK]" if digits == expected else "[FAILED]"
+        print(f"  '{test_input}' -> '{digits}' {status}")
+        assert digits == expected
+
+def test_parse_number():
+    print("\nTesting cardinal parsing:")
+    print("=" * 50)
+
+    test_cases = [
+        ("forty five", 45),
+        ("I am 52 years old", 52),
+        ("one hundred and two", 102),
+        ("twenty-one", 21),
+        ("I'm going to be thirty", 30),
+        ("sixty five and healthy", 65),
+        ("no", None)
+    ]
+
+    for test_input, expected in test_cases:
+        value = parse_number(test_input)
+        status = "[OK]" if value == expected else "[FAILED]"
+        print(f"  '{test_input}' -> {value} {status}")
+        assert value == expected
+
+def test_spoken_age():
+    agent = ClinicalTrialVoiceAgent()
+    agent.process_incoming_call()
+    agent.process_patient_response("yes")
+    agent.process_patient_response("I'm forty five")
+    print(f"\nSpoken age parsed as: {agent.patient_info.age}")
+    assert agent.patient_info.age == 45
+
+if __name__ == "__main__":
+    test_extract_digits()
+    test_parse_number()
+    test_spoken_age()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test screening one caller against several trials at once
+"""
+
+import os
+import json
+
+from trial_matcher import TrialMatcher, get_matcher
+from trial_protocol import compile_protocol
+from voice_agent import ClinicalTrialVoiceAgent, PatientInfo
+
+PANEL = ['default', 'blood_pressure']
+
+def run_call(answers, **agent_args):
+    agent = ClinicalTrialVoiceAgent(**(agent_args or {'matcher': get_matcher(PANEL)}))
+    agent.process_incoming_call()
+    agent.process_patient_response("yes")
+    asked = []
+    for answer in answers:
+        if agent.conversation_stage == "conclusion":
+            break
+        asked.append(agent.screening_questions[agent.current_question_index]['field'])
+        agent.process_patient_response(answer)
+    return agent, asked
+
+def test_inverted_index_pruning():
+    print("Testing candidate pruning:")
+    print("=" * 50)
+
+    matcher = get_matcher(PANEL)
+    assert matcher is get_matcher('default+blood_pressure')
+    assert get_matcher(['default']).panel_id == 'default'
+
+    candidates = matcher.all_trials
+    candidates = matcher.prune(candidates, 'age', 30)
+    print(f"After age 30: {sorted(candidates)}")
+    assert candidates == {'default'}
+    candidates = matcher.prune(candidates, 'pregnant', True)
+    assert candidates == frozenset()
+
+    info = PatientInfo(age=55, medical_conditions=['hypertension'], pregnant=False, severe_conditions=False)
+    print(f"Matched for 55 with hypertension: {matcher.matched_trials(info)}")
+    assert matcher.matched_trials(info) == ['blood_pressure']
+
+def test_panel_conversation_skips_unneeded_questions():
+    print("\nTesting panel conversation:")
+    print("=" * 50)
+
+    # 55 with hypertension: the default trial drops out on the conditions answer,
+    # so its medications question is never asked
+    agent, asked = run_call([
+        "fifty five", "I have high blood pressure", "no", "no",
+        "five five five", "one two three", "four five six seven", "November third"
+    ])
+    print(f"Asked: {asked}")
+    assert 'medications' not in asked
+    assert agent.conversation_stage == "conclusion"
+    assert agent.matched_trials() == ['blood_pressure']
+    assert "Blood Pressure Study" in agent.conversation_log[-1]["conclusion"]
+    assert agent.patient_info.contact_info == "555-123-4567"
+
+    # 85 rules out both trials: straight to contact capture
+    agent, asked = run_call(["eighty five", "five five five", "one two three", "four five six seven", "November third"])
+    print(f"Asked: {asked}")
+    assert asked == ['age', 'phone_area_code', 'phone_middle', 'phone_last_four', 'availability_date']
+    assert agent.get_conversation_summary()["matched_trials"] == []
+
+def test_panel_snapshot_roundtrip():
+    agent, _ = run_call(["eighty"])
+    restored = ClinicalTrialVoiceAgent.from_snapshot(agent.to_snapshot())
+    assert restored.matcher is agent.matcher
+    assert restored.candidates == agent.candidates == {'blood_pressure'}
+    assert restored.current_question_index == agent.current_question_index
+    print(f"\nRestored panel {restored.matcher.panel_id} with candidates {sorted(restored.candidates)}")
+
+def test_early_termination():
+    print("\nTesting early termination:")
+    print("=" * 50)
+
+    contact = ["five five five", "one two three", "four five six seven", "November third"]
+
+    # Age 80 already rules the caller out: skip to contact capture for future studies
+    agent, asked = run_call(["eighty"] + contact, protocol=get_matcher('default').primary)
+    summary = agent.get_conversation_summary()
+    print(f"Asked: {asked}, turns saved: {summary['turns_saved']}")
+    assert asked == ['age', 'phone_area_code', 'phone_middle', 'phone_last_four', 'availability_date']
+    assert summary['turns_saved'] == 4 and summary['eligible'] is False
+    assert summary['patient_info']['contact_info'] == "555-123-4567"
+
+    # A protocol set to conclude on exclusion ends the call after the age answer
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'protocols', 'default.json')) as f:
+        spec = json.load(f)
+    spec['on_exclusion'] = 'conclude'
+    agent, asked = run_call(["eighty", "five five five"], protocol=compile_protocol(spec))
+    print(f"Asked: {asked}, turns saved: {agent.turns_saved()}")
+    assert asked == ['age'] and agent.conversation_stage == "conclusion"
+    assert agent.turns_saved() == 8
+
+    # An eligible caller still answers every question
+    agent, asked = run_call(["forty", "no", "no", "no", "no"] + contact, protocol=get_matcher('default').primary)
+    assert agent.get_conversation_summary()['eligible'] and agent.turns_saved() == 0
+
+def test_protocol_extractors_reused():
+    default = get_matcher('default')
+    assert all(a is b for a, b in zip(default.extractors, default.primary.extractors))
+
+    # Both trials ask about conditions the same way: one compiled extractor serves the panel
+    panel = get_matcher(PANEL)
+    field = [question['field'] for question in panel.questions].index('medical_conditions')
+    assert panel.extractors[field] is default.primary.extractors[field]
+
+    # A definition that merging changed gets its own
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'protocols', 'blood_pressure.json')) as f:
+        spec = json.load(f)
+    for question in spec['questions']:
+        if question['field'] == 'medical_conditions':
+            question['terms'] = {'gout': ['gout']}
+    extended = TrialMatcher([default.primary, compile_protocol(spec)])
+    assert extended.extractors[field] is not default.primary.extractors[field]
+    assert extended.extractors[field].extract("I have gout and diabetes") == ['diabetes', 'gout']
+
+if __name__ == "__main__":
+    test_inverted_index_pruning()
+    test_panel_conversation_skips_unneeded_questions()
+    test_panel_snapshot_roundtrip()
+    test_early_termination()
+    test_protocol_extractors_reused()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test declarative trial protocols: compilation, sharing and hot reload
+"""
+
+import os
+import json
+import tempfile
+
+import trial_protocol
+from trial_protocol import ProtocolRegistry, ProtocolVersionError, RETAINED_VERSIONS, get_protocol
+from trial_matcher import TrialMatcher, get_matcher
+from voice_agent import ClinicalTrialVoiceAgent, PatientInfo
+
+def test_protocol_shared_across_agents():
+    print("Testing shared protocol:")
+    print("=" * 50)
+
+    first = ClinicalTrialVoiceAgent()
+    second = ClinicalTrialVoiceAgent()
+    print(f"Protocol: {first.protocol.protocol_id} ({len(first.screening_questions)} questions)")
+    assert first.protocol is second.protocol
+    assert first.screening_questions is second.screening_questions
+    assert first.process_incoming_call().startswith("Hello! Thank you for calling about our Clinical Research Study.")
+
+def test_eligibility_criteria():
+    matcher = TrialMatcher([get_protocol()])
+    eligible = lambda **answers: bool(matcher.matched_trials(PatientInfo(**answers)))
+    assert eligible(age=40)
+    assert not eligible()                                                      # age is required
+    assert not eligible(age=80)                                                # outside 18-75
+    assert not eligible(age=40, pregnant=True)
+    assert not eligible(age=40, medical_conditions=['diabetes'])
+    assert eligible(age=40, pregnant=False, severe_conditions=False)
+    print("Eligibility criteria match the screening rules")
+
+def test_hot_reload():
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'protocols', 'default.json')) as f:
+        spec = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'default.json')
+        with open(path, 'w') as f:
+            json.dump(spec, f)
+
+        registry = ProtocolRegistry(tmp, check_interval=0)
+        original = registry.get('default')
+        assert registry.get('default') is original
+
+        spec['name'] = 'Renamed Study'
+        with open(path, 'w') as f:
+            json.dump(spec, f)
+        os.utime(path, (original.mtime + 10, original.mtime + 10))
+
+        reloaded = registry.get('default')
+        print(f"Reloaded protocol name: {reloaded.name}")
+        assert reloaded is not original and reloaded.name == 'Renamed Study'
+        assert 'Renamed Study' in reloaded.greeting
+
+        # A broken edit keeps the last good version
+        with open(path, 'w') as f:
+            f.write('{not json')
+        os.utime(path, (original.mtime + 20, original.mtime + 20))
+        assert registry.get('default') is reloaded
+
+        try:
+            registry.get('missing')
+            assert False, "missing protocol accepted"
+        except ValueError as e:
+            print(f"Missing protocol rejected: {e}")
+
+def test_snapshot_keeps_protocol_version():
+    print("\nTesting calls in progress across a protocol edit:")
+    print("=" * 50)
+
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'protocols', 'default.json')) as f:
+        spec = json.load(f)
+
+    configured = trial_protocol._registry
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'default.json')
+        with open(path, 'w') as f:
+            json.dump(spec, f)
+        registry = trial_protocol._registry = ProtocolRegistry(tmp, check_interval=0)
+        try:
+            agent = ClinicalTrialVoiceAgent(matcher=get_matcher('default'))
+            agent.process_incoming_call()
+            agent.process_patient_response("yes")
+            agent.process_patient_response("40")
+            snapshot = agent.to_snapshot()
+            mtime = agent.protocol.mtime
+
+            # The first question is removed mid-call
+            spec['questions'] = spec['questions'][1:]
+            with open(path, 'w') as f:
+                json.dump(spec, f)
+            os.utime(path, (mtime + 10, mtime + 10))
+            assert len(get_matcher('default').questions) == len(agent.screening_questions) - 1
+
+            restored = ClinicalTrialVoiceAgent.from_snapshot(snapshot)
+            print(f"Restored at question {restored.current_question_index}: "
+                  f"{restored.screening_questions[restored.current_question_index]['field']}")
+            assert restored.screening_questions is agent.screening_questions
+            assert restored.conversation_log == agent.conversation_log
+
+            # Once the old version is dropped the call cannot be restored
+            for step in range(RETAINED_VERSIONS):
+                os.utime(path, (mtime + 20 + step, mtime + 20 + step))
+                registry.get('default')
+            try:
+                ClinicalTrialVoiceAgent.from_snapshot(snapshot)
+                assert False, "restored against a different protocol version"
+            except ProtocolVersionError as e:
+                print(f"Restore refused: {e}")
+        finally:
+            trial_protocol._registry = configured
+
+if __name__ == "__main__":
+    test_protocol_shared_across_agents()
+    test_eligibility_criteria()
+    test_hot_reload()
+    test_snapshot_keeps_protocol_version()
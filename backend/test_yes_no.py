@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test the yes/no classifier and the single re-prompt for unreadable answers
+"""
+
+from yes_no import YesNoClassifier
+from voice_agent import ClinicalTrialVoiceAgent
+
+def test_yes_no_classifier():
+    print("Testing yes/no classifier:")
+    print("=" * 50)
+
+    pregnant = YesNoClassifier(yes=["pregnant", "nursing"], no=["not pregnant"])
+    severe = YesNoClassifier(yes=["severe", "serious"], no=["mild"])
+    test_cases = [
+        (pregnant, "yes", True),
+        (pregnant, "Nope, not pregnant", False),
+        (pregnant, "I'm not currently pregnant", False),
+        (pregnant, "Not that I know of", False),
+        (pregnant, "I don't know", None),
+        (pregnant, "I'm not sure", None),
+        (pregnant, "Yes, I'm nursing", True),
+        (pregnant, "absolutely not", False),
+        (pregnant, "um", None),
+        (severe, "No, nothing serious", False),
+        (severe, "it's mild", False),
+        (severe, "it's not mild", True),
+    ]
+    for classifier, speech, expected in test_cases:
+        answer, confidence = classifier.classify(speech)
+        status = "✅" if answer == expected else "❌"
+        print(f"{status} '{speech}' -> {answer} ({confidence:.2f})")
+        assert answer == expected
+
+    # Hedged answers are read, but with less confidence than a plain one
+    assert pregnant.classify("not that I know of")[1] < pregnant.classify("no")[1]
+    assert pregnant.classify("um")[1] == 0.0
+    assert pregnant.classify("I don't know")[1] > 0.5
+
+def start_screening(answers):
+    agent = ClinicalTrialVoiceAgent()
+    agent.process_incoming_call()
+    agent.process_patient_response("yes")
+    responses = [agent.process_patient_response(answer) for answer in answers]
+    return agent, responses
+
+def test_single_reprompt():
+    print("\nTesting re-prompts:")
+    print("=" * 50)
+
+    # Age, conditions, medications, then the pregnancy question twice at most
+    agent, responses = start_screening(["40", "no", "no", "um", "hmm"])
+    print(f"Responses: {responses[-2:]}")
+    assert responses[-2].startswith("Sorry, I didn't catch that.") and "pregnant" in responses[-2]
+    assert "severe" in responses[-1]
+    assert agent.patient_info.pregnant is None
+    assert agent.reprompt_counts() == {"asked": 1, "avoided": 0}
+
+    # Keyword matching could not read these; the classifier can
+    agent, responses = start_screening(["40", "no", "no", "nah", "negative"])
+    summary = agent.get_conversation_summary()
+    print(f"Re-prompts: {summary['reprompts']}")
+    assert agent.patient_info.pregnant is False and agent.patient_info.severe_conditions is False
+    assert summary["reprompts"] == {"asked": 0, "avoided": 2}
+    assert not any(response.startswith("Sorry") for response in responses)
+
+    restored = ClinicalTrialVoiceAgent.from_snapshot(agent.to_snapshot())
+    assert restored.reprompt_counts() == summary["reprompts"]
+
+if __name__ == "__main__":
+    test_yes_no_classifier()
+    test_single_reprompt()
@@ -0,0 +1,241 @@
+"""
+Trial Matcher
+Screens one caller against several trial protocols at once. An inverted
+index from criterion to trials lets every answer prune the candidate set
+immediately, and only questions some remaining trial still depends on are
+asked before contact capture.
+"""
+
+import threading
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional, Sequence, FrozenSet, Set, Tuple
+
+from extractors import Extractor, build_extractor
+from lexicon import get_lexicon
+from trial_protocol import Criterion, TrialProtocol, get_protocol
+from question_stats import get_exclusion_rates
+
+# Snapshot protocol id for a panel joins the trial ids with this separator
+PANEL_SEPARATOR = '+'
+
+# Shared matchers kept at once: current panels plus superseded protocol
+# versions that calls in progress still use
+MAX_CACHED_MATCHERS = 16
+
+def _add_terms(terms: Dict[str, List[str]], more: Dict[str, List[str]]):
+    for term, synonyms in more.items():
+        known = terms.setdefault(term, [])
+        known.extend(synonym for synonym in synonyms if synonym not in known)
+
+def _merge_question(existing: Dict[str, Any], question: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine two trials' definitions of the same field; list vocabularies and lexicons are unioned"""
+    merged = dict(existing)
+    if existing.get('type') == 'list' and question.get('type') == 'list':
+        terms = {term: list(synonyms) for term, synonyms in existing.get('terms', {}).items()}
+        _add_terms(terms, question.get('terms', {}))
+        # One lexicon stays shared by name; a second, different one is folded in as inline terms
+        lexicon = question.get('lexicon')
+        if lexicon and lexicon != existing.get('lexicon'):
+            if existing.get('lexicon'):
+                _add_terms(terms, get_lexicon(lexicon))
+            else:
+                merged['lexicon'] = lexicon
+        if question.get('phonetic'):
+            merged['phonetic'] = True
+        if terms or 'terms' in existing:
+            merged['terms'] = terms
+    return merged
+
+class TrialMatcher:
+    """
+    Compiled panel of trials sharing one screening conversation
+
+    Immutable after construction and shared by every call screening
+    against the same set of trials.
+    """
+
+    def __init__(self, protocols: Sequence[TrialProtocol], exclusion_rates: Optional[Mapping[str, float]] = None):
+        """
+        Args:
+            protocols: Trials to screen for; the first one supplies the call's prompts
+            exclusion_rates: Historical share of callers each field's answer rules out
+                (see question_stats); higher-yield questions are asked first
+        """
+        if not protocols:
+            raise ValueError("A trial panel needs at least one protocol")
+        self.protocols: Dict[str, TrialProtocol] = {protocol.protocol_id: protocol for protocol in protocols}
+        self.primary = protocols[0]
+        self.panel_id = PANEL_SEPARATOR.join(self.protocols)
+        # Versions (file mtimes) of the protocols, saved with call snapshots
+        self.protocol_versions: Tuple[float, ...] = tuple(protocol.mtime for protocol in protocols)
+        self.all_trials: FrozenSet[str] = frozenset(self.protocols)
+
+        # Union of the trials' questions, one per field, in first-seen order
+        merged: Dict[str, Dict[str, Any]] = {}
+        # Where each field was first defined, to reuse that protocol's compiled extractor
+        origins: Dict[str, Tuple[MappingProxyType, Extractor]] = {}
+        for protocol in protocols:
+            for question, extractor in zip(protocol.questions, protocol.extractors):
+                field = question['field']
+                if field in merged:
+                    merged[field] = _merge_question(merged[field], question)
+                else:
+                    merged[field] = dict(question)
+                    origins[field] = (question, extractor)
+        self.questions: Tuple[MappingProxyType, ...] = tuple(MappingProxyType(question) for question in merged.values())
+        # Only a definition that merging changed (e.g. unioned vocabularies) needs its own extractor
+        self.extractors: Tuple[Extractor, ...] = tuple(
+            origins[question['field']][1] if question == origins[question['field']][0] else build_extractor(question)
+            for question in self.questions
+        )
+        self.contact_questions: FrozenSet[int] = frozenset(
+            index for index, question in enumerate(self.questions) if question.get('contact'))
+        # Questions whose answer may also turn up in replies to other questions
+        self.volunteer_slots: Tuple[int, ...] = tuple(
+            index for index, extractor in enumerate(self.extractors) if extractor.volunteers)
+
+        # Screening questions by descending exclusion rate (stable, so ties and
+        # fields without statistics keep protocol order); contact questions last
+        rates = exclusion_rates or {}
+        self.question_order: Tuple[int, ...] = tuple(sorted(
+            (index for index in range(len(self.questions)) if index not in self.contact_questions),
+            key=lambda index: -rates.get(self.questions[index]['field'], 0.0)
+        )) + tuple(sorted(self.contact_questions))
+
+        # Inverted index: field -> criterion -> trials applying that criterion
+        index: Dict[str, Dict[Criterion, Set[str]]] = {}
+        fields_by_trial: Dict[str, Set[str]] = {}
+        for protocol in protocols:
+            trial_fields = fields_by_trial.setdefault(protocol.protocol_id, set(protocol.required_fields))
+            for criterion in protocol.exclusions:
+                index.setdefault(criterion.field, {}).setdefault(criterion, set()).add(protocol.protocol_id)
+                trial_fields.add(criterion.field)
+        self._criteria_index: Dict[str, Tuple[Tuple[Criterion, FrozenSet[str]], ...]] = {
+            field: tuple((criterion, frozenset(trials)) for criterion, trials in criteria.items())
+            for field, criteria in index.items()
+        }
+        self._fields_by_trial: Dict[str, FrozenSet[str]] = {
+            trial: frozenset(trial_fields) for trial, trial_fields in fields_by_trial.items()
+        }
+
+    def prune(self, candidates: FrozenSet[str], field: str, value: Any) -> FrozenSet[str]:
+        """
+        Drop the trials an answer excludes
+
+        Args:
+            candidates: Trials still possible
+            field: Answered field
+            value: Extracted value (None leaves every trial possible)
+
+        Returns:
+            Remaining candidate trials
+        """
+        if value is None or not candidates:
+            return candidates
+        for criterion, trials in self._criteria_index.get(field, ()):
+            if not trials.isdisjoint(candidates) and criterion.excludes(value):
+                candidates = candidates - trials
+        return candidates
+
+    def candidates_for(self, patient_info) -> FrozenSet[str]:
+        """Trials not excluded by anything recorded so far"""
+        candidates = self.all_trials
+        for field in self._criteria_index:
+            candidates = self.prune(candidates, field, getattr(patient_info, field))
+        return candidates
+
+    def matched_trials(self, patient_info, candidates: Optional[FrozenSet[str]] = None) -> List[str]:
+        """Trials the caller qualifies for, in panel order"""
+        if candidates is None:
+            candidates = self.candidates_for(patient_info)
+        return [
+            trial for trial, protocol in self.protocols.items()
+            if trial in candidates
+            and all(getattr(patient_info, field) is not None for field in protocol.required_fields)
+        ]
+
+    def needed_fields(self, candidates: FrozenSet[str]) -> FrozenSet[str]:
+        """Fields that can still change the outcome for a remaining trial"""
+        needed: Set[str] = set()
+        for trial in candidates:
+            needed |= self._fields_by_trial[trial]
+        return frozenset(needed)
+
+    def next_question(self, candidates: FrozenSet[str], asked: Set[int]) -> Optional[int]:
+        """
+        Index of the next question worth asking
+
+        Screening questions some remaining trial depends on come first, in
+        question_order, then contact questions. Once every trial is ruled out the outcome is
+        decided, and the primary protocol's on_exclusion setting either goes
+        straight to contact capture ('contact') or ends the call ('conclude').
+
+        Args:
+            candidates: Trials still possible
+            asked: Indexes already asked or already answered in passing
+
+        Returns:
+            Question index, or None when the screening is complete
+        """
+        if not candidates and self.primary.on_exclusion == 'conclude':
+            return None
+        needed = self.needed_fields(candidates)
+        for index in self.question_order:
+            if index in asked:
+                continue
+            if index in self.contact_questions or self.questions[index]['field'] in needed:
+                return index
+        return None
+
+    def conclusion(self, matched: List[str]) -> str:
+        """Closing statement naming every trial the caller may qualify for"""
+        if not matched:
+            return self.primary.conclusion(False)
+        names = [self.protocols[trial].name for trial in matched]
+        trial_names = names[0] if len(names) == 1 else f"{', '.join(names[:-1])} and {names[-1]}"
+        return self.primary.prompts['eligible'].format(trial_name=trial_names)
+
+_matchers: Dict[Tuple[str, Tuple[float, ...]], Tuple[Tuple[TrialProtocol, ...], Mapping[str, float], TrialMatcher]] = {}
+_matchers_lock = threading.Lock()
+
+def get_matcher(protocol_ids: Optional[Sequence[str]] = None,
+                versions: Optional[Sequence[float]] = None) -> TrialMatcher:
+    """
+    Shared matcher for a panel of trials, rebuilt when any protocol or the
+    question statistics file reloads
+
+    Args:
+        protocol_ids: Trial protocol ids, or a panel id joined with '+'
+            (defaults to TRIAL_PROTOCOLS, else TRIAL_PROTOCOL)
+        versions: Protocol versions to use (TrialMatcher.protocol_versions of
+            a call in progress); None for the current ones
+
+    Returns:
+        Matcher (a single trial is a panel of one)
+
+    Raises:
+        ProtocolVersionError: If a requested version is no longer available
+    """
+    if protocol_ids is None:
+        from config import TRIAL_PROTOCOLS, TRIAL_PROTOCOL
+        protocol_ids = TRIAL_PROTOCOLS or [TRIAL_PROTOCOL]
+    if isinstance(protocol_ids, str):
+        protocol_ids = protocol_ids.split(PANEL_SEPARATOR)
+    protocol_ids = [protocol_id for protocol_id in protocol_ids if protocol_id]
+
+    if versions is None:
+        versions = [None] * len(protocol_ids)
+    protocols = tuple(get_protocol(protocol_id, version) for protocol_id, version in zip(protocol_ids, versions))
+    rates = get_exclusion_rates()
+    key = (PANEL_SEPARATOR.join(protocol_ids), tuple(protocol.mtime for protocol in protocols))
+    cached = _matchers.get(key)
+    if cached is not None and cached[1] is rates and all(a is b for a, b in zip(cached[0], protocols)):
+        return cached[2]
+
+    with _matchers_lock:
+        matcher = TrialMatcher(protocols, exclusion_rates=rates)
+        _matchers.pop(key, None)
+        _matchers[key] = (protocols, rates, matcher)
+        while len(_matchers) > MAX_CACHED_MATCHERS:
+            del _matchers[next(iter(_matchers))]
+        return matcher
@@ -0,0 +1,236 @@
+"""
+Trial Protocol
+Loads a declarative screening protocol (protocols/<id>.json) and compiles it
+once into an immutable object shared by every call: question table, answer
+extractors, prerendered prompts and eligibility criteria
+"""
+
+import os
+import json
+import time
+import threading
+import logging
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Any, Optional, Tuple
+
+from extractors import Extractor, build_extractor
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROTOCOLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'protocols')
+
+# Seconds between mtime checks for hot reload
+RELOAD_CHECK_INTERVAL = 1.0
+
+# Superseded protocol versions kept per registry for calls still using them
+RETAINED_VERSIONS = 8
+
+# What to do once the caller is ruled out: collect contact details for future
+# studies, or conclude the call right away
+ON_EXCLUSION_ACTIONS = ('contact', 'conclude')
+
+# Exclusion rules: name -> test applied to a known (non-None) field value
+_EXCLUSION_RULES = {
+    'equals': lambda value, operand: value == operand,
+    'outside': lambda value, operand: value < operand[0] or value > operand[1],
+    'any': lambda value, operand: bool(value) == operand,
+    'contains': lambda value, operand: any(item in operand for item in value),
+    'missing': lambda value, operand: not any(item in operand for item in value)
+}
+
+class ProtocolVersionError(ValueError):
+    """A call's protocol version is no longer available (the file changed and the old version was dropped)"""
+
+@dataclass(frozen=True)
+class Criterion:
+    """One exclusion criterion: the caller is excluded when the rule holds"""
+    field: str
+    rule: str
+    operand: Any
+
+    def excludes(self, value: Any) -> bool:
+        """True if a known field value rules the caller out; unknown values never do"""
+        if value is None:
+            return False
+        return _EXCLUSION_RULES[self.rule](value, self.operand)
+
+@dataclass(frozen=True)
+class TrialProtocol:
+    """Compiled screening protocol; never mutated, shared across calls"""
+    protocol_id: str
+    name: str
+    description: str
+    questions: Tuple[MappingProxyType, ...]
+    extractors: Tuple[Extractor, ...]
+    greeting: str
+    eligible_conclusion: str
+    ineligible_conclusion: str
+    exclusions: Tuple[Criterion, ...]
+    required_fields: Tuple[str, ...]
+    prompts: MappingProxyType
+    on_exclusion: str = 'contact'
+    mtime: float = 0.0
+
+    def conclusion(self, is_eligible: bool) -> str:
+        """Closing statement for an eligible or ineligible caller"""
+        return self.eligible_conclusion if is_eligible else self.ineligible_conclusion
+
+def _freeze(value: Any) -> Any:
+    """Make JSON operands hashable so criteria can be compared and indexed"""
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    return value
+
+def _compile_criterion(spec: Dict[str, Any]) -> Criterion:
+    rules = [rule for rule in spec if rule in _EXCLUSION_RULES]
+    if 'field' not in spec or len(rules) != 1:
+        raise ValueError(f"Exclusion needs a field and exactly one rule ({', '.join(_EXCLUSION_RULES)}): {spec}")
+    rule = rules[0]
+    operand = spec[rule]
+    if rule in ('contains', 'missing'):
+        operand = frozenset(operand)
+    return Criterion(spec['field'], rule, _freeze(operand))
+
+def compile_protocol(spec: Dict[str, Any], mtime: float = 0.0) -> TrialProtocol:
+    """
+    Compile a protocol definition into a TrialProtocol
+
+    Args:
+        spec: Parsed protocol JSON
+        mtime: Modification time of the source file
+
+    Returns:
+        Compiled protocol
+    """
+    name = spec['name']
+    prompts = spec.get('prompts', {})
+    questions = tuple(MappingProxyType(dict(question)) for question in spec['questions'])
+    eligibility = spec.get('eligibility', {})
+    on_exclusion = spec.get('on_exclusion', 'contact')
+    if on_exclusion not in ON_EXCLUSION_ACTIONS:
+        raise ValueError(f"on_exclusion must be one of {', '.join(ON_EXCLUSION_ACTIONS)}: {on_exclusion}")
+
+    return TrialProtocol(
+        protocol_id=spec['id'],
+        name=name,
+        description=spec.get('description', ''),
+        questions=questions,
+        extractors=tuple(build_extractor(question) for question in questions),
+        greeting=prompts['greeting'].format(trial_name=name),
+        eligible_conclusion=prompts['eligible'].format(trial_name=name),
+        ineligible_conclusion=prompts['ineligible'].format(trial_name=name),
+        exclusions=tuple(_compile_criterion(criterion) for criterion in eligibility.get('exclusions', [])),
+        required_fields=tuple(eligibility.get('required', [])),
+        prompts=MappingProxyType(dict(prompts)),
+        on_exclusion=on_exclusion,
+        mtime=mtime
+    )
+
+def load_protocol(path: str) -> TrialProtocol:
+    """Read and compile a protocol file"""
+    mtime = os.stat(path).st_mtime
+    with open(path, 'r') as f:
+        spec = json.load(f)
+    return compile_protocol(spec, mtime)
+
+class ProtocolRegistry:
+    """
+    Compiled protocols by id, reloaded when their file changes
+
+    Lookups are a dict hit; the file's mtime is checked at most once per
+    RELOAD_CHECK_INTERVAL. Calls already in progress keep the protocol
+    object they started with; the last RETAINED_VERSIONS compiled versions
+    stay available by mtime so a call restored from a snapshot does too.
+    """
+
+    def __init__(self, directory: str = DEFAULT_PROTOCOLS_DIR, check_interval: float = RELOAD_CHECK_INTERVAL):
+        self.directory = directory
+        self.check_interval = check_interval
+        self._protocols: Dict[str, TrialProtocol] = {}
+        self._checked: Dict[str, float] = {}
+        self._versions: Dict[Tuple[str, float], TrialProtocol] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, protocol_id: str) -> str:
+        return os.path.join(self.directory, f"{protocol_id}.json")
+
+    def get(self, protocol_id: str, version: Optional[float] = None) -> TrialProtocol:
+        """
+        Compiled protocol for an id, loading or reloading it if needed
+
+        Args:
+            protocol_id: Protocol file name without .json
+            version: A specific version (the protocol's mtime), e.g. the one
+                a call in progress started with; None for the current one
+
+        Raises:
+            ValueError: If the protocol does not exist
+            ProtocolVersionError: If that version is no longer retained
+        """
+        protocol = self._current(protocol_id)
+        if version is None or protocol.mtime == version:
+            return protocol
+        retained = self._versions.get((protocol_id, version))
+        if retained is None:
+            raise ProtocolVersionError(f"Protocol {protocol_id} changed and version {version} is no longer available")
+        return retained
+
+    def _current(self, protocol_id: str) -> TrialProtocol:
+        protocol = self._protocols.get(protocol_id)
+        now = time.monotonic()
+        if protocol is not None and now - self._checked.get(protocol_id, 0.0) < self.check_interval:
+            return protocol
+
+        with self._lock:
+            self._checked[protocol_id] = now
+            path = self._path(protocol_id)
+            try:
+                mtime = os.stat(path).st_mtime
+            except FileNotFoundError:
+                if protocol is not None:
+                    return protocol
+                raise ValueError(f"Unknown screening protocol: {protocol_id}")
+
+            if protocol is not None and protocol.mtime == mtime:
+                return protocol
+
+            try:
+                compiled = load_protocol(path)
+                if compiled.protocol_id != protocol_id:
+                    raise ValueError(f"{path} declares id '{compiled.protocol_id}'")
+            except Exception as e:
+                if protocol is None:
+                    raise
+                logger.error(f"Error reloading protocol {protocol_id}, keeping previous version: {e}")
+                return protocol
+
+            if protocol is not None:
+                logger.info(f"Reloaded protocol {protocol_id}")
+            self._protocols[protocol_id] = compiled
+            self._versions[(protocol_id, compiled.mtime)] = compiled
+            while len(self._versions) > RETAINED_VERSIONS:
+                del self._versions[next(iter(self._versions))]
+            return compiled
+
+_registry: Optional[ProtocolRegistry] = None
+_default_protocol_id: Optional[str] = None
+
+def get_protocol(protocol_id: Optional[str] = None, version: Optional[float] = None) -> TrialProtocol:
+    """
+    Shared compiled protocol from the configured protocols directory
+
+    Args:
+        protocol_id: Protocol file name without .json (defaults to TRIAL_PROTOCOL)
+        version: Specific version (mtime) to return, see ProtocolRegistry.get
+    """
+    global _registry, _default_protocol_id
+    if _registry is None:
+        from config import TRIAL_PROTOCOL, PROTOCOLS_DIR
+        _registry = ProtocolRegistry(PROTOCOLS_DIR)
+        _default_protocol_id = TRIAL_PROTOCOL
+    return _registry.get(protocol_id or _default_protocol_id, version)
@@ -13,6 +13,14 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# <Gather> settings every question starts from; per-question options override them
+DEFAULT_GATHER = {
+    'input': 'speech',
+    'speech_timeout': 'auto',
+    'timeout': 15,
+    'language': 'en-US'
+}
+
 class TwilioClient:
     def __init__(self, account_sid: Optional[str] = None, auth_token: Optional[str] = None):
         from config import TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN
@@ -75,12 +83,13 @@ class TwilioClient:
             logger.error(f"Error creating phone number: {e}")
             return None
     
-    def create_incoming_call_response(self, greeting_text: str) -> str:
+    def create_incoming_call_response(self, greeting_text: str, gather: Optional[Dict[str, Any]] = None) -> str:
         """
         Create TwiML response for incoming calls
         
         Args:
             greeting_text: Text to speak to the caller
+            gather: <Gather> options for the answer (hints, speech_model, timeouts)
         
         Returns:
             TwiML response as string
@@ -91,14 +100,7 @@ class TwilioClient:
         response.say(greeting_text, voice='alice')
         
         # Gather user input
-        gather = response.gather(
-            input='speech',
-            action='/process_speech',
-            method='POST',
-            speech_timeout='auto',
-            timeout=15,
-            language='en-US'
-        )
+        response.gather(action='/process_speech', method='POST', **{**DEFAULT_GATHER, **(gather or {})})
         
         # Fallback if no response
         response.say("I didn't hear anything. Please try again or press any key to continue.", voice='alice')
@@ -106,13 +108,16 @@ class TwilioClient:
         
         return str(response)
     
-    def create_speech_response(self, response_text: str, continue_conversation: bool = True) -> str:
+    def create_speech_response(self, response_text: str, continue_conversation: bool = True,
+                               gather: Optional[Dict[str, Any]] = None) -> str:
         """
         Create TwiML response for speech processing
         
         Args:
             response_text: Text to speak to the caller
             continue_conversation: Whether to continue gathering input
+            gather: <Gather> options for the question just asked (hints, speech_model,
+                timeouts, keypad input); DEFAULT_GATHER fills in the rest
         
         Returns:
             TwiML response as string
@@ -124,14 +129,7 @@ class TwilioClient:
         
         if continue_conversation:
             # Continue gathering responses
-            gather = response.gather(
-                input='speech',
-                action='/process_speech',
-                method='POST',
-                speech_timeout='auto',
-                timeout=15,
-                language='en-US'
-            )
+            response.gather(action='/process_speech', method='POST', **{**DEFAULT_GATHER, **(gather or {})})
             
             # Fallback
             response.say("I didn't catch that. Could you please repeat your answer?", voice='alice')
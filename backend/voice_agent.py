@@ -5,8 +5,18 @@ Manages conversation flow and screening logic
 
 import json
 import logging
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Any, Tuple
+from dataclasses import dataclass, fields
+from datetime import date
+
+from spoken_numbers import extract_digits
+from spoken_dates import parse_spoken_date
+from trial_protocol import TrialProtocol
+from trial_matcher import TrialMatcher, get_matcher
+from yes_no import YesNoClassifier
+from extractors import Extractor, YES_NO_GATHER, phone_number_digits
+from config import ASR_ACCEPT_CONFIDENCE, ASR_CONFIRM_CONFIDENCE
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -26,91 +36,109 @@ class PatientInfo:
     phone_last_four: Optional[str] = None
     availability_date: Optional[str] = None
 
+PATIENT_FIELDS = tuple(f.name for f in fields(PatientInfo))
+
+# Snapshot format version and compact conversation log event codes
+# (version 2 added the protocol versions)
+SNAPSHOT_VERSION = 2
+LOG_GREETING = 0
+LOG_PATIENT_RESPONSE = 1
+LOG_QUESTION = 2
+LOG_CONCLUSION = 3
+LOG_OTHER = 4
+
+# Re-prompt for questions whose extractor has no wording of its own
+DEFAULT_REPROMPT = "Sorry, I didn't catch that."
+
+# Reads the caller's answer to "Did you say ...?"
+_CONFIRMATION_CLASSIFIER = YesNoClassifier(yes=["i did", "that is it", "thats it"], no=["i didnt", "i did not"])
+
+# Answers parsed recently, shared by every call: the partial-result webhook
+# parses a transcript while the caller is still speaking, and the final
+# webhook finds it already done
+PARSE_CACHE_SIZE = 4096
+
+def transcript_key(speech_text: str) -> str:
+    """A transcript as extractors read it: case, spacing and closing punctuation dropped ("Forty." -> "forty")"""
+    return ' '.join(speech_text.lower().split()).rstrip('.!?')
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _score(extractor: Extractor, transcript: str, today: date) -> Tuple[Any, float]:
+    # today only keys the cache: "tomorrow" means a different date each day
+    return extractor.score(transcript)
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _volunteer(extractor: Extractor, transcript: str, today: date) -> Any:
+    return extractor.volunteer(transcript)
+
 class ClinicalTrialVoiceAgent:
     """
     AI Voice Agent specialized for clinical trial patient pre-screening
     """
     
-    def __init__(self):
+    def __init__(self, protocol: Optional[TrialProtocol] = None, matcher: Optional[TrialMatcher] = None):
+        """
+        Args:
+            protocol: Compiled screening protocol (defaults to the configured trial)
+            matcher: Panel of trials to screen for at once; overrides protocol
+        """
+        self.matcher = matcher or (TrialMatcher([protocol]) if protocol else get_matcher())
+        self.protocol = self.matcher.primary
+        # Trials not yet ruled out, pruned after every answer
+        self.candidates = self.matcher.all_trials
         self.conversation_stage = "greeting"
         self.patient_info = PatientInfo()
-        self.screening_questions = self._initialize_screening_questions()
         self.current_question_index = 0
         self.conversation_log = []
-        
-        # Clinical trial context
-        self.trial_name = "Clinical Research Study"
-        self.trial_description = "A research study to evaluate a new treatment for medical conditions"
-        
-    def _initialize_screening_questions(self) -> List[Dict[str, str]]:
-        """Initialize screening questions for clinical trial"""
-        return [
-            {
-                "question": "What is your age?",
-                "field": "age",
-                "type": "number"
-            },
-            {
-                "question": "Have you been diagnosed with any medical conditions?",
-                "field": "medical_conditions",
-                "type": "list"
-            },
-            {
-                "question": "Are you currently taking any medications?",
-                "field": "medications",
-                "type": "list"
-            },
-            {
-                "question": "Are you currently pregnant or nursing?",
-                "field": "pregnant",
-                "type": "boolean"
-            },
-            {
-                "question": "Do you have any severe medical conditions that require ongoing treatment?",
-                "field": "severe_conditions",
-                "type": "boolean"
-            },
-            {
-                "question": "What is the best phone number to reach you for follow-up? Please say the first 3 digits of your area code.",
-                "field": "phone_area_code",
-                "type": "text"
-            },
-            {
-                "question": "Now please say the next 3 digits of your phone number.",
-                "field": "phone_middle",
-                "type": "text"
-            },
-            {
-                "question": "Finally, please say the last 4 digits of your phone number.",
-                "field": "phone_last_four",
-                "type": "text"
-            },
-            {
-                "question": "What is the next date when you would be available for a screening visit? You can say it like 'ten sixteen' for October 16th, or 'October sixteenth', or 'the sixteenth of October'.",
-                "field": "availability_date",
-                "type": "text"
-            }
-        ]
     
-    def process_incoming_call(self) -> str:
-        """Handle initial incoming call"""
-        self.conversation_stage = "greeting"
+    @property
+    def screening_questions(self):
+        """Screening questions for clinical trial (shared, never mutated per call)"""
+        return self.matcher.questions
+    
+    @property
+    def extractors(self):
+        """Answer extractors, indexed like screening_questions"""
+        return self.matcher.extractors
+    
+    # Clinical trial context
+    @property
+    def trial_name(self) -> str:
+        return self.protocol.name
+    
+    @property
+    def trial_description(self) -> str:
+        return self.protocol.description
+    
+    def process_incoming_call(self, caller_number: Optional[str] = None) -> str:
+        """
+        Handle initial incoming call
         
-        greeting = f"""
-        Hello! Thank you for calling about our {self.trial_name}. 
-        I'm here to help you learn more about this study and see if you might be a good fit. 
-        This will take about 5 minutes. Are you ready to begin?
+        Args:
+            caller_number: Caller ID ('From'), offered later as the callback number
         """
+        self.conversation_stage = "greeting"
+        
+        greeting = self._greeting_text()
         
         self.conversation_log.append({"stage": "greeting", "response": greeting})
+        number = phone_number_digits([ch for ch in caller_number or '' if ch.isdigit()])
+        if number:
+            self.conversation_log.append({"stage": "greeting", "caller_number": number})
         return greeting.strip()
     
-    def process_patient_response(self, speech_text: str) -> str:
+    def _greeting_text(self) -> str:
+        """Greeting spoken at the start of the call"""
+        return self.protocol.greeting
+    
+    def process_patient_response(self, speech_text: str, asr_confidence: Optional[float] = None) -> str:
         """
         Process patient's spoken response and generate next question or conclusion
         
         Args:
             speech_text: Patient's spoken response
+            asr_confidence: Speech recognizer's confidence in the transcript (0.0 to 1.0),
+                None if unavailable
         
         Returns:
             AI response text
@@ -131,13 +159,30 @@ class ClinicalTrialVoiceAgent:
             if self.conversation_stage == "greeting":
                 print(f"DEBUG: In greeting stage, asking first question")
                 self.conversation_stage = "screening"
+                self.current_question_index = self._next_question_index()
                 return self._ask_next_question()
             
-            # Extract information from response
-            self._extract_patient_info(speech_text)
+            # Answer to "Did you say ...?"
+            pending = self._pending_confirmation()
+            if pending is not None:
+                if not self._resolve_confirmation(pending, speech_text):
+                    # Not the caller ID number: ask for it after all
+                    if pending.get("caller_id"):
+                        return self._ask_next_question()
+                    if not self._reprompt_used():
+                        return self._reprompt()
+            else:
+                # Extract information from response
+                value, action, confidence = self._extract_patient_info(speech_text, asr_confidence)
+                
+                if action == "confirm":
+                    return self._confirm(value, confidence)
+                # An answer that could not be read, or was barely heard, gets one clarifying re-prompt
+                if action == "reask" or (value is None and self._should_reprompt()):
+                    return self._reprompt()
             
-            # Increment question index after processing response
-            self.current_question_index += 1
+            # Move on to the next question worth asking
+            self.current_question_index = self._next_question_index()
             
             # Determine next step - check if we've completed all questions
             if self.current_question_index >= len(self.screening_questions):
@@ -155,246 +200,186 @@ class ClinicalTrialVoiceAgent:
             print(f"DEBUG: Traceback: {traceback.format_exc()}")
             return "I apologize, but I'm having trouble processing your response. Could you please repeat that?"
     
-    def _extract_patient_info(self, speech_text: str):
-        """Extract structured information from patient's speech"""
-        text_lower = speech_text.lower()
+    def _extract_patient_info(self, speech_text: str, asr_confidence: Optional[float] = None) -> tuple:
+        """
+        Extract structured information from patient's speech
         
+        The recognizer's confidence times the extractor's certainty decides
+        whether the value is stored ("accept"), read back to the caller
+        first ("confirm") or asked for again ("reask").
+        
+        Returns:
+            (value extracted for the current question or None, action or None,
+            confidence in the value)
+        """
         # Check if we're still in the screening phase
         if self.current_question_index >= len(self.screening_questions):
             print(f"DEBUG: Conversation already complete, skipping extraction")
-            return
-        
-        print(f"DEBUG: Extracting info for field: {self.screening_questions[self.current_question_index]['field']}")
-        
-        # Extract age
-        if "age" in self.screening_questions[self.current_question_index]["field"]:
-            import re
-            age_match = re.search(r'\b(\d{1,2})\b', speech_text)
-            if age_match:
-                self.patient_info.age = int(age_match.group(1))
-        
-        # Extract medical conditions
-        elif "medical_conditions" in self.screening_questions[self.current_question_index]["field"]:
-            if any(word in text_lower for word in ["diabetes", "diabetic"]):
-                self.patient_info.medical_conditions = self.patient_info.medical_conditions or []
-                self.patient_info.medical_conditions.append("diabetes")
-            if any(word in text_lower for word in ["hypertension", "high blood pressure"]):
-                self.patient_info.medical_conditions = self.patient_info.medical_conditions or []
-                self.patient_info.medical_conditions.append("hypertension")
-        
-        # Extract pregnancy status
-        elif "pregnant" in self.screening_questions[self.current_question_index]["field"]:
-            if any(word in text_lower for word in ["yes", "pregnant", "nursing", "breastfeeding"]):
-                self.patient_info.pregnant = True
-            elif any(word in text_lower for word in ["no", "not pregnant", "not nursing"]):
-                self.patient_info.pregnant = False
-        
-        # Extract severe conditions
-        elif "severe_conditions" in self.screening_questions[self.current_question_index]["field"]:
-            if any(word in text_lower for word in ["yes", "severe", "serious", "ongoing treatment"]):
-                self.patient_info.severe_conditions = True
-            elif any(word in text_lower for word in ["no", "not severe", "mild"]):
-                self.patient_info.severe_conditions = False
-        
-        # Extract phone number parts
-        elif "phone_area_code" in self.screening_questions[self.current_question_index]["field"]:
-            digits = self._extract_digits_from_speech(speech_text)
-            if len(digits) >= 3:
-                self.patient_info.phone_area_code = ''.join(digits[:3])
-                self.conversation_log.append({
-                    "stage": "screening",
-                    "extracted_area_code": self.patient_info.phone_area_code,
-                    "original_response": speech_text
-                })
-        
-        elif "phone_middle" in self.screening_questions[self.current_question_index]["field"]:
-            digits = self._extract_digits_from_speech(speech_text)
-            if len(digits) >= 3:
-                self.patient_info.phone_middle = ''.join(digits[:3])
-                self.conversation_log.append({
-                    "stage": "screening",
-                    "extracted_middle": self.patient_info.phone_middle,
-                    "original_response": speech_text
-                })
-        
-        elif "phone_last_four" in self.screening_questions[self.current_question_index]["field"]:
-            digits = self._extract_digits_from_speech(speech_text)
-            print(f"DEBUG: Last four digits - Input: '{speech_text}', Found digits: {digits}, Length: {len(digits)}")
-            
-            if len(digits) >= 4:
-                self.patient_info.phone_last_four = ''.join(digits[:4])
-                # Combine all phone number parts
-                if self.patient_info.phone_area_code and self.patient_info.phone_middle:
-                    full_phone = f"{self.patient_info.phone_area_code}-{self.patient_info.phone_middle}-{self.patient_info.phone_last_four}"
-                    self.patient_info.contact_info = full_phone
-                    self.conversation_log.append({
-                        "stage": "screening",
-                        "extracted_last_four": self.patient_info.phone_last_four,
-                        "full_phone": full_phone,
-                        "original_response": speech_text
-                    })
-        
-        elif "availability_date" in self.screening_questions[self.current_question_index]["field"]:
-            date_text = self._extract_date_from_speech(speech_text)
-            print(f"DEBUG: Availability date - Input: '{speech_text}', Extracted: '{date_text}'")
-            
-            if date_text:
-                self.patient_info.availability_date = date_text
-                self.conversation_log.append({
-                    "stage": "screening",
-                    "extracted_date": self.patient_info.availability_date,
-                    "original_response": speech_text
-                })
+            return None, None, 0.0
+        
+        field = self.screening_questions[self.current_question_index]["field"]
+        extractor = self.extractors[self.current_question_index]
+        print(f"DEBUG: Extracting info for field: {field}")
+        
+        value, certainty = _score(extractor, transcript_key(speech_text), date.today())
+        confidence = certainty if asr_confidence is None else certainty * asr_confidence
+        print(f"DEBUG: {field} - Input: '{speech_text}', Extracted: {value!r} ({confidence:.2f})")
+        action = None
+        if value is not None:
+            action = self._confidence_action(confidence)
+            if action == "accept":
+                self._store_value(self.current_question_index, value, confidence)
+        
+        if extractor.logged:
+            event = {
+                "stage": "screening",
+                "field": field,
+                "extracted": value,
+                "confidence": confidence,
+                "original_response": speech_text
+            }
+            if action not in (None, "accept"):
+                event["action"] = action
+            # Keyword matching alone would have had to ask again
+            if value is not None and extractor.reprompt and extractor.keyword_answer(speech_text) is None:
+                event["reprompt_avoided"] = True
+            self.conversation_log.append(event)
+        
+        # Asides are only trusted from a clearly heard transcript
+        if asr_confidence is None or asr_confidence >= ASR_ACCEPT_CONFIDENCE:
+            self._extract_volunteered_info(speech_text, 1.0 if asr_confidence is None else asr_confidence)
+        return value, action, confidence
+    
+    def _confidence_action(self, confidence: float) -> str:
+        """Accept, confirm or re-ask an extracted value given how sure we are of it"""
+        if confidence >= ASR_ACCEPT_CONFIDENCE:
+            return "accept"
+        # Once the question was already asked again, reading back beats a third try
+        if confidence >= ASR_CONFIRM_CONFIDENCE or self._reprompt_used():
+            return "confirm"
+        return "reask"
+    
+    def _store_value(self, index: int, value: Any, confidence: float):
+        """Record an accepted value, prune the candidate trials and log its confidence"""
+        field = self.screening_questions[index]["field"]
+        self.extractors[index].apply(self.patient_info, field, value)
+        self.candidates = self.matcher.prune(self.candidates, field, getattr(self.patient_info, field))
+        self.conversation_log.append({
+            "stage": "screening",
+            "stored": field,
+            "confidence": round(confidence, 3)
+        })
+    
+    def _confirm(self, value: Any, confidence: float) -> str:
+        """Read an uncertain answer back to the caller ("Did you say 4 0 8?")"""
+        question = f"Did you say {self.extractors[self.current_question_index].spoken(value)}?"
+        self.conversation_log.append({
+            "stage": "screening",
+            "question": question,
+            "confirm_index": self.current_question_index,
+            "value": value,
+            "confidence": confidence
+        })
+        return question
+    
+    def _offer_caller_id(self) -> Optional[str]:
+        """Ask whether the number the caller is calling from is the one to use, once per call"""
+        extractor = self.extractors[self.current_question_index]
+        number = self.caller_number()
+        if not extractor.caller_id or number is None:
+            return None
+        if any(event.get("caller_id") for event in self.conversation_log):
+            return None
+        question = f"Is the number you're calling from, {extractor.spoken(number)}, the best one to reach you?"
+        self.conversation_log.append({
+            "stage": "screening",
+            "question": question,
+            "confirm_index": self.current_question_index,
+            "value": number,
+            "confidence": 1.0,
+            "caller_id": True
+        })
+        return question
+    
+    def caller_number(self) -> Optional[str]:
+        """Caller ID as 10 digits, None if withheld or not a full number"""
+        for event in self.conversation_log:
+            if "caller_number" in event:
+                return event["caller_number"]
+        return None
+    
+    def gather_options(self) -> Dict[str, Any]:
+        """Twilio <Gather> options for the answer to what was just asked"""
+        # The consent question and read-backs are answered yes or no
+        if self.conversation_stage == "greeting" or self._pending_confirmation() is not None:
+            return dict(YES_NO_GATHER)
+        if self.conversation_stage != "screening" or self.current_question_index >= len(self.screening_questions):
+            return {}
+        return dict(self.extractors[self.current_question_index].gather)
+    
+    def _pending_confirmation(self) -> Optional[Dict[str, Any]]:
+        """The read-back awaiting a yes or no, if that was the last thing asked"""
+        for event in reversed(self.conversation_log):
+            if "question" in event:
+                return event if "confirm_index" in event else None
+        return None
+    
+    def _resolve_confirmation(self, pending: Dict[str, Any], speech_text: str) -> bool:
+        """
+        Store the read-back value if the caller confirms it
+        
+        The value keeps the confidence it was heard with; the log records
+        separately that the caller confirmed it.
+        
+        Returns:
+            True if the value was confirmed
+        """
+        confirmed, _ = _CONFIRMATION_CLASSIFIER.classify(speech_text)
+        field = self.screening_questions[pending["confirm_index"]]["field"]
+        print(f"DEBUG: {field} - Confirmation '{speech_text}': {confirmed}")
+        self.conversation_log.append({
+            "stage": "screening",
+            "field": field,
+            "confirmed": bool(confirmed),
+            "original_response": speech_text
+        })
+        if confirmed:
+            # Read-backs logged before their confidence was recorded count as heard clearly
+            self._store_value(pending["confirm_index"], pending["value"], pending.get("confidence", 1.0))
+        return bool(confirmed)
+    
+    def _extract_volunteered_info(self, speech_text: str, confidence: float = 1.0):
+        """Fill other still-empty fields the patient answered in passing ("I'm 52 and not pregnant")"""
+        for index in self.matcher.volunteer_slots:
+            if index == self.current_question_index:
+                continue
+            field = self.screening_questions[index]["field"]
+            if getattr(self.patient_info, field) is not None:
+                continue
+            value = _volunteer(self.extractors[index], transcript_key(speech_text), date.today())
+            if value is None:
+                continue
+            print(f"DEBUG: {field} - Volunteered in '{speech_text}': {value!r}")
+            self.conversation_log.append({
+                "stage": "screening",
+                "field": field,
+                "volunteered": value,
+                "original_response": speech_text
+            })
+            self._store_value(index, value, confidence)
     
     def _extract_digits_from_speech(self, speech_text: str) -> List[str]:
         """Extract digits from speech text, handling both spoken numbers and digits"""
-        import re
-        
-        # Dictionary for spoken numbers (expanded)
-        spoken_digits = {
-            'zero': '0', 'one': '1', 'two': '2', 'three': '3', 'four': '4',
-            'five': '5', 'six': '6', 'seven': '7', 'eight': '8', 'nine': '9',
-            'oh': '0', 'o': '0',  # 'oh' and 'o' are often used for zero
-            'to': '2', 'too': '2', 'for': '4', 'ate': '8',  # Common mispronunciations
-            'ten': '10', 'eleven': '11', 'twelve': '12', 'thirteen': '13',
-            'fourteen': '14', 'fifteen': '15', 'sixteen': '16', 'seventeen': '17',
-            'eighteen': '18', 'nineteen': '19', 'twenty': '20', 'thirty': '30',
-            'forty': '40', 'fifty': '50', 'sixty': '60', 'seventy': '70',
-            'eighty': '80', 'ninety': '90'
-        }
-        
-        # Clean the text and remove common filler words
-        text = speech_text.lower().strip()
-        # Remove common filler words that might interfere
-        filler_words = ['um', 'uh', 'like', 'the', 'and', 'or', 'is', 'are']
-        for filler in filler_words:
-            text = text.replace(f' {filler} ', ' ')
-        
-        words = text.split()
-        digits = []
-        
-        # Look for spoken digits
-        for word in words:
-            if word in spoken_digits:
-                digit_value = spoken_digits[word]
-                # Handle multi-digit numbers by splitting them
-                if len(digit_value) > 1:
-                    for char in digit_value:
-                        digits.append(char)
-                else:
-                    digits.append(digit_value)
-        
-        # If no spoken digits found, look for actual digits
-        if not digits:
-            digits = re.findall(r'\d', speech_text)
+        digits = extract_digits(speech_text)
         
         # Debug logging
-        print(f"DEBUG: Input='{speech_text}' -> Words={words} -> Digits={digits}")
+        print(f"DEBUG: Input='{speech_text}' -> Digits={digits}")
         
         return digits
     
-    def _extract_date_from_speech(self, speech_text: str) -> str:
+    def _extract_date_from_speech(self, speech_text: str) -> Optional[date]:
         """Extract date from speech text, handling various formats"""
-        import re
-        
-        text_lower = speech_text.lower().strip()
-        
-        # Month names mapping
-        months = {
-            'january': '01', 'jan': '01',
-            'february': '02', 'feb': '02',
-            'march': '03', 'mar': '03',
-            'april': '04', 'apr': '04',
-            'may': '05',
-            'june': '06', 'jun': '06',
-            'july': '07', 'jul': '07',
-            'august': '08', 'aug': '08',
-            'september': '09', 'sep': '09', 'sept': '09',
-            'october': '10', 'oct': '10',
-            'november': '11', 'nov': '11',
-            'december': '12', 'dec': '12'
-        }
-        
-        # Ordinal numbers mapping
-        ordinals = {
-            'first': '1', 'second': '2', 'third': '3', 'fourth': '4', 'fifth': '5',
-            'sixth': '6', 'seventh': '7', 'eighth': '8', 'ninth': '9', 'tenth': '10',
-            'eleventh': '11', 'twelfth': '12', 'thirteenth': '13', 'fourteenth': '14',
-            'fifteenth': '15', 'sixteenth': '16', 'seventeenth': '17', 'eighteenth': '18',
-            'nineteenth': '19', 'twentieth': '20', 'twenty-first': '21', 'twenty-second': '22',
-            'twenty-third': '23', 'twenty-fourth': '24', 'twenty-fifth': '25', 'twenty-sixth': '26',
-            'twenty-seventh': '27', 'twenty-eighth': '28', 'twenty-ninth': '29', 'thirtieth': '30',
-            'thirty-first': '31'
-        }
-        
-        # Regular numbers
-        numbers = {
-            'zero': '0', 'one': '1', 'two': '2', 'three': '3', 'four': '4', 'five': '5',
-            'six': '6', 'seven': '7', 'eight': '8', 'nine': '9', 'ten': '10',
-            'eleven': '11', 'twelve': '12', 'thirteen': '13', 'fourteen': '14', 'fifteen': '15',
-            'sixteen': '16', 'seventeen': '17', 'eighteen': '18', 'nineteen': '19', 'twenty': '20',
-            'twenty-one': '21', 'twenty-two': '22', 'twenty-three': '23', 'twenty-four': '24',
-            'twenty-five': '25', 'twenty-six': '26', 'twenty-seven': '27', 'twenty-eight': '28',
-            'twenty-nine': '29', 'thirty': '30', 'thirty-one': '31'
-        }
-        
-        # Pattern 1: "ten sixteen" -> "10/16"
-        pattern1 = r'(\w+)\s+(\w+)'
-        match1 = re.search(pattern1, text_lower)
-        if match1:
-            first_word = match1.group(1)
-            second_word = match1.group(2)
-            
-            # Check if first word is a month and second is a day
-            if first_word in months and second_word in numbers:
-                month = months[first_word]
-                day = numbers[second_word]
-                return f"{month}/{day}"
-            elif first_word in numbers and second_word in numbers:
-                # Could be month/day format
-                month = numbers[first_word]
-                day = numbers[second_word]
-                if int(month) <= 12 and int(day) <= 31:
-                    return f"{month}/{day}"
-        
-        # Pattern 2: "October sixteenth" or "October 16" or "dec 15"
-        pattern2 = r'(\w+)\s+(\w+)'
-        match2 = re.search(pattern2, text_lower)
-        if match2:
-            first_word = match2.group(1)
-            second_word = match2.group(2)
-            
-            if first_word in months:
-                month = months[first_word]
-                if second_word in ordinals:
-                    day = ordinals[second_word]
-                    return f"{month}/{day}"
-                elif second_word in numbers:
-                    day = numbers[second_word]
-                    return f"{month}/{day}"
-        
-        # Pattern 3: "the sixteenth of October"
-        pattern3 = r'the\s+(\w+)\s+of\s+(\w+)'
-        match3 = re.search(pattern3, text_lower)
-        if match3:
-            day_word = match3.group(1)
-            month_word = match3.group(2)
-            
-            if day_word in ordinals and month_word in months:
-                day = ordinals[day_word]
-                month = months[month_word]
-                return f"{month}/{day}"
-        
-        # Pattern 4: Direct numbers like "10/16" or "10 16"
-        pattern4 = r'(\d{1,2})[/\s]+(\d{1,2})'
-        match4 = re.search(pattern4, speech_text)
-        if match4:
-            month = match4.group(1)
-            day = match4.group(2)
-            return f"{month}/{day}"
-        
-        # If no pattern matches, return the original text
-        return speech_text
+        return parse_spoken_date(speech_text)
     
     def _ask_next_question(self) -> str:
         """Ask the next screening question"""
@@ -411,6 +396,11 @@ class ClinicalTrialVoiceAgent:
             
             self.conversation_stage = "screening"
             
+            # One yes instead of reading out a phone number
+            offer = self._offer_caller_id()
+            if offer is not None:
+                return offer
+            
             self.conversation_log.append({
                 "stage": "screening",
                 "question": question,
@@ -430,22 +420,7 @@ class ClinicalTrialVoiceAgent:
         
         # Simple eligibility assessment
         is_eligible = self._assess_eligibility()
-        
-        if is_eligible:
-            conclusion = f"""
-            Thank you for answering all the questions. Based on your responses, 
-            you appear to be a potential candidate for our {self.trial_name}. 
-            We will contact you within 24 hours to schedule a screening visit 
-            and provide more details about the study. 
-            Have a great day!
-            """
-        else:
-            conclusion = f"""
-            Thank you for your interest in our {self.trial_name}. 
-            Based on your responses, you may not be eligible for this particular study, 
-            but we will keep your information for future research opportunities. 
-            Thank you for your time.
-            """
+        conclusion = self._conclusion_text(is_eligible)
         
         self.conversation_log.append({
             "stage": "conclusion",
@@ -453,28 +428,160 @@ class ClinicalTrialVoiceAgent:
             "conclusion": conclusion
         })
         
+        turns_saved = self.turns_saved()
+        if turns_saved:
+            logger.info(f"Screening decided early, skipped {turns_saved} question(s)")
+        reprompts = self.reprompt_counts()
+        if reprompts["asked"] or reprompts["avoided"]:
+            logger.info(f"Re-prompted {reprompts['asked']} time(s), avoided {reprompts['avoided']}")
+        
         return conclusion.strip()
     
-    def _assess_eligibility(self) -> bool:
-        """Assess patient eligibility based on collected information"""
-        # Simple eligibility criteria
-        if self.patient_info.age and (self.patient_info.age < 18 or self.patient_info.age > 75):
-            return False
+    def _next_question_index(self) -> int:
+        """Index of the question to ask next; len(screening_questions) once done"""
+        next_index = self.matcher.next_question(self.candidates, self._asked_questions() | self._answered_questions())
+        return len(self.screening_questions) if next_index is None else next_index
+    
+    def turns_saved(self) -> int:
+        """
+        Questions skipped because the outcome was already decided (0 until the conclusion)
         
-        if self.patient_info.pregnant:
-            return False
-
-        if self.patient_info.medications:
+        Questions answered another way (volunteered, or the phone number taken
+        from caller ID) were not skipped by the verdict and are not counted.
+        """
+        if self.conversation_stage != "conclusion":
+            return 0
+        return len(self.screening_questions) - len(self._asked_questions() | self._answered_questions())
+    
+    def _reprompt_used(self) -> bool:
+        """Whether the current question was already asked a second time"""
+        return any(event.get("reprompt_index") == self.current_question_index for event in self.conversation_log)
+    
+    def _should_reprompt(self) -> bool:
+        """Whether the current question has a re-prompt that was not used yet"""
+        # Nothing left to re-ask once the screening has concluded
+        if self.conversation_stage == "conclusion" or self.current_question_index >= len(self.extractors):
             return False
+        return bool(self.extractors[self.current_question_index].reprompt) and not self._reprompt_used()
+    
+    def _reprompt(self) -> str:
+        """Ask the current question again, once, after an answer that could not be read"""
+        extractor = self.extractors[self.current_question_index]
+        question = f"{extractor.reprompt or DEFAULT_REPROMPT} {self.screening_questions[self.current_question_index]['question']}"
+        self.conversation_log.append({
+            "stage": "screening",
+            "question": question,
+            "reprompt_index": self.current_question_index
+        })
+        return question
+    
+    def reprompt_counts(self) -> Dict[str, int]:
+        """Re-prompts asked on this call, and answers the yes/no classifier read that keywords could not"""
+        return {
+            "asked": sum(1 for event in self.conversation_log if "reprompt_index" in event),
+            "avoided": sum(1 for event in self.conversation_log if event.get("reprompt_avoided"))
+        }
+    
+    def field_confidence(self) -> Dict[str, float]:
+        """Confidence each stored field was accepted with (recognizer score times extractor certainty)"""
+        return {event["stored"]: event["confidence"] for event in self.conversation_log if "stored" in event}
+    
+    def turn_certainty(self, since: int) -> float:
+        """
+        Lowest extractor certainty a turn accepted a value with, from its first
+        log position on; 0.0 if it read an answer back or asked again, as a
+        different recognizer score could have changed that decision
+        """
+        certainty = 1.0
+        events = self.conversation_log[since:]
+        # A confirmed read-back stores the value as it was heard the turn before
+        confirming = any("confirmed" in event for event in events)
+        for event in events:
+            # The caller ID offer does not depend on how well the answer was heard
+            if "action" in event or ("confirm_index" in event and "question" in event
+                                     and not event.get("caller_id")):
+                return 0.0
+            if "stored" in event and not confirming:
+                certainty = min(certainty, event["confidence"])
+        return certainty
+    
+    def finalize_turn(self, since: int, speech_text: str, asr_confidence: Optional[float] = None):
+        """
+        Record a turn taken from a partial transcript as the final result would have
         
-        if self.patient_info.medical_conditions:
-            return False
+        The preview heard the partial words with no recognizer score; the log
+        gets the final transcript, and the values it extracted or took as
+        volunteered get the recognizer's score folded into their confidence.
+        Values stored by a confirmation do not depend on it and are left as is.
         
-        if self.patient_info.severe_conditions:
-            return False
+        Args:
+            since: Log length when the turn started
+            speech_text: Final speech result
+            asr_confidence: Its recognizer confidence, None if unavailable
+        """
+        events = self.conversation_log[since:]
+        # An answer to a read-back stores the value as it was heard the turn before
+        rescale = asr_confidence is not None and not any("confirmed" in event for event in events)
+        extracted: Dict[str, float] = {}
+        for event in events:
+            for key in ("patient_response", "original_response"):
+                if key in event:
+                    event[key] = speech_text
+            if not rescale:
+                continue
+            if "extracted" in event and "confidence" in event:
+                event["confidence"] *= asr_confidence
+                extracted[event["field"]] = event["confidence"]
+            elif "volunteered" in event:
+                extracted[event["field"]] = asr_confidence
+            elif "stored" in event:
+                # Rounded like _store_value, from the unrounded confidence where the log has it
+                event["confidence"] = round(extracted.pop(event["stored"], event["confidence"] * asr_confidence), 3)
+    
+    def confirmation_counts(self) -> Dict[str, int]:
+        """Uncertain answers read back to the caller, and how many the caller confirmed"""
+        return {
+            "asked": sum(1 for event in self.conversation_log if "confirm_index" in event),
+            "confirmed": sum(1 for event in self.conversation_log if event.get("confirmed"))
+        }
+    
+    def _asked_questions(self) -> set:
+        """Indexes of the questions already asked on this call"""
+        return {event["question_index"] for event in self.conversation_log if "question_index" in event}
+    
+    def _answered_questions(self) -> set:
+        """Indexes of the questions whose field is already known, e.g. volunteered earlier"""
+        return {
+            index for index, question in enumerate(self.screening_questions)
+            if getattr(self.patient_info, question["field"]) is not None
+        }
+    
+    def _conclusion_text(self, is_eligible: bool) -> str:
+        """Closing statement for an eligible or ineligible caller"""
+        return self.matcher.conclusion(self.matched_trials() if is_eligible else [])
+    
+    def _assess_eligibility(self) -> Optional[bool]:
+        """
+        Assess patient eligibility based on collected information
         
-        # If we have basic info and no exclusions, consider eligible
-        return self.patient_info.age is not None
+        Returns:
+            False once every trial is ruled out, True once no screening question
+            is left that could rule the caller out, None until then (a call
+            abandoned mid-screening has no verdict)
+        """
+        if not self.candidates:
+            return False
+        if self.conversation_stage != "conclusion":
+            # The question being asked right now is not answered yet
+            settled = (self._asked_questions() - {self.current_question_index}) | self._answered_questions()
+            next_index = self.matcher.next_question(self.candidates, settled)
+            if next_index is not None and next_index not in self.matcher.contact_questions:
+                return None
+        return bool(self.matched_trials())
+    
+    def matched_trials(self) -> List[str]:
+        """Ids of the trials the caller currently qualifies for"""
+        return self.matcher.matched_trials(self.patient_info)
     
     def get_conversation_summary(self) -> Dict[str, Any]:
         """Get a summary of the conversation"""
@@ -495,12 +602,117 @@ class ClinicalTrialVoiceAgent:
                 "availability_date": self.patient_info.availability_date
             },
             "eligible": self._assess_eligibility(),
+            "matched_trials": self.matched_trials(),
+            "turns_saved": self.turns_saved(),
+            "reprompts": self.reprompt_counts(),
+            "confirmations": self.confirmation_counts(),
+            "field_confidence": self.field_confidence(),
             "conversation_log": self.conversation_log
         }
     
+    def to_snapshot(self) -> tuple:
+        """
+        Capture the per-call state as a compact tuple of builtins
+        
+        Only the changing state is saved: stage, question index, filled
+        patient fields and the conversation log, plus the versions of the
+        protocols the call started with. Log events that can be
+        re-rendered from the shared protocol (greeting, questions, conclusion)
+        are stored as short codes instead of their full text.
+        
+        Returns:
+            Snapshot tuple, safe for marshal/pickle/json
+        """
+        patient_values = []
+        for name in PATIENT_FIELDS:
+            value = getattr(self.patient_info, name)
+            patient_values.append(tuple(value) if isinstance(value, list) else value)
+        
+        return (
+            SNAPSHOT_VERSION,
+            self.matcher.panel_id,
+            self.matcher.protocol_versions,
+            self.conversation_stage,
+            self.current_question_index,
+            tuple(patient_values),
+            tuple(self._encode_log_event(event) for event in self.conversation_log)
+        )
+    
+    @classmethod
+    def from_snapshot(cls, snapshot: tuple) -> "ClinicalTrialVoiceAgent":
+        """
+        Rebuild an agent from a snapshot produced by to_snapshot()
+        
+        Args:
+            snapshot: Snapshot tuple
+        
+        Returns:
+            Agent pointing at the shared screening protocol, in the version
+            the call started with even if the file has changed since
+        
+        Raises:
+            ProtocolVersionError: If that protocol version is no longer available
+        """
+        version = snapshot[0]
+        if version == SNAPSHOT_VERSION:
+            _, protocol_id, protocol_versions, stage, question_index, patient_values, log_events = snapshot
+        elif version == 1:
+            # Written before protocol versions were recorded: the current protocol
+            _, protocol_id, stage, question_index, patient_values, log_events = snapshot
+            protocol_versions = None
+        else:
+            raise ValueError(f"Unsupported snapshot version: {version}")
+        
+        agent = cls.__new__(cls)
+        agent.matcher = get_matcher(protocol_id, protocol_versions)
+        agent.protocol = agent.matcher.primary
+        agent.conversation_stage = stage
+        agent.current_question_index = question_index
+        agent.patient_info = PatientInfo(*[
+            list(value) if isinstance(value, tuple) else value
+            for value in patient_values
+        ])
+        agent.candidates = agent.matcher.candidates_for(agent.patient_info)
+        agent.conversation_log = [agent._decode_log_event(event) for event in log_events]
+        return agent
+    
+    def _encode_log_event(self, event: Dict[str, Any]) -> tuple:
+        """Encode a conversation log entry as a compact tuple"""
+        keys = tuple(event)
+        if keys == ("stage", "patient_response"):
+            return (LOG_PATIENT_RESPONSE, event["stage"], event["patient_response"])
+        if keys == ("stage", "question", "question_index"):
+            index = event["question_index"]
+            if (0 <= index < len(self.screening_questions)
+                    and self.screening_questions[index]["question"] == event["question"]):
+                return (LOG_QUESTION, index)
+        elif keys == ("stage", "response") and event["response"] == self._greeting_text():
+            return (LOG_GREETING,)
+        elif keys == ("stage", "eligible", "conclusion") and event["conclusion"] == self._conclusion_text(event["eligible"]):
+            return (LOG_CONCLUSION, event["eligible"])
+        return (LOG_OTHER, tuple(event.items()))
+    
+    def _decode_log_event(self, event: tuple) -> Dict[str, Any]:
+        """Expand a compact log tuple back into a conversation log entry"""
+        code = event[0]
+        if code == LOG_PATIENT_RESPONSE:
+            return {"stage": event[1], "patient_response": event[2]}
+        if code == LOG_QUESTION:
+            return {
+                "stage": "screening",
+                "question": self.screening_questions[event[1]]["question"],
+                "question_index": event[1]
+            }
+        if code == LOG_GREETING:
+            return {"stage": "greeting", "response": self._greeting_text()}
+        if code == LOG_CONCLUSION:
+            return {"stage": "conclusion", "eligible": event[1], "conclusion": self._conclusion_text(event[1])}
+        return dict(event[1])
+    
     def reset_conversation(self):
         """Reset conversation for a new patient"""
         self.conversation_stage = "greeting"
         self.patient_info = PatientInfo()
         self.current_question_index = 0
         self.conversation_log = []
+        self.candidates = self.matcher.all_trials
@@ -0,0 +1,217 @@
+"""
+Yes/No Classifier
+Compiled once per boolean question; reads an answer as yes, no or unknown
+with a confidence score in a single pass over the tokens. Negations flip
+the field's own phrases within a short scope ("I'm not pregnant"), and
+hedges ("I don't know", "not that I know of") are recognised as phrases
+before their words are read on their own.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Cue classes
+YES, NO, UNKNOWN, NEGATOR, FIELD_YES, FIELD_NO = range(6)
+
+# Tokens after a negator that it still applies to ("not currently pregnant")
+NEGATION_SCOPE = 3
+
+_TOKEN_RE = re.compile(r"[a-z]+|[,.;!?]")
+
+# phrase -> (cue, confidence); apostrophes are dropped before matching ("don't" -> "dont")
+_GENERIC_PHRASES = {
+    YES: ({'yes', 'yeah', 'yep', 'yup', 'yea', 'ya', 'sure', 'correct', 'right', 'absolutely',
+           'definitely', 'certainly', 'affirmative', 'of course', 'uh huh', 'mm hmm', 'that is right',
+           'thats right', 'that is correct', 'thats correct'}, 0.95),
+    NO: ({'no', 'nope', 'nah', 'negative', 'none', 'nothing', 'never', 'not at all', 'no way',
+          'uh uh', 'neither', 'absolutely not', 'definitely not', 'certainly not', 'of course not'}, 0.95),
+    UNKNOWN: ({'dont know', 'do not know', 'not sure', 'unsure', 'no idea', 'maybe', 'possibly',
+               'perhaps', 'dont remember', 'do not remember', 'cant remember', 'can not remember',
+               'cannot remember', 'not certain', 'hard to say', 'could be', 'might be', 'im not sure',
+               'i am not sure', 'im not certain', 'i am not certain', 'i dont know', 'i do not know',
+               'i dont remember', 'i do not remember', 'i have no idea'}, 0.9),
+    NEGATOR: ({'not', 'dont', 'do not', 'doesnt', 'does not', 'isnt', 'is not', 'arent', 'am not',
+               'im not', 'i am not', 'i dont', 'i do not', 'havent', 'have not', 'i havent', 'i have not',
+               'hasnt', 'wasnt', 'werent', 'no longer', 'without', 'nor', 'never been'}, 0.7)
+}
+# Idioms that settle the answer on their own, with a lower confidence than a plain yes/no
+_IDIOMS = {
+    'not that i know of': (NO, 0.8), 'not that i know': (NO, 0.8), 'not to my knowledge': (NO, 0.8),
+    'i dont think so': (NO, 0.75), 'dont think so': (NO, 0.75), 'i do not think so': (NO, 0.75),
+    'not really': (NO, 0.8), 'i think so': (YES, 0.7), 'i believe so': (YES, 0.7),
+    'i guess so': (YES, 0.6), 'i think i am': (YES, 0.7), 'i think i do': (YES, 0.7),
+    # Weak on their own: "I am" can lead into "I am not sure"
+    'i am': (YES, 0.8), 'i do': (YES, 0.8), 'i have': (YES, 0.8), 'i was': (YES, 0.8)
+}
+
+def _words(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower().replace("'", '').replace('’', ''))
+
+# Contraction endings that lexicon.normalize splits off ("don't" -> "don t")
+_CONTRACTION_TAILS = frozenset({'t', 's', 'm', 're', 've', 'll', 'd'})
+
+# The caller starts a new statement: a negation before it no longer applies
+FIRST_PERSON = frozenset({'i', 'im', 'ive', 'id', 'ill', 'me', 'but'})
+
+# List joiners stay inside a negation ("not on metformin or insulin")
+_JOINERS = frozenset({'or', 'nor', 'and'})
+
+# Every generic phrase, so "not sure" is read whole instead of as a negation
+_SCOPE_PHRASES: Dict[Tuple[str, ...], int] = {
+    **{tuple(phrase.split()): cue for cue, (phrases, _) in _GENERIC_PHRASES.items() for phrase in phrases},
+    **{tuple(phrase.split()): cue for phrase, (cue, _) in _IDIOMS.items()}
+}
+_SCOPE_LONGEST = max(len(key) for key in _SCOPE_PHRASES)
+
+def negated_positions(words: List[str]) -> Set[int]:
+    """
+    Positions of the words a negation applies to ("I'm not on insulin", "never had cancer")
+
+    A negation covers up to NEGATION_SCOPE words after it, not counting
+    list joiners, and ends early where the caller starts a new statement
+    ("no, I have diabetes").
+
+    Args:
+        words: Normalized words (lexicon.normalize(...).split())
+
+    Returns:
+        Word positions inside a negation
+    """
+    # Rejoin contractions so they read like the classifier's phrases ("don t" -> "dont")
+    tokens: List[Tuple[str, List[int]]] = []
+    for position, word in enumerate(words):
+        if word in _CONTRACTION_TAILS and tokens:
+            tokens[-1] = (tokens[-1][0] + word, tokens[-1][1] + [position])
+        else:
+            tokens.append((word, [position]))
+
+    negated: Set[int] = set()
+    index = 0
+    while index < len(tokens):
+        for length in range(min(_SCOPE_LONGEST, len(tokens) - index), 0, -1):
+            cue = _SCOPE_PHRASES.get(tuple(token for token, _ in tokens[index:index + length]))
+            if cue is not None:
+                break
+        else:
+            index += 1
+            continue
+        index += length
+        if cue not in (NEGATOR, NO):
+            continue
+        scope = NEGATION_SCOPE
+        while scope and index < len(tokens) and tokens[index][0] not in FIRST_PERSON:
+            token, positions = tokens[index]
+            negated.update(positions)
+            if token not in _JOINERS:
+                scope -= 1
+            index += 1
+    return negated
+
+class YesNoClassifier:
+    """
+    Yes/no/unknown reading of an answer to one boolean question
+
+    Generic cues ("yeah", "nope", "I don't know") are shared by every
+    question; the question's own phrases ("pregnant", "mild") say yes or no
+    in its terms and are the ones a negation flips.
+    """
+
+    def __init__(self, yes: Iterable[str] = (), no: Iterable[str] = ()):
+        """
+        Args:
+            yes: Phrases that mean yes for this question ("pregnant", "nursing")
+            no: Phrases that mean no for this question ("mild")
+        """
+        phrases: Dict[Tuple[str, ...], Tuple[int, float]] = {}
+        for cue, (words, confidence) in _GENERIC_PHRASES.items():
+            for phrase in words:
+                phrases[tuple(phrase.split())] = (cue, confidence)
+        for phrase, (cue, confidence) in _IDIOMS.items():
+            phrases[tuple(phrase.split())] = (cue, confidence)
+        for field_phrases, cue in ((yes, FIELD_YES), (no, FIELD_NO)):
+            for phrase in field_phrases:
+                key = tuple(_words(phrase))
+                if key and key not in phrases:
+                    phrases[key] = (cue, 0.9)
+        self._phrases = phrases
+        self._longest = max(len(key) for key in phrases)
+
+    def classify(self, speech_text: str) -> Tuple[Optional[bool], float]:
+        """
+        Read an answer as yes, no or unknown
+
+        Args:
+            speech_text: Speech recognition result
+
+        Returns:
+            (True/False, confidence), or (None, confidence it is unknown):
+            high for an explicit "I don't know", 0.0 when no cue was heard
+        """
+        words = _words(speech_text)
+        votes: List[Tuple[bool, float]] = []
+        unknown = 0.0
+        scope = 0
+        negated_vote = -1
+        negated_by_no = False
+        position = 0
+        while position < len(words):
+            if words[position] in ',.;!?':
+                scope = 0
+                position += 1
+                continue
+            # Longest phrase starting here
+            for length in range(min(self._longest, len(words) - position), 0, -1):
+                match = self._phrases.get(tuple(words[position:position + length]))
+                if match is not None:
+                    break
+            else:
+                position += 1
+                scope = max(scope - 1, 0)
+                continue
+            cue, confidence = match
+            position += length
+
+            if cue == NEGATOR:
+                if scope and not negated_by_no:
+                    # "not ... not" cancels out; leave it to the other cues
+                    votes.pop(negated_vote)
+                    scope = 0
+                else:
+                    # A bare negator with nothing to flip ("I'm not", "I haven't") is a soft no
+                    votes.append((False, confidence))
+                    negated_vote = len(votes) - 1
+                    negated_by_no = False
+                    scope = NEGATION_SCOPE
+                continue
+            if cue == UNKNOWN:
+                unknown = max(unknown, confidence)
+                scope = 0
+            elif scope and negated_by_no and cue in (FIELD_YES, FIELD_NO):
+                # "no serious problems", "no, it's mild": both say no
+                votes[negated_vote] = (False, max(confidence, votes[negated_vote][1]))
+                scope = 0
+            elif scope and not negated_by_no and cue in (FIELD_YES, FIELD_NO, YES):
+                # "not pregnant", "not mild", "not right now": the phrase decides the negation
+                votes[negated_vote] = (cue == FIELD_NO, confidence)
+                scope = 0
+            elif cue == NO:
+                # "no" and "nothing" also negate the field phrase that follows ("nothing serious")
+                votes.append((False, confidence))
+                negated_vote = len(votes) - 1
+                negated_by_no = True
+                scope = NEGATION_SCOPE
+            else:
+                votes.append((cue in (YES, FIELD_YES), confidence))
+                scope = 0
+
+        if not votes or unknown >= max(confidence for _, confidence in votes):
+            return None, unknown
+        answers = {answer for answer, _ in votes}
+        if len(answers) == 1:
+            confidence = max(confidence for _, confidence in votes)
+            # Agreeing cues ("nope, not pregnant") reinforce each other
+            if len(votes) > 1:
+                confidence = min(confidence + 0.04, 0.99)
+            return votes[0][0], confidence
+        # Mixed cues: callers correct themselves, so the last one wins, weakly
+        return votes[-1][0], 0.55